@@ -0,0 +1,91 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import sqlparse
+from src.parser.lexer import tokenizeStatements
+from src.parser.parser import convertToMetaData, expandTokens
+from src.parser.splitter import splitStatements
+from src.parser.tables.create import SQLCreateTable
+from .generate import generateSchema
+
+def _throughput(count, function, repeat):
+    """ Returns the best statements/sec over repeat runs of function """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count / best if best else float('inf')
+
+def _peakMemory(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def runBenchmarks(sqlCode, repeat=3):
+    """ Measures each stage of the parser on sqlCode and returns the results as a dict """
+    texts = [sqlCode[start:end] for start, end in splitStatements(sqlCode) if sqlCode[start:end].strip()]
+    statements = [sqlparse.parse(text)[0] for text in texts]
+    tokenLists = [expandTokens(statement.tokens) for statement in statements]
+    fastTokenLists = [tokenizeStatements(text)[0] for text in texts]
+    count = len(texts)
+
+    results = {'statements': count, 'throughput': {}, 'peak_memory': {}}
+    throughput = results['throughput']
+    throughput['convertToMetaData'] = _throughput(count, lambda: convertToMetaData(sqlCode), repeat)
+    throughput['convertToMetaData_fast'] = _throughput(count, lambda: convertToMetaData(sqlCode, lexer='fast'), repeat)
+    throughput['expandTokens'] = _throughput(count, lambda: [expandTokens(statement.tokens) for statement in statements], repeat)
+    throughput['SQLCreateTable'] = _throughput(count, lambda: [SQLCreateTable(tokens) for tokens in tokenLists], repeat)
+    throughput['SQLCreateTable_fast'] = _throughput(count, lambda: [SQLCreateTable(tokens) for tokens in fastTokenLists], repeat)
+    results['peak_memory']['convertToMetaData'] = _peakMemory(lambda: convertToMetaData(sqlCode))
+    results['peak_memory']['convertToMetaData_fast'] = _peakMemory(lambda: convertToMetaData(sqlCode, lexer='fast'))
+    return results
+
+def findRegressions(results, baseline, threshold=0.2):
+    """ Returns a message for every throughput that dropped more than threshold below the baseline """
+    regressions = []
+    for name, value in baseline['throughput'].items():
+        current = results['throughput'].get(name)
+        if current is not None and current < value * (1 - threshold):
+            regressions.append(f"{name}: {current:.0f} statements/sec, baseline {value:.0f} ({current / value - 1:+.0%})")
+    return regressions
+
+parser = argparse.ArgumentParser(description="Benchmarks the parser on a synthetic schema")
+parser.add_argument('--tables', type=int, default=1000, help="The number of tables to generate.")
+parser.add_argument('--columns', type=int, default=10, help="The number of columns per table.")
+parser.add_argument('--identity', type=float, default=0.3, help="The share of tables with an IDENTITY column.")
+parser.add_argument('--decimal', type=float, default=0.2, help="The share of DECIMAL columns.")
+parser.add_argument('--foreign-keys', type=float, default=0.1, help="The share of foreign key columns.")
+parser.add_argument('--comments', type=float, default=0.1, help="The share of tables and columns with a comment.")
+parser.add_argument('--repeat', type=int, default=3, help="The number of runs per measurement; the best is kept.")
+parser.add_argument('--save', type=str, metavar='FILE', help="Save the results as a JSON baseline.")
+parser.add_argument('--baseline', type=str, metavar='FILE', help="Fail if throughput drops past --threshold below this baseline.")
+parser.add_argument('--threshold', type=float, default=0.2, help="The allowed drop in throughput, as a fraction.")
+
+def main():
+    args = parser.parse_args()
+    sqlCode = generateSchema(args.tables, args.columns, args.identity, args.decimal, args.foreign_keys, args.comments)
+    results = runBenchmarks(sqlCode, args.repeat)
+    results['options'] = {'tables': args.tables, 'columns': args.columns, 'identity': args.identity,
+        'decimal': args.decimal, 'foreign_keys': args.foreign_keys, 'comments': args.comments}
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = findRegressions(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"Regression in {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
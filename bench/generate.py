@@ -0,0 +1,39 @@
+import random
+
+TYPES = ['INT', 'BIGINT', 'SMALLINT', 'BIT', 'DATETIME', 'DATE', 'FLOAT', 'VARCHAR(50)', 'NVARCHAR(200)', 'CHAR(10)', 'UNIQUEIDENTIFIER']
+
+def generateTable(index, columns=10, identityShare=0.3, decimalShare=0.2, foreignKeyShare=0.1, commentShare=0.1, rng=random):
+    """ Returns a CREATE TABLE statement for a synthetic table """
+    lines = []
+    if rng.random() < commentShare:
+        lines.append(f"-- Table t{index} generated for benchmarking")
+    definitions = []
+    if rng.random() < identityShare:
+        definitions.append("id INT NOT NULL IDENTITY(1,1)")
+    else:
+        definitions.append("id INT NOT NULL")
+    foreignKeys = []
+    for column in range(1, columns):
+        roll = rng.random()
+        if index > 0 and roll < foreignKeyShare:
+            definitions.append(f"c{column} INT NULL")
+            foreignKeys.append(f"FOREIGN KEY (c{column}) REFERENCES t{rng.randrange(index)}(id) ON DELETE CASCADE")
+        elif roll < foreignKeyShare + decimalShare:
+            definitions.append(f"c{column} DECIMAL({rng.randint(5, 38)}, {rng.randint(0, 4)}) NOT NULL DEFAULT 0")
+        else:
+            nullable = 'NULL' if rng.random() < 0.5 else 'NOT NULL'
+            definitions.append(f"c{column} {rng.choice(TYPES)} {nullable}")
+        if rng.random() < commentShare:
+            definitions[-1] += f" /* column {column} */"
+    definitions.append("PRIMARY KEY (id)")
+    definitions += foreignKeys
+    lines.append(f"CREATE TABLE t{index} (\n    " + ",\n    ".join(definitions) + "\n)")
+    return "\n".join(lines)
+
+def generateSchema(tables=1000, columns=10, identityShare=0.3, decimalShare=0.2, foreignKeyShare=0.1, commentShare=0.1, seed=0):
+    """ Returns a T-SQL script of synthetic CREATE TABLE statements separated by GO """
+    rng = random.Random(seed)
+    return "\nGO\n".join(
+        generateTable(index, columns, identityShare, decimalShare, foreignKeyShare, commentShare, rng)
+        for index in range(tables)
+    ) + "\nGO\n"
@@ -0,0 +1,47 @@
+import argparse
+import http.client
+import json
+import os.path
+import sys
+
+# Only the standard library is imported, so asking a running server (main.py --serve) starts fast
+DEFAULT_PORT = 8765
+
+parser = argparse.ArgumentParser(description="Ask a running mssql-compare server to compare two schemas")
+parser.add_argument('-s', '--source', type=str, help="The original SQL file/directory/snapshot/database.", required=True)
+parser.add_argument('-u', '--updated', type=str, help="The updated SQL file/directory/snapshot/database.", required=True)
+parser.add_argument('--format', choices=['ndjson', 'text'], default='text', help="Write text, or one JSON record per line.")
+parser.add_argument('--renames', action='store_true', help="Report dropped and added columns or tables with the same definition as renames.")
+parser.add_argument('--rename-threshold', type=float, metavar='N', help="The confidence (0 to 1) a rename needs to be reported.")
+parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="The localhost port the server listens on.")
+parser.add_argument('--timeout', type=float, default=600, metavar='SECONDS', help="How long to wait for the server to answer.")
+
+def _location(source):
+    """ Paths are sent absolute, as the server may run from another directory """
+    return os.path.abspath(source) if os.path.exists(source) else source
+
+def request(source, updated, port=DEFAULT_PORT, timeout=600, **options):
+    """ Returns (status, body) of a compare request """
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        body = dict(options, source=_location(source), updated=_location(updated))
+        connection.request('POST', '/compare', json.dumps(body), {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        return response.status, response.read().decode('utf-8')
+    finally:
+        connection.close()
+
+def main():
+    args = parser.parse_args()
+    try:
+        status, body = request(args.source, args.updated, args.port, args.timeout, format=args.format,
+            renames=args.renames, rename_threshold=args.rename_threshold)
+    except OSError as e:
+        sys.exit(f"Can't reach the server on port {args.port}: {e}")
+    if status != 200:
+        sys.exit(body.rstrip())
+    sys.stdout.write(body)
+
+
+if __name__ == '__main__':
+    main()
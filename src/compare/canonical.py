@@ -0,0 +1,220 @@
+import functools
+import hashlib
+import re
+
+# A part of a multi-part name: [bracketed], "quoted" or bare
+_NAME_PART = re.compile(r'\s*(?:\[((?:[^\]]|\]\])*)\]|"((?:[^"]|"")*)"|([^.\s]+))\s*(?:\.|$)')
+
+# Types that SQL Server treats as the same, by the name it reports them under
+_TYPE_SYNONYMS = {
+    'INTEGER': 'INT',
+    'DEC': 'DECIMAL',
+    'CHARACTER': 'CHAR',
+    'DOUBLE PRECISION': 'FLOAT',
+    'ROWVERSION': 'TIMESTAMP',
+    'NATIONAL CHARACTER': 'NCHAR',
+    'NATIONAL CHAR': 'NCHAR',
+    'NATIONAL CHARACTER VARYING': 'NVARCHAR',
+    'NATIONAL CHAR VARYING': 'NVARCHAR',
+    'CHAR VARYING': 'VARCHAR',
+    'CHARACTER VARYING': 'VARCHAR',
+    'BINARY VARYING': 'VARBINARY'
+}
+
+def unquoteName(name):
+    """ The name inside [brackets] or "quotes", or name itself when it isn't quoted """
+    if name[:1] == '[' and name[-1:] == ']':
+        return name[1:-1].replace(']]', ']')
+    if name[:1] == '"' and name[-1:] == '"':
+        return name[1:-1].replace('""', '"')
+    return name
+
+def normalizeName(name):
+    """ Strips [] or "" quoting and folds case, as SQL Server compares names.
+    The default dbo schema is dropped from qualified names, as the catalog does. """
+    if name is None:
+        return None
+    if '.' not in name:
+        return unquoteName(name).lower()
+    parts = []
+    position = 0
+    while position < len(name):
+        match = _NAME_PART.match(name, position)
+        if match is None or match.end() == position:
+            # Not a well formed multi-part name, such as [a.b] with a dot inside the quotes
+            return unquoteName(name).lower()
+        bracketed, quoted, bare = match.groups()
+        if bracketed is not None:
+            parts.append(bracketed.replace(']]', ']'))
+        elif quoted is not None:
+            parts.append(quoted.replace('""', '"'))
+        else:
+            parts.append(bare)
+        position = match.end()
+    if len(parts) == 2 and parts[0].lower() == 'dbo':
+        parts = parts[1:]
+    return '.'.join(parts).lower()
+
+def canonicalType(dataType):
+    if dataType is None:
+        return None
+    dataType = ' '.join(dataType.upper().split())
+    return _TYPE_SYNONYMS.get(dataType, dataType)
+
+def canonicalSize(size):
+    """ Sizes as written in a script, e.g. '20' or 'max', and as read from the catalog compare equal """
+    if isinstance(size, str):
+        return int(size) if size.isdigit() else size.upper()
+    return size
+
+_EXPRESSION_TOKEN = re.compile(r"""
+    N?'[^']*(?:''[^']*)*'?
+  | \[[^\]]*(?:\]\][^\]]*)*\]?
+  | "[^"]*(?:""[^"]*)*"?
+  | \d+(?:\.\d*)?(?:E[-+]?\d+)?
+  | [\w@#$]+
+  | [<>!]=|<>|![<>]
+  | \S
+""", re.VERBOSE | re.IGNORECASE)
+
+# How tightly each operator binds, per T-SQL's operator precedence
+_BINARY = {'*': 5, '/': 5, '%': 5, '+': 4, '-': 4, '&': 4, '^': 4, '|': 4,
+    '=': 3, '>': 3, '<': 3, '>=': 3, '<=': 3, '<>': 3, '!=': 3, '!<': 3, '!>': 3, 'IS': 3,
+    'NOT': 2, 'AND': 1, 'OR': 0, 'LIKE': 0, 'IN': 0, 'BETWEEN': 0}
+_UNARY = 6
+_CLAUSES = frozenset(['CASE', 'WHEN', 'THEN', 'ELSE', 'END', 'AS'])
+_ATOM = 7
+
+def expressionTokens(value):
+    """ Splits an expression into strings, names, numbers, operators and punctuation """
+    return _EXPRESSION_TOKEN.findall(value)
+
+def _isWord(token):
+    return token[:1].isalnum() or token[:1] in '_@#$[""'
+
+def _isUnary(tokens, index):
+    previous = tokens[index - 1] if index > 0 else None
+    return tokens[index] in ('+', '-', '~') and (previous is None or previous in ('(', ',') or previous in _BINARY
+        or previous in _CLAUSES or not _isWord(previous) and previous != ')')
+
+def _strength(tokens, index):
+    """ How tightly the operator at index binds, None when the token isn't an operator """
+    if _isUnary(tokens, index):
+        return _UNARY
+    return _BINARY.get(tokens[index])
+
+def _groupStrength(tokens, start, end):
+    """ How tightly the loosest operator between start and end binds, outside nested parentheses """
+    strength = _ATOM
+    depth = 0
+    for index in range(start, end):
+        token = tokens[index]
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif depth == 0:
+            if token in _CLAUSES:
+                return -1
+            operator = _strength(tokens, index)
+            if operator is not None:
+                strength = min(strength, operator)
+    return strength
+
+def _redundant(tokens, start, end):
+    """ Whether the parentheses at start and end can go without changing what the expression means """
+    before = tokens[start - 1] if start > 0 else None
+    after = tokens[end + 1] if end + 1 < len(tokens) else None
+    if before == 'IN' or before not in _BINARY and before not in _CLAUSES and before is not None and _isWord(before):
+        return False # The parentheses of a function call, or of IN (...)
+    strength = _groupStrength(tokens, start + 1, end)
+    if before not in (None, '(', ',') and before not in _CLAUSES:
+        left = _strength(tokens, start - 1)
+        if left is None or strength <= left:
+            return False
+    if after not in (None, ')', ','):
+        right = _BINARY.get(after)
+        if right is None:
+            right = -1 if after in _CLAUSES else _ATOM
+        # Operators of the same precedence group left to right, so a left operand needs no parentheses
+        if strength < right:
+            return False
+    return True
+
+def _foldCase(token):
+    """ Upper-cases a token unless it's a string or a quoted name """
+    if token[:1] in "'[\"" or token[:2].upper() == "N'":
+        return token[:1].upper() + token[1:]
+    return token.upper()
+
+@functools.lru_cache(maxsize=65536)
+def canonicalExpression(value):
+    """ Expressions as written in a script and as stored by SQL Server compare
+    equal: a*2 and ([a]*(2)), or 0 and ((0)). Names are unquoted, case is folded
+    outside of strings and parentheses that change nothing are dropped. """
+    if value is None:
+        return None
+    tokens = [_foldCase(token) for token in expressionTokens(value)]
+    removed = True
+    while removed:
+        removed = False
+        stack = []
+        for index, token in enumerate(tokens):
+            if token == '(':
+                stack.append(index)
+            elif token == ')' and stack:
+                start = stack.pop()
+                if _redundant(tokens, start, index):
+                    del tokens[index]
+                    del tokens[start]
+                    removed = True
+                    break
+    res = ''
+    previous = None
+    for token in tokens:
+        if token[:1] in '["':
+            token = unquoteName(token).upper()
+        if previous is not None and _isWord(previous) and _isWord(token):
+            res += ' '
+        res += token
+        previous = token
+    # A call without arguments, such as getdate(), can be written without them in a default
+    return res[:-2] if res.endswith('()') else res
+
+def canonicalDefault(value):
+    """ Defaults as written in a script and as stored by SQL Server, e.g. ((0)) or (getdate()), compare equal """
+    return canonicalExpression(value)
+
+def columnDefinition(column):
+    """ The attributes of a column apart from the keys it belongs to, with
+    anything left to SQL Server's defaults filled in the way it would """
+    nullable = column.nullable
+    if nullable is None:
+        nullable = not column.primary_key
+    return (canonicalType(column.data_type), canonicalSize(column.size), column.precision, column.scale,
+        None if column.identity is None else tuple(column.identity), nullable, canonicalDefault(column.default_value),
+        canonicalExpression(column.computed))
+
+def _action(action):
+    return None if action is None or action.upper() == 'NO ACTION' else action.upper()
+
+def foreignKeyDefinition(foreignKey, columnNames=None, primaryKeys=None):
+    """ columnNames maps renamed columns to their new names. primaryKeys maps
+    normalized table names to their normalized primary key columns, which a
+    foreign key without a column list references. """
+    columns = (normalizeName(column) for column in foreignKey.columns)
+    refTable = normalizeName(foreignKey.ref_table)
+    refColumns = tuple(normalizeName(column) for column in foreignKey.ref_columns)
+    if not refColumns and primaryKeys is not None:
+        refColumns = primaryKeys.get(refTable, ())
+    return (
+        tuple(columns if columnNames is None else (columnNames.get(column, column) for column in columns)),
+        refTable,
+        refColumns,
+        _action(foreignKey.on_delete),
+        _action(foreignKey.on_update)
+    )
+
+def digest(value):
+    """ A stable hash of a value made of tuples, strings, numbers, booleans and None """
+    return hashlib.blake2b(repr(value).encode('utf-8'), digest_size=16).digest()
@@ -0,0 +1,204 @@
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .diff import Change
+
+class SqlServerDialect():
+    """ Checksums computed by SQL Server itself """
+    count = "COUNT_BIG(*)"
+
+    def quote(self, name):
+        if name[:1] == '[' or '.' in name:
+            return name
+        return '[' + name.replace(']', ']]') + ']'
+
+    def prepare(self, connection):
+        pass
+
+    def rowChecksum(self, columns):
+        return f"BINARY_CHECKSUM({', '.join(columns)})"
+
+    def aggregate(self, expression):
+        return f"CHECKSUM_AGG({expression})"
+
+def _rowChecksum(*values):
+    return zlib.crc32(repr(values).encode('utf-8'))
+
+class SqliteDialect():
+    """ A stand-in for SQL Server, with the row checksum registered as a function """
+    count = "COUNT(*)"
+
+    def quote(self, name):
+        if name[:1] == '[' and name[-1:] == ']':
+            name = name[1:-1].replace(']]', ']')
+        return '"' + name.replace('"', '""') + '"'
+
+    def prepare(self, connection):
+        connection.create_function('row_checksum', -1, _rowChecksum, deterministic=True)
+
+    def rowChecksum(self, columns):
+        return f"row_checksum({', '.join(columns)})"
+
+    def aggregate(self, expression):
+        return f"SUM({expression})"
+
+# SQL Server takes at most 2100 parameters per query
+MAX_PARAMETERS = 2100
+
+def primaryKeyColumns(table):
+    """ The names of the primary key columns of a table, in key order so ranges follow the index """
+    return table.primaryKeyColumns()
+
+class _TableCompare():
+    """ Compares the rows of one table on both sides through one connection each """
+    def __init__(self, table, source, updated, dialect, options):
+        self.table = table
+        self.source = source
+        self.updated = updated
+        self.dialect = dialect
+        self.options = options
+        self.name = dialect.quote(table.tableName)
+        self.keys = [dialect.quote(name) for name in primaryKeyColumns(table)]
+        self.orderBy = ', '.join(self.keys)
+        self.checksum = dialect.rowChecksum([dialect.quote(name) for name in table.columns])
+
+    def _after(self, values):
+        """ A predicate for keys after values, as T-SQL can't compare row values """
+        clauses = []
+        params = []
+        for index, key in enumerate(self.keys):
+            clauses.append(' AND '.join([f"{column} = ?" for column in self.keys[:index]] + [f"{key} > ?"]))
+            params += values[:index + 1]
+        return '(' + ' OR '.join(f"({clause})" for clause in clauses) + ')', params
+
+    def _range(self, low, high):
+        """ A predicate for the keys in (low, high], either end open when None """
+        predicates = []
+        params = []
+        if low is not None:
+            predicate, values = self._after(low)
+            predicates.append(predicate)
+            params += values
+        if high is not None:
+            predicate, values = self._after(high)
+            predicates.append(f"NOT {predicate}")
+            params += values
+        return ' AND '.join(predicates) or '1 = 1', params
+
+    def boundaries(self, connection, low, high, step):
+        """ Every step-th key in (low, high] """
+        predicate, params = self._range(low, high)
+        cursor = connection.execute(
+            f"SELECT {self.orderBy} FROM (SELECT {self.orderBy}, ROW_NUMBER() OVER (ORDER BY {self.orderBy}) AS rn "
+            f"FROM {self.name} WHERE {predicate}) AS numbered WHERE rn % ? = 0 ORDER BY {self.orderBy}", params + [step])
+        return [tuple(row) for row in cursor.fetchall()]
+
+    def checksums(self, connection, ranges):
+        """ Returns (count, checksum) for each range, from one query per batch """
+        cases = []
+        caseParams = []
+        wheres = []
+        whereParams = []
+        for index, (low, high) in enumerate(ranges):
+            predicate, params = self._range(low, high)
+            cases.append(f"WHEN {predicate} THEN {index}")
+            caseParams += params
+            wheres.append(f"({predicate})")
+            whereParams += params
+        cursor = connection.execute(
+            f"SELECT bucket, {self.dialect.count}, {self.dialect.aggregate('row_sum')} FROM ("
+            f"SELECT CASE {' '.join(cases)} END AS bucket, {self.checksum} AS row_sum "
+            f"FROM {self.name} WHERE {' OR '.join(wheres)}) AS buckets GROUP BY bucket", caseParams + whereParams)
+        res = [(0, None)] * len(ranges)
+        for bucket, count, checksum in cursor.fetchall():
+            res[bucket] = (count, checksum)
+        return res
+
+    def rows(self, connection, low, high):
+        """ Returns {key: checksum} for the rows in (low, high] """
+        predicate, params = self._range(low, high)
+        cursor = connection.execute(
+            f"SELECT {self.orderBy}, {self.checksum} FROM {self.name} WHERE {predicate} ORDER BY {self.orderBy}", params)
+        return {tuple(row[:-1]): row[-1] for row in cursor.fetchall()}
+
+    def _iterRowChanges(self, low, high):
+        sourceRows = self.rows(self.source, low, high)
+        updatedRows = self.rows(self.updated, low, high)
+        for key, checksum in sourceRows.items():
+            if key not in updatedRows:
+                yield Change('row', 'dropped', self.table.tableName, ', '.join(map(str, key)))
+            elif updatedRows[key] != checksum:
+                yield Change('row', 'altered', self.table.tableName, ', '.join(map(str, key)))
+        for key in updatedRows:
+            if key not in sourceRows:
+                yield Change('row', 'added', self.table.tableName, ', '.join(map(str, key)))
+
+    def _split(self, ranges, counts):
+        """ Splits each range into about fanout smaller ones at keys taken from the side with more rows """
+        res = []
+        for (low, high), (sourceCount, updatedCount) in zip(ranges, counts):
+            connection = self.source if sourceCount >= updatedCount else self.updated
+            step = max(1, -(-max(sourceCount, updatedCount) // self.options['fanout']))
+            bounds = [low] + self.boundaries(connection, low, high, step) + [high]
+            res += [(bounds[index], bounds[index + 1]) for index in range(len(bounds) - 1) if bounds[index] != bounds[index + 1]]
+        return res
+
+    def compare(self):
+        """ Returns the row Changes, bisecting only the ranges whose checksums differ """
+        options = self.options
+        bounds = [None] + self.boundaries(self.source, None, None, options['chunkRows']) + [None]
+        ranges = [(bounds[index], bounds[index + 1]) for index in range(len(bounds) - 1)]
+        # A range binds both of its bounds twice, and a bound on k key columns takes k(k+1)/2 parameters
+        width = len(self.keys)
+        batchRanges = max(1, min(options['batchRanges'], MAX_PARAMETERS // (2 * width * (width + 1))))
+        changes = []
+        while ranges:
+            differing = []
+            counts = []
+            for start in range(0, len(ranges), batchRanges):
+                batch = ranges[start:start + batchRanges]
+                for span, source, updated in zip(batch, self.checksums(self.source, batch), self.checksums(self.updated, batch)):
+                    if source != updated:
+                        differing.append(span)
+                        counts.append((source[0], updated[0]))
+            toSplit = []
+            splitCounts = []
+            for span, count in zip(differing, counts):
+                if max(count) <= options['rowLimit']:
+                    changes += self._iterRowChanges(*span)
+                else:
+                    toSplit.append(span)
+                    splitCounts.append(count)
+            ranges = self._split(toSplit, splitCounts)
+        return changes
+
+def iterDataDiff(tables, connectSource, connectUpdated, dialect=None, workers=4, chunkRows=100000, fanout=16, rowLimit=256, batchRanges=32):
+    """ Compares the rows of every table with a primary key between two databases.
+
+    connectSource and connectUpdated return a new DB-API connection when
+    called; each of the at most workers tables compared at once gets its own.
+    Tables are cut into ranges of about chunkRows keys, and checksums of
+    batchRanges ranges are fetched per query. A range that differs is split
+    into fanout parts until it holds at most rowLimit rows, which are then
+    compared by key. Yields (table, changes, error) as each table finishes.
+    """
+    dialect = dialect or SqlServerDialect()
+    options = {'chunkRows': chunkRows, 'fanout': max(2, fanout), 'rowLimit': rowLimit, 'batchRanges': batchRanges}
+
+    def compareTable(table):
+        source = connectSource()
+        try:
+            updated = connectUpdated()
+            try:
+                dialect.prepare(source)
+                dialect.prepare(updated)
+                return _TableCompare(table, source, updated, dialect, options).compare()
+            finally:
+                updated.close()
+        finally:
+            source.close()
+
+    with ThreadPoolExecutor(workers) as executor:
+        futures = {executor.submit(compareTable, table): table for table in tables if primaryKeyColumns(table)}
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], None if error else future.result(), error
@@ -0,0 +1,225 @@
+from .canonical import columnDefinition, digest, foreignKeyDefinition, normalizeName
+from .renames import matchRenames
+
+class Change():
+    """ A single difference between the source and the updated schema.
+
+    kind is 'table', 'column', 'primary_key' or 'foreign_key' and action is
+    'added', 'dropped', 'altered' or 'renamed'. before and after hold the
+    definition on each side (None where it doesn't exist); for a rename they
+    also hold the old and new name, and confidence how sure the match is.
+    """
+    __slots__ = ('kind', 'action', 'table', 'name', 'before', 'after', 'confidence')
+
+    def __init__(self, kind, action, table, name=None, before=None, after=None, confidence=None):
+        self.kind = kind
+        self.action = action
+        self.table = table
+        self.name = name
+        self.before = before
+        self.after = after
+        self.confidence = confidence
+
+    def __repr__(self):
+        if self.action == 'renamed':
+            target = self.before['name'] if self.name is None else f"{self.table}.{self.before['name']}"
+            return f"RENAMED {self.kind.upper()} {target} TO {self.after['name']} ({self.confidence:.0%})"
+        target = self.table if self.name is None else f"{self.table}.{self.name}"
+        return f"{self.action.upper()} {self.kind.upper()} {target}"
+
+    def toDict(self):
+        res = {attribute: getattr(self, attribute) for attribute in Change.__slots__[:-1]}
+        if self.confidence is not None:
+            res['confidence'] = self.confidence
+        return res
+
+class IndexedTable():
+    """ A table indexed by normalized column name, with a fingerprint of the whole table.
+
+    Columns are kept with their canonical definition tuple, which is compared
+    directly. The fingerprint doesn't depend on the order of the columns or
+    keys, nor on how names are quoted or cased, and is the same across runs.
+    primaryKeys, the primary keys of the schema by normalized table name,
+    resolve foreign keys that reference a table without naming its columns.
+    """
+    __slots__ = ('table', 'columns', 'primaryKey', 'foreignKeys', 'fingerprint')
+
+    def __init__(self, table, primaryKeys=None):
+        self.table = table
+        self.columns = {}
+        clustered = None
+        foreignKeys = {}
+        for column in table.columns.values():
+            name = normalizeName(column.name)
+            self.columns[name] = (column, columnDefinition(column))
+            if column.primary_key:
+                # A primary key is clustered unless it says otherwise
+                clustered = column.clustered is not False
+            if column.foreign_key is not None:
+                foreignKeys[foreignKeyDefinition(column.foreign_key, primaryKeys=primaryKeys)] = column.foreign_key
+        for foreignKey in table.multiForeignKeys:
+            foreignKeys[foreignKeyDefinition(foreignKey, primaryKeys=primaryKeys)] = foreignKey
+        primaryKey = tuple(normalizeName(name) for name in table.primaryKeyColumns())
+        self.primaryKey = (primaryKey, clustered) if primaryKey else None
+        self.foreignKeys = foreignKeys
+        self.fingerprint = digest((
+            sorted((name, definition) for name, (column, definition) in self.columns.items()),
+            self.primaryKey,
+            sorted(foreignKeys, key=repr)
+        ))
+
+def indexSchema(tables):
+    """ Returns the tables keyed by normalized name """
+    tables = list(tables)
+    primaryKeys = {normalizeName(table.tableName): tuple(normalizeName(name) for name in table.primaryKeyColumns()) for table in tables}
+    return {normalizeName(table.tableName): IndexedTable(table, primaryKeys) for table in tables}
+
+def schemaFingerprint(index):
+    """ The fingerprint of a whole schema indexed by indexSchema, as hex """
+    return digest(sorted((name, table.fingerprint) for name, table in index.items())).hex()
+
+def _primaryKeyDict(primaryKey):
+    if primaryKey is None:
+        return None
+    return {'columns': list(primaryKey[0]), 'clustered': primaryKey[1]}
+
+def _renameFingerprint(column, definition):
+    """ What a column has to share with another to be taken for a rename of it """
+    foreignKey = column.foreign_key
+    if foreignKey is None:
+        return definition
+    return definition + (normalizeName(foreignKey.ref_table), tuple(normalizeName(name) for name in foreignKey.ref_columns))
+
+def _matchColumnRenames(source, updated, renames):
+    """ Returns {old name: (new name, confidence)} for the dropped columns taken for renames """
+    dropped = [name for name in source.columns if name not in updated.columns]
+    added = [name for name in updated.columns if name not in source.columns]
+    if not dropped or not added:
+        return {}
+    sourcePositions = {name: index / len(source.columns) for index, name in enumerate(source.columns)}
+    updatedPositions = {name: index / len(updated.columns) for index, name in enumerate(updated.columns)}
+    matches = matchRenames(
+        [(name, sourcePositions[name], _renameFingerprint(*source.columns[name])) for name in dropped],
+        [(name, updatedPositions[name], _renameFingerprint(*updated.columns[name])) for name in added],
+        renames.columnThreshold, renames.maxBucketPairs)
+    return {dropped[i]: (added[j], confidence) for i, j, confidence in matches}
+
+def _iterTableDiff(source, updated, renames=None):
+    tableName = updated.table.tableName
+    renamed = _matchColumnRenames(source, updated, renames) if renames is not None else {}
+    columnNames = {old: new for old, (new, confidence) in renamed.items()}
+    newNames = set(columnNames.values())
+    for name, (column, definition) in source.columns.items():
+        if name in renamed:
+            newName, confidence = renamed[name]
+            updatedColumn = updated.columns[newName][0]
+            yield Change('column', 'renamed', tableName, updatedColumn.name, dict(column.toDict(), name=column.name),
+                dict(updatedColumn.toDict(), name=updatedColumn.name), confidence)
+            continue
+        if name not in updated.columns:
+            yield Change('column', 'dropped', tableName, column.name, before=column.toDict())
+            continue
+        updatedColumn, updatedDefinition = updated.columns[name]
+        if definition != updatedDefinition:
+            yield Change('column', 'altered', tableName, updatedColumn.name, column.toDict(), updatedColumn.toDict())
+    for name, (column, definition) in updated.columns.items():
+        if name not in source.columns and name not in newNames:
+            yield Change('column', 'added', tableName, column.name, after=column.toDict())
+
+    # Keys are compared with the renamed columns under their new names
+    sourcePrimaryKey = source.primaryKey
+    sourceForeignKeys = source.foreignKeys
+    if columnNames:
+        if sourcePrimaryKey is not None:
+            sourcePrimaryKey = (tuple(columnNames.get(name, name) for name in sourcePrimaryKey[0]), sourcePrimaryKey[1])
+        sourceForeignKeys = {(tuple(columnNames.get(column, column) for column in definition[0]),) + definition[1:]: foreignKey
+            for definition, foreignKey in source.foreignKeys.items()}
+
+    if sourcePrimaryKey != updated.primaryKey:
+        if sourcePrimaryKey is None:
+            action = 'added'
+        elif updated.primaryKey is None:
+            action = 'dropped'
+        else:
+            action = 'altered'
+        yield Change('primary_key', action, tableName, None, _primaryKeyDict(source.primaryKey), _primaryKeyDict(updated.primaryKey))
+
+    for definition, foreignKey in sourceForeignKeys.items():
+        if definition not in updated.foreignKeys:
+            yield Change('foreign_key', 'dropped', tableName, ','.join(foreignKey.columns), before=foreignKey.toDict())
+    for definition, foreignKey in updated.foreignKeys.items():
+        if definition not in sourceForeignKeys:
+            yield Change('foreign_key', 'added', tableName, ','.join(foreignKey.columns), after=foreignKey.toDict())
+
+def _baseName(name):
+    """ The normalized name of a table without its schema """
+    return normalizeName(name.rsplit('.', 1)[-1])
+
+def _matchTableRenames(sourceIndex, updatedIndex, dropped, renames):
+    """ Returns {old name: (new name, confidence)} for the dropped tables taken for renames or moves """
+    added = [name for name in updatedIndex if name not in sourceIndex]
+    if not dropped or not added:
+        return {}
+    matches = matchRenames(
+        [(_baseName(name), 0, sourceIndex[name].fingerprint) for name in dropped],
+        [(_baseName(name), 0, updatedIndex[name].fingerprint) for name in added],
+        renames.tableThreshold, renames.maxBucketPairs, positional=False)
+    return {dropped[i]: (added[j], confidence) for i, j, confidence in matches}
+
+def _skipUnchanged(source, updated):
+    """ Drops the tables whose statement text is the same on both sides, so
+    lazily loaded tables that can't differ are never parsed """
+    sourceHashes = {}
+    for table in source:
+        contentHash = getattr(table, 'contentHash', None)
+        if contentHash is not None:
+            sourceHashes[normalizeName(table.tableName)] = contentHash
+    if not sourceHashes:
+        return source, updated
+    unchanged = {normalizeName(table.tableName) for table in updated
+        if getattr(table, 'contentHash', None) is not None and sourceHashes.get(normalizeName(table.tableName)) == table.contentHash}
+    return ([table for table in source if normalizeName(table.tableName) not in unchanged],
+        [table for table in updated if normalizeName(table.tableName) not in unchanged])
+
+def iterDiff(source, updated, renames=None):
+    """ Yields the Changes needed to go from the source tables to the updated tables.
+
+    Both sides are indexed by normalized name first, so tables whose
+    fingerprints match are skipped after a single comparison and the rest
+    are compared column by column through the index. With a RenameDetection
+    as renames, dropped and added columns and tables with the same
+    definition are paired into renames; dropped tables are then reported
+    after the tables that exist on both sides. Tables carrying a contentHash
+    that is equal on both sides are skipped without looking at them.
+    """
+    if not isinstance(source, dict) and not isinstance(updated, dict):
+        source, updated = _skipUnchanged(source, updated)
+    sourceIndex = source if isinstance(source, dict) else indexSchema(source)
+    updatedIndex = updated if isinstance(updated, dict) else indexSchema(updated)
+    dropped = []
+    for name, table in sourceIndex.items():
+        updatedTable = updatedIndex.get(name)
+        if updatedTable is None:
+            if renames is None:
+                yield Change('table', 'dropped', table.table.tableName, before=table.table.toDict())
+            else:
+                dropped.append(name)
+        elif table.fingerprint != updatedTable.fingerprint:
+            yield from _iterTableDiff(table, updatedTable, renames)
+
+    renamed = _matchTableRenames(sourceIndex, updatedIndex, dropped, renames) if dropped else {}
+    for name in dropped:
+        table = sourceIndex[name].table
+        if name in renamed:
+            newName, confidence = renamed[name]
+            newTable = updatedIndex[newName].table
+            yield Change('table', 'renamed', newTable.tableName, None, {'name': table.tableName}, {'name': newTable.tableName}, confidence)
+        else:
+            yield Change('table', 'dropped', table.tableName, before=table.toDict())
+    newNames = {new for new, confidence in renamed.values()}
+    for name, table in updatedIndex.items():
+        if name not in sourceIndex and name not in newNames:
+            yield Change('table', 'added', table.table.tableName, after=table.table.toDict())
+
+def diffSchemas(source, updated, renames=None):
+    return list(iterDiff(source, updated, renames))
@@ -0,0 +1,166 @@
+import collections
+from .diff import normalizeName
+
+def iterForeignKeys(table):
+    """ Yields every foreign key of a table, both single column and table level """
+    for column in table.columns.values():
+        if column.foreign_key is not None:
+            yield column.foreign_key
+    yield from table.multiForeignKeys
+
+class ForeignKeyGraph():
+    """ The foreign keys of a schema as a graph between tables, indexed in both directions.
+
+    Names are normalized, so lookups ignore case and quoting; the methods
+    return the table names as they were added. A table referencing itself
+    is kept as an edge but never makes the order cyclic.
+    """
+    __slots__ = ('names', 'columns', 'primaryKeys', 'foreignKeys', 'references', 'referencedBy')
+
+    def __init__(self, tables=()):
+        self.names = {} # Normalized name -> name as added
+        self.columns = {} # Normalized name -> normalized column names, None when unknown
+        self.primaryKeys = {} # Normalized name -> primary key column names
+        self.foreignKeys = collections.defaultdict(list) # Normalized name -> [(columns, ref_table, ref_columns)]
+        # Dicts rather than sets so the order tables come out in doesn't depend on hashing
+        self.references = collections.defaultdict(dict)
+        self.referencedBy = collections.defaultdict(dict)
+        for table in tables:
+            self.addTable(table.tableName, table.columns,
+                [(foreignKey.columns, foreignKey.ref_table, foreignKey.ref_columns) for foreignKey in iterForeignKeys(table)],
+                table.primaryKeyColumns())
+
+    def addTable(self, name, columns, foreignKeys, primaryKey=()):
+        """ Adds a table with its column names, (columns, ref_table, ref_columns)
+        foreign keys and primary key columns. A foreign key without ref_columns
+        references the primary key of its table. """
+        key = normalizeName(name)
+        self.names[key] = name
+        self.columns[key] = None if columns is None else {normalizeName(column) for column in columns}
+        self.primaryKeys[key] = tuple(primaryKey)
+        for columnNames, refTable, refColumns in foreignKeys:
+            refKey = normalizeName(refTable)
+            self.foreignKeys[key].append((columnNames, refTable, refColumns))
+            self.references[key][refKey] = None
+            self.referencedBy[refKey][key] = None
+
+    def __contains__(self, name):
+        return normalizeName(name) in self.names
+
+    def _names(self, keys):
+        return sorted(self.names.get(key, key) for key in keys)
+
+    def dependents(self, name):
+        """ The tables with a foreign key referencing name """
+        return self._names(self.referencedBy.get(normalizeName(name), ()))
+
+    def dependencies(self, name):
+        """ The tables name references """
+        return self._names(self.references.get(normalizeName(name), ()))
+
+    def impacted(self, name):
+        """ Every table that depends on name, directly or through other tables """
+        start = normalizeName(name)
+        seen = {start}
+        queue = collections.deque([start])
+        while queue:
+            for key in self.referencedBy.get(queue.popleft(), ()):
+                if key not in seen:
+                    seen.add(key)
+                    queue.append(key)
+        seen.discard(start)
+        return self._names(seen)
+
+    def topologicalOrder(self, names=None):
+        """ Orders the tables (or just names) so every table comes after the ones it references.
+
+        Returns (order, cyclic): tables that are part of a cycle, or depend on
+        one, can't be ordered and are left out of order and returned in cyclic
+        instead, in the order they were added.
+        """
+        keys = list(self.names) if names is None else [normalizeName(name) for name in names]
+        selected = set(keys)
+        pending = {key: len(self.references.get(key, {}).keys() & selected - {key}) for key in keys}
+        queue = collections.deque(key for key in keys if pending[key] == 0)
+        order = []
+        while queue:
+            key = queue.popleft()
+            order.append(key)
+            for dependent in self.referencedBy.get(key, ()):
+                if dependent in pending and dependent != key:
+                    pending[dependent] -= 1
+                    if pending[dependent] == 0:
+                        queue.append(dependent)
+        ordered = set(order)
+        return [self.names.get(key, key) for key in order], [self.names.get(key, key) for key in keys if key not in ordered]
+
+    def cycles(self):
+        """ Returns each group of tables that reference each other, as sorted lists """
+        order, cyclic = self.topologicalOrder()
+        candidates = {normalizeName(name) for name in cyclic}
+        # Tarjan's strongly connected components, with an explicit stack instead of recursion
+        index = {}
+        low = {}
+        stack = []
+        onStack = set()
+        groups = []
+        for root in candidates:
+            if root in index:
+                continue
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            onStack.add(root)
+            work = [(root, iter(self.references.get(root, ())))]
+            while work:
+                key, children = work[-1]
+                for child in children:
+                    if child not in candidates:
+                        continue
+                    if child not in index:
+                        index[child] = low[child] = len(index)
+                        stack.append(child)
+                        onStack.add(child)
+                        work.append((child, iter(self.references.get(child, ()))))
+                        break
+                    if child in onStack:
+                        low[key] = min(low[key], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[key])
+                    if low[key] == index[key]:
+                        group = []
+                        while True:
+                            member = stack.pop()
+                            onStack.discard(member)
+                            group.append(member)
+                            if member == key:
+                                break
+                        if len(group) > 1:
+                            groups.append(self._names(group))
+        return sorted(groups)
+
+    def validate(self):
+        """ Checks every foreign key in one pass and returns a message for each one
+        that references a missing table or column """
+        problems = []
+        for key, foreignKeys in self.foreignKeys.items():
+            for columnNames, refTable, refColumns in foreignKeys:
+                refKey = normalizeName(refTable)
+                target = f"{self.names[key]}({', '.join(columnNames)})"
+                if refKey not in self.names:
+                    problems.append(f"{target} references missing table {refTable}")
+                    continue
+                refColumnNames = self.columns[refKey]
+                if not refColumns:
+                    refColumns = self.primaryKeys[refKey]
+                    if not refColumns:
+                        problems.append(f"{target} references {refTable}, which has no primary key")
+                        continue
+                missing = [column for column in refColumns if refColumnNames is not None and normalizeName(column) not in refColumnNames]
+                if missing:
+                    problems.append(f"{target} references missing columns {', '.join(missing)} of {refTable}")
+                elif len(refColumns) != len(columnNames):
+                    problems.append(f"{target} references {len(refColumns)} columns of {refTable}")
+        return problems
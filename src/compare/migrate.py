@@ -0,0 +1,393 @@
+from .canonical import canonicalDefault, canonicalSize, canonicalType, unquoteName
+from .diff import normalizeName
+from .graph import ForeignKeyGraph
+
+# What running a step costs on a table that already holds data, cheapest first
+COSTS = ('metadata', 'scan', 'rewrite')
+
+_SIZED_TYPES = {'VARCHAR', 'NVARCHAR', 'CHAR', 'NCHAR', 'BINARY', 'VARBINARY', 'FLOAT'}
+_VARIABLE_TYPES = {'VARCHAR', 'NVARCHAR', 'VARBINARY'}
+_DECIMAL_TYPES = {'DECIMAL', 'NUMERIC'}
+_SCALED_TYPES = {'DATETIME2', 'DATETIMEOFFSET', 'TIME'}
+
+# The order the phases run in: constraints are dropped before and added after anything they depend on
+_PHASES = ('drop_foreign_key', 'drop_primary_key', 'drop_default', 'rename', 'drop_table', 'create_table',
+    'drop_column', 'alter_column', 'add_column', 'add_default', 'add_primary_key', 'add_foreign_key')
+
+class MigrationStep():
+    """ One batch of the migration script.
+
+    cost is 'metadata' when SQL Server only changes the catalog, 'scan' when
+    every row is read to validate the change, and 'rewrite' when every row
+    is rewritten. note explains anything that needs a closer look.
+    """
+    __slots__ = ('phase', 'table', 'sql', 'cost', 'note')
+
+    def __init__(self, phase, table, sql, cost='metadata', note=None):
+        self.phase = phase
+        self.table = table
+        self.sql = sql
+        self.cost = cost
+        self.note = note
+
+    def __repr__(self):
+        return f"{self.cost.upper()} {self.sql}"
+
+    def toDict(self):
+        return {attribute: getattr(self, attribute) for attribute in MigrationStep.__slots__}
+
+def _literal(value):
+    return "'" + value.replace("'", "''") + "'"
+
+def _typeSql(column):
+    dataType = column.get('data_type')
+    if dataType in _DECIMAL_TYPES and column.get('precision') is not None:
+        return f"{dataType}({column['precision']}, {column.get('scale') or 0})"
+    if dataType in _SIZED_TYPES and column.get('size') is not None:
+        return f"{dataType}({column['size']})"
+    if dataType in _SCALED_TYPES and column.get('scale') is not None:
+        return f"{dataType}({column['scale']})"
+    return dataType
+
+def _nullSql(column):
+    nullable = column.get('nullable')
+    if nullable is None:
+        return ''
+    return ' NULL' if nullable else ' NOT NULL'
+
+def _columnSql(name, column, foreignKey=True):
+    if column.get('computed') is not None:
+        return f"{name} AS ({column['computed']})"
+    sql = f"{name} {_typeSql(column)}"
+    if column.get('identity') is not None:
+        seed, increment = column['identity']
+        sql += f" IDENTITY({seed}, {increment})"
+    sql += _nullSql(column)
+    if column.get('default_value') is not None:
+        sql += f" DEFAULT {column['default_value']}"
+    if foreignKey and column.get('foreign_key') is not None:
+        sql += " " + _referencesSql(column['foreign_key'])
+    return sql
+
+def _clusteredSql(clustered):
+    if clustered is None:
+        return ''
+    return ' CLUSTERED' if clustered else ' NONCLUSTERED'
+
+def _referencesSql(foreignKey):
+    sql = f"REFERENCES {foreignKey['ref_table']}"
+    if foreignKey['ref_columns']: # Without them the key references the primary key
+        sql += f"({', '.join(foreignKey['ref_columns'])})"
+    if foreignKey.get('on_delete') is not None:
+        sql += f" ON DELETE {foreignKey['on_delete']}"
+    if foreignKey.get('on_update') is not None:
+        sql += f" ON UPDATE {foreignKey['on_update']}"
+    return sql
+
+def _foreignKeySql(foreignKey):
+    return f"FOREIGN KEY ({', '.join(foreignKey['columns'])}) {_referencesSql(foreignKey)}"
+
+def _dropConstraintSql(table, query):
+    """ Drops the constraint named by query, since the metadata doesn't keep constraint names """
+    return (f"DECLARE @constraint sysname = ({query});\n"
+        f"EXEC({_literal(f'ALTER TABLE {table} DROP CONSTRAINT ')} + QUOTENAME(@constraint));")
+
+def _dropForeignKeySql(table, foreignKey):
+    return _dropConstraintSql(table,
+        "SELECT TOP 1 fk.name FROM sys.foreign_keys fk "
+        "JOIN sys.foreign_key_columns fkc ON fkc.constraint_object_id = fk.object_id "
+        f"WHERE fk.parent_object_id = OBJECT_ID({_literal(table)}) AND fk.referenced_object_id = OBJECT_ID({_literal(foreignKey['ref_table'])}) "
+        f"AND COL_NAME(fkc.parent_object_id, fkc.parent_column_id) = {_literal(unquoteName(foreignKey['columns'][0]))}")
+
+def _dropPrimaryKeySql(table):
+    return _dropConstraintSql(table,
+        f"SELECT name FROM sys.key_constraints WHERE parent_object_id = OBJECT_ID({_literal(table)}) AND type = 'PK'")
+
+def _dropDefaultSql(table, column):
+    return _dropConstraintSql(table,
+        f"SELECT name FROM sys.default_constraints WHERE parent_object_id = OBJECT_ID({_literal(table)}) "
+        f"AND parent_column_id = COLUMNPROPERTY(OBJECT_ID({_literal(table)}), {_literal(unquoteName(column))}, 'ColumnId')")
+
+def _typeKey(column):
+    """ The type of a column dict as SQL Server sees it, so INTEGER and INT are the same """
+    return (canonicalType(column.get('data_type')), canonicalSize(column.get('size')), column.get('precision'), column.get('scale'))
+
+def _nullable(column):
+    """ Whether a column dict allows NULL, which it does unless it says otherwise or is in the primary key """
+    nullable = column.get('nullable')
+    return not column.get('primary_key') if nullable is None else nullable
+
+def _maxCost(*costs):
+    return max(costs, key=COSTS.index)
+
+def _alterCost(before, after):
+    """ Returns (cost, note) of changing the type and nullability of a column from before to after """
+    cost = 'metadata'
+    notes = []
+    beforeType = _typeKey(before)
+    afterType = _typeKey(after)
+    if beforeType != afterType:
+        dataType, beforeSize = beforeType[:2]
+        afterSize = afterType[1]
+        if dataType == afterType[0] and dataType in _VARIABLE_TYPES and not {beforeSize, afterSize} & {'MAX', None}:
+            if afterSize > beforeSize:
+                notes.append("widening a variable length column only changes metadata")
+            else:
+                cost = 'scan'
+                notes.append("every value is checked against the smaller size")
+        else:
+            cost = 'rewrite'
+            notes.append("the storage of the column changes, so every row is rewritten")
+    if _nullable(before) and not _nullable(after):
+        if cost == 'metadata':
+            notes = [] # Widening alone would only change metadata, but the NULL check reads every row
+        cost = _maxCost(cost, 'scan')
+        notes.append("every row is checked for NULL")
+    return cost, '; '.join(notes) or None
+
+def _addCost(column):
+    if column.get('identity') is not None:
+        return 'rewrite', "adding an IDENTITY column fills in every row"
+    if column.get('nullable') is False and column.get('default_value') is None:
+        return 'metadata', "a NOT NULL column without a default can only be added to an empty table"
+    return 'metadata', None
+
+class _Keys():
+    """ The keys of a schema by the columns they depend on: the columns they
+    are on and, for foreign keys, the columns they reference """
+    def __init__(self, tables):
+        self.keys = {}
+        tables = list(tables)
+        primaryKeys = {normalizeName(table.tableName): table.primaryKeyColumns() for table in tables}
+        for table in tables:
+            name = normalizeName(table.tableName)
+            primaryKey = primaryKeys[name]
+            if primaryKey:
+                # A primary key is clustered unless it says otherwise
+                clustered = next((column.clustered is not False for column in table.columns.values() if column.primary_key), True)
+                key = ('primary_key', table.tableName, {'columns': primaryKey, 'clustered': clustered})
+                for column in primaryKey:
+                    self._add(name, column, key)
+            foreignKeys = [column.foreign_key for column in table.columns.values() if column.foreign_key is not None]
+            for foreignKey in foreignKeys + table.multiForeignKeys:
+                key = ('foreign_key', table.tableName, foreignKey.toDict())
+                for column in foreignKey.columns:
+                    self._add(name, column, key)
+                # Without ref_columns the key references the primary key
+                for column in foreignKey.ref_columns or primaryKeys.get(normalizeName(foreignKey.ref_table), ()):
+                    self._add(normalizeName(foreignKey.ref_table), column, key)
+
+    def _add(self, table, column, key):
+        keys = self.keys.setdefault((table, normalizeName(column)), [])
+        if key not in keys:
+            keys.append(key)
+
+    def on(self, table, column):
+        """ Returns (kind, table, key dict) for every key that depends on table.column """
+        return self.keys.get((normalizeName(table), normalizeName(column)), [])
+
+def _dropPrimaryKeyStep(table, primaryKey):
+    if primaryKey['clustered'] is not False:
+        return MigrationStep('drop_primary_key', table, _dropPrimaryKeySql(table), 'rewrite', "dropping a clustered key rebuilds the table as a heap")
+    return MigrationStep('drop_primary_key', table, _dropPrimaryKeySql(table))
+
+def _addPrimaryKeyStep(table, primaryKey):
+    clustered = primaryKey['clustered'] is not False
+    return MigrationStep('add_primary_key', table,
+        f"ALTER TABLE {table} ADD PRIMARY KEY{_clusteredSql(primaryKey['clustered'])} ({', '.join(primaryKey['columns'])});",
+        'rewrite' if clustered else 'scan', "a clustered key rewrites the table in key order" if clustered else None)
+
+def _addForeignKeyStep(table, foreignKey):
+    return MigrationStep('add_foreign_key', table, f"ALTER TABLE {table} ADD {_foreignKeySql(foreignKey)};", 'scan')
+
+def _tableForeignKeys(table):
+    """ Every foreign key of a table dict, both single column and table level """
+    foreignKeys = [column['foreign_key'] for column in table['columns'].values() if column.get('foreign_key') is not None]
+    return foreignKeys + table['foreign_keys']
+
+def _dependencyOrder(tables):
+    """ Orders the table dicts so that every table comes after the tables its
+    foreign keys reference. Returns the order and the names left in cycles. """
+    graph = ForeignKeyGraph()
+    byName = {}
+    for table in tables:
+        graph.addTable(table['table'], table['columns'], [(foreignKey['columns'], foreignKey['ref_table'], foreignKey['ref_columns'])
+            for foreignKey in _tableForeignKeys(table)], table['primary_key'])
+        byName[normalizeName(table['table'])] = table
+    order, cyclic = graph.topologicalOrder()
+    return [byName[normalizeName(name)] for name in order + cyclic], {normalizeName(name) for name in cyclic}
+
+def _iterCreateTables(tables):
+    ordered, cyclic = _dependencyOrder(tables)
+    created = set()
+    for table in ordered:
+        name = normalizeName(table['table'])
+        created.add(name)
+        deferred = []
+        definitions = []
+        for columnName, column in table['columns'].items():
+            foreignKey = column.get('foreign_key')
+            inline = foreignKey is None or name not in cyclic or normalizeName(foreignKey['ref_table']) in created
+            definitions.append(_columnSql(columnName, column, inline))
+            if not inline:
+                deferred.append(foreignKey)
+        primaryKey = table['primary_key']
+        if primaryKey:
+            clustered = table['columns'][primaryKey[0]].get('clustered')
+            definitions.append(f"PRIMARY KEY{_clusteredSql(clustered)} ({', '.join(primaryKey)})")
+        for foreignKey in table['foreign_keys']:
+            if name in cyclic and normalizeName(foreignKey['ref_table']) not in created:
+                deferred.append(foreignKey)
+            else:
+                definitions.append(_foreignKeySql(foreignKey))
+        yield MigrationStep('create_table', table['table'], f"CREATE TABLE {table['table']} (\n    " + ",\n    ".join(definitions) + "\n);")
+        for foreignKey in deferred: # Tables that reference each other get the keys once both exist
+            yield MigrationStep('add_foreign_key', table['table'], f"ALTER TABLE {table['table']} ADD {_foreignKeySql(foreignKey)};", 'scan')
+
+def _splitSchema(name):
+    schema, _, baseName = name.rpartition('.')
+    return schema, baseName
+
+def _iterRenameTable(change):
+    """ sp_rename can't move a table to another schema, so moves are a transfer first """
+    oldSchema, oldName = _splitSchema(change.before['name'])
+    newSchema, newName = _splitSchema(change.after['name'])
+    name = change.before['name']
+    if normalizeName(oldSchema or 'dbo') != normalizeName(newSchema or 'dbo'):
+        yield MigrationStep('rename', change.table, f"ALTER SCHEMA {newSchema or 'dbo'} TRANSFER {name};")
+        name = f"{newSchema or 'dbo'}.{oldName}"
+    if normalizeName(oldName) != normalizeName(newName):
+        yield MigrationStep('rename', change.table, f"EXEC sp_rename {_literal(name)}, {_literal(unquoteName(newName))};")
+
+def _iterDropTables(tables):
+    ordered, cyclic = _dependencyOrder(tables)
+    for table in ordered:
+        if normalizeName(table['table']) in cyclic:
+            for foreignKey in _tableForeignKeys(table):
+                if normalizeName(foreignKey['ref_table']) in cyclic:
+                    yield MigrationStep('drop_foreign_key', table['table'], _dropForeignKeySql(table['table'], foreignKey))
+    for table in reversed(ordered): # Referencing tables go first
+        yield MigrationStep('drop_table', table['table'], f"DROP TABLE {table['table']};")
+
+def _iterTableSteps(table, changes, sourceName, sourceKeys, updatedKeys, created):
+    """ Yields the steps for the column and key changes of a single table,
+    which was called sourceName before any rename """
+    for change in changes:
+        if change.kind == 'column' and change.action == 'renamed':
+            yield MigrationStep('rename', table,
+                f"EXEC sp_rename {_literal(table + '.' + change.before['name'])}, {_literal(unquoteName(change.after['name']))}, 'COLUMN';")
+
+    dropped = [change for change in changes if change.kind == 'column' and change.action == 'dropped']
+    added = [change for change in changes if change.kind == 'column' and change.action == 'added']
+    altered = [change for change in changes if change.kind == 'column' and change.action == 'altered']
+    # A computed column can't be altered, so one whose expression changes is dropped and added again
+    rebuilt = [change for change in altered if change.before.get('computed') != change.after.get('computed')]
+    if rebuilt:
+        altered = [change for change in altered if change not in rebuilt]
+        dropped += rebuilt
+        added += rebuilt
+
+    for change in dropped:
+        if change.before.get('default_value') is not None: # A column can't be dropped while it has a default
+            yield MigrationStep('drop_default', table, _dropDefaultSql(table, change.name))
+    if dropped:
+        yield MigrationStep('drop_column', table, f"ALTER TABLE {table} DROP COLUMN {', '.join(change.name for change in dropped)};",
+            note="the space is only reclaimed once the table is rebuilt")
+
+    for change in altered:
+        before, after = change.before, change.after
+        if before.get('identity') != after.get('identity'):
+            yield MigrationStep('alter_column', table, f"-- {table}.{change.name}: IDENTITY can't be altered, rebuild the table",
+                'rewrite', "IDENTITY changes need the table to be rebuilt")
+        typeChanged = _typeKey(before) != _typeKey(after)
+        if typeChanged or _nullable(before) != _nullable(after):
+            cost, note = _alterCost(before, after)
+            keys = sourceKeys.on(sourceName, change.name) if typeChanged else []
+            if keys:
+                # SQL Server won't change the type of a column a key depends on, so the keys go first and come back after
+                cost = 'rewrite'
+                note = '; '.join(filter(None, [note, "the keys on the column are dropped and added back, rebuilding their indexes"]))
+                for kind, keyTable, key in keys:
+                    if kind == 'primary_key':
+                        yield _dropPrimaryKeyStep(keyTable, key)
+                    else:
+                        yield MigrationStep('drop_foreign_key', keyTable, _dropForeignKeySql(keyTable, key))
+                for kind, keyTable, key in updatedKeys.on(table, change.name):
+                    if normalizeName(keyTable) not in created:
+                        yield _addPrimaryKeyStep(keyTable, key) if kind == 'primary_key' else _addForeignKeyStep(keyTable, key)
+            yield MigrationStep('alter_column', table, f"ALTER TABLE {table} ALTER COLUMN {change.name} {_typeSql(after)}{_nullSql(after)};", cost, note)
+        # A default depends on its column as well
+        if typeChanged or canonicalDefault(before.get('default_value')) != canonicalDefault(after.get('default_value')):
+            if before.get('default_value') is not None:
+                yield MigrationStep('drop_default', table, _dropDefaultSql(table, change.name))
+            if after.get('default_value') is not None:
+                yield MigrationStep('add_default', table, f"ALTER TABLE {table} ADD DEFAULT {after['default_value']} FOR {change.name};")
+
+    if added:
+        costs = [_addCost(change.after) for change in added]
+        notes = [note for cost, note in costs if note is not None]
+        definitions = [_columnSql(change.name, change.after, False) for change in added]
+        yield MigrationStep('add_column', table, f"ALTER TABLE {table} ADD {', '.join(definitions)};",
+            _maxCost(*(cost for cost, note in costs)), '; '.join(notes) or None)
+        for change in added:
+            if change.after.get('foreign_key') is not None:
+                yield MigrationStep('add_foreign_key', table, f"ALTER TABLE {table} ADD {_foreignKeySql(change.after['foreign_key'])};", 'scan')
+
+    for change in changes:
+        if change.kind == 'primary_key':
+            if change.before is not None:
+                yield _dropPrimaryKeyStep(table, change.before)
+            if change.after is not None:
+                yield _addPrimaryKeyStep(table, change.after)
+        elif change.kind == 'foreign_key':
+            if change.action == 'dropped':
+                yield MigrationStep('drop_foreign_key', table, _dropForeignKeySql(table, change.before))
+            else:
+                yield _addForeignKeyStep(table, change.after)
+
+def generateMigration(changes, source=(), updated=()):
+    """ Returns the MigrationSteps that turn the source schema into the updated one.
+
+    changes are the Changes from iterDiff. All column drops and all column
+    adds of a table are grouped into one statement each, and the steps are
+    ordered by phase so constraints never block a change. source and updated
+    are the tables on each side, which tell the primary and foreign keys on
+    a column whose type changes, including those of unchanged tables.
+    """
+    droppedTables = []
+    addedTables = []
+    renamedTables = []
+    changesByTable = {}
+    for change in changes:
+        if change.kind == 'table' and change.action == 'renamed':
+            renamedTables.append(change)
+        elif change.kind == 'table':
+            (droppedTables if change.action == 'dropped' else addedTables).append(change.before or change.after)
+        else:
+            changesByTable.setdefault(change.table, []).append(change)
+
+    steps = list(_iterDropTables(droppedTables))
+    steps += _iterCreateTables(addedTables)
+    for change in renamedTables:
+        steps += _iterRenameTable(change)
+    sourceNames = {normalizeName(change.after['name']): change.before['name'] for change in renamedTables}
+    sourceKeys = _Keys(source)
+    updatedKeys = _Keys(updated)
+    created = {normalizeName(table['table']) for table in addedTables}
+    for table, tableChanges in changesByTable.items():
+        steps += _iterTableSteps(table, tableChanges, sourceNames.get(normalizeName(table), table), sourceKeys, updatedKeys, created)
+    # A key can be both changed itself and in the way of a column change, and is dropped or added once
+    unique = {}
+    for step in steps:
+        unique.setdefault((step.phase, step.sql), step)
+    # The sort is stable, so each phase keeps the dependency order it was generated in
+    return sorted(unique.values(), key=lambda step: _PHASES.index(step.phase))
+
+def migrationScript(steps):
+    """ Returns the steps as a T-SQL script, one batch per step """
+    script = []
+    for step in steps:
+        if step.note or step.cost != 'metadata':
+            script.append(f"-- {step.cost.upper()}" + (f": {step.note}" if step.note else '') + "\n")
+        script.append(step.sql + "\nGO\n")
+    return ''.join(script)
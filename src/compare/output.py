@@ -0,0 +1,84 @@
+import json
+import time
+
+# Bumped whenever a record changes shape, so consumers can tell what they're reading
+SCHEMA_VERSION = 3
+
+RECORD_TYPES = {
+    'table': "The metadata of a table: table, columns, foreign_keys, primary_key (the key columns in key order)",
+    'change': "A difference: kind, action, table, name, before, after, confidence for renames, and variant when comparing many targets",
+    'target': "The outcome for one target: target, then variant and changes or error",
+    'variant': "A distinct schema among the targets, once all are read: variant, changes, targets",
+    'notice': "Something that was skipped or failed: table, message"
+}
+
+class _BufferedWriter():
+    """ Collects lines and writes them in blocks, at least every flushSeconds
+    while records keep coming, and at the end of every group of records so
+    a consumer sees results before the next slow step (reading the next
+    target, comparing the next table) has finished. """
+    def __init__(self, stream, bufferBytes=64 * 1024, flushSeconds=1.0):
+        self.stream = stream
+        self.bufferBytes = bufferBytes
+        self.flushSeconds = flushSeconds
+        self.buffer = []
+        self.size = 0
+        self.lastFlush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, recordType, record=None, **fields):
+        """ Writes record, an object with toDict, along with any extra fields """
+        line = self.format(recordType, record, fields)
+        self.buffer.append(line)
+        self.size += len(line)
+        if self.size >= self.bufferBytes or time.monotonic() - self.lastFlush >= self.flushSeconds:
+            self.flush()
+
+    def endGroup(self):
+        """ Marks the end of a group of records, such as one target's or one table's """
+        if self.buffer:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.stream.write(''.join(self.buffer))
+            self.buffer.clear()
+            self.size = 0
+        self.stream.flush()
+        self.lastFlush = time.monotonic()
+
+    def close(self):
+        self.flush()
+
+class TextWriter(_BufferedWriter):
+    """ The human readable output """
+    def format(self, recordType, record, fields):
+        if recordType == 'target':
+            if fields.get('error') is not None:
+                return f"{fields['target']}: {fields['error']}\n"
+            return f"{fields['target']}: {fields['changes']} changes (variant {fields['variant'][:8]})\n"
+        if recordType == 'notice':
+            return f"{fields['table']}: {fields['message']}\n"
+        line = f"{record}\n"
+        return f"  {line}" if 'variant' in fields else line
+
+class NdjsonWriter(_BufferedWriter):
+    """ One JSON object per line, starting with a header naming the schema version """
+    def __init__(self, stream, bufferBytes=64 * 1024, flushSeconds=1.0):
+        super().__init__(stream, bufferBytes, flushSeconds)
+        self.encoder = json.JSONEncoder(separators=(',', ':'))
+        self.write('header', schema=SCHEMA_VERSION, records=RECORD_TYPES)
+
+    def format(self, recordType, record, fields):
+        res = {'type': recordType}
+        res.update(fields)
+        if record is not None:
+            res.update(record.toDict())
+        return self.encoder.encode(res) + '\n'
+
+WRITERS = {'text': TextWriter, 'ndjson': NdjsonWriter}
@@ -0,0 +1,62 @@
+import collections
+import difflib
+
+class RenameDetection():
+    """ Settings for pairing dropped and added columns or tables into renames.
+
+    A pair is only considered when both have the same definition, and is
+    reported as a rename once its confidence (0 to 1) reaches the threshold.
+    Buckets with more than maxBucketPairs candidate pairs are skipped, as
+    such generic definitions can't be told apart anyway.
+    """
+    __slots__ = ('columnThreshold', 'tableThreshold', 'maxBucketPairs')
+
+    def __init__(self, columnThreshold=0.5, tableThreshold=0.6, maxBucketPairs=10000):
+        self.columnThreshold = columnThreshold
+        self.tableThreshold = tableThreshold
+        self.maxBucketPairs = maxBucketPairs
+
+def _confidence(dropped, added, unique, positional):
+    nameSimilarity = difflib.SequenceMatcher(None, dropped[0], added[0]).ratio()
+    if not positional:
+        return round(0.5 * unique + 0.5 * nameSimilarity, 3)
+    positionSimilarity = 1 - min(1.0, abs(dropped[1] - added[1]))
+    return round(0.4 * unique + 0.35 * nameSimilarity + 0.25 * positionSimilarity, 3)
+
+def matchRenames(dropped, added, threshold, maxBucketPairs=10000, positional=True):
+    """ Pairs up dropped and added items with the same fingerprint.
+
+    Both are lists of (name, position, fingerprint), with names normalized
+    and positions as a fraction of the column count. Only items sharing a
+    hash bucket are compared, so the cost grows with the bucket sizes rather
+    than with len(dropped) * len(added). Returns (droppedIndex, addedIndex,
+    confidence) for every pair at or above threshold, with the best pairs
+    in a bucket claimed first.
+    """
+    buckets = collections.defaultdict(lambda: ([], []))
+    for index, item in enumerate(dropped):
+        buckets[item[2]][0].append(index)
+    for index, item in enumerate(added):
+        if item[2] in buckets:
+            buckets[item[2]][1].append(index)
+
+    matches = []
+    for left, right in buckets.values():
+        if not right or len(left) * len(right) > maxBucketPairs:
+            continue
+        unique = len(left) == 1 and len(right) == 1
+        scored = []
+        for i in left:
+            for j in right:
+                confidence = _confidence(dropped[i], added[j], unique, positional)
+                if confidence >= threshold:
+                    scored.append((-confidence, i, j))
+        scored.sort()
+        usedLeft = set()
+        usedRight = set()
+        for confidence, i, j in scored:
+            if i not in usedLeft and j not in usedRight:
+                usedLeft.add(i)
+                usedRight.add(j)
+                matches.append((i, j, -confidence))
+    return sorted(matches, key=lambda match: (match[0], match[1]))
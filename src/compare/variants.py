@@ -0,0 +1,47 @@
+from .diff import indexSchema, iterDiff, schemaFingerprint
+
+class Variant():
+    """ One distinct schema among the targets: its fingerprint, the changes
+    from the reference to it, and the targets that have it """
+    __slots__ = ('fingerprint', 'changes', 'targets')
+
+    def __init__(self, fingerprint, changes):
+        self.fingerprint = fingerprint
+        self.changes = changes
+        self.targets = []
+
+    def __repr__(self):
+        return f"VARIANT {self.fingerprint[:8]}: {len(self.changes)} changes in {len(self.targets)} targets: {', '.join(self.targets)}"
+
+    def toDict(self):
+        return {'variant': self.fingerprint, 'changes': len(self.changes), 'targets': list(self.targets)}
+
+class VariantComparer():
+    """ Compares many schemas against one reference, diffing each distinct schema only once.
+
+    Targets are grouped by the fingerprint of their whole schema, so a
+    thousand identical tenants cost one diff, and the variants tell which
+    targets share the same drift.
+    """
+    def __init__(self, reference, renames=None):
+        self.reference = reference if isinstance(reference, dict) else indexSchema(reference)
+        self.fingerprint = schemaFingerprint(self.reference)
+        self.renames = renames
+        self.byFingerprint = {}
+
+    def add(self, target, tables):
+        """ Returns (variant, new) for the tables of target, new being True
+        the first time a schema with these tables is seen """
+        index = indexSchema(tables)
+        fingerprint = schemaFingerprint(index)
+        variant = self.byFingerprint.get(fingerprint)
+        new = variant is None
+        if new:
+            changes = [] if fingerprint == self.fingerprint else list(iterDiff(self.reference, index, self.renames))
+            variant = self.byFingerprint[fingerprint] = Variant(fingerprint, changes)
+        variant.targets.append(target)
+        return variant, new
+
+    def variants(self):
+        """ The variants seen so far, the most common first """
+        return sorted(self.byFingerprint.values(), key=lambda variant: -len(variant.targets))
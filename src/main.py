@@ -1,17 +1,249 @@
 import argparse
+import json
 import os.path
-from parser.parser import convertFileToMetaData
+import sys
+import time
+from compare.data import SqlServerDialect, iterDataDiff, primaryKeyColumns
+from compare.diff import iterDiff, normalizeName
+from compare.migrate import generateMigration, migrationScript
+from compare.output import WRITERS
+from compare.renames import RenameDetection
+from compare.variants import VariantComparer
+from parser.cache import ParseCache
+from parser.catalog import connect, isConnectionString, loadCatalog
+from parser.connections import ConnectionPool, describeTarget, iterCatalogs, readTargets
+from parser.directory import DirectoryManifest, loadDirectory
+from parser.lazy import loadLazyTables
+from parser.log import enableTrace
+from parser.parser import iterFileMetaData
+from parser.snapshot import isSnapshot, loadSnapshot, writeSnapshot
+from parser.stats import ParseStats
+from server import DEFAULT_PORT, CompareServer
 
 parser = argparse.ArgumentParser(description="The Microsoft SQL Server comparison tool")
-parser.add_argument('-s', '--source', type=str, help="The original SQL file/database.", required=True)
-parser.add_argument('-u', '--updated', type=str, help="The updated SQL file/database.", required=True)
+parser.add_argument('-s', '--source', type=str, help="The original SQL file/directory/snapshot/database.")
+updated = parser.add_mutually_exclusive_group()
+updated.add_argument('-u', '--updated', type=str, help="The updated SQL file/directory/snapshot/database.")
+updated.add_argument('-t', '--targets', type=str, metavar='FILE', help="Compare against every database connection string or SQL file/directory/snapshot listed in FILE.")
+parser.add_argument('--dump', action='store_true', help="Write the metadata of every source table.")
+parser.add_argument('--format', choices=sorted(WRITERS), default='text', help="Write text, or one JSON record per line.")
+parser.add_argument('-o', '--output', type=str, metavar='FILE', help="Write the results to FILE instead of stdout.")
+parser.add_argument('--snapshot', type=str, metavar='OUT', help="Save the source's metadata as a snapshot that loads without parsing.")
+parser.add_argument('--migrate', type=str, metavar='FILE', help="Write a T-SQL script turning --source into --updated to FILE ('-' for stdout, which --format ndjson then can't share).")
+parser.add_argument('--renames', action='store_true', help="Report dropped and added columns or tables with the same definition as renames.")
+parser.add_argument('--rename-threshold', type=float, metavar='N', help="The confidence (0 to 1) a rename needs to be reported.")
+parser.add_argument('--data', action='store_true', help="Also compare the rows of the tables both databases have.")
+parser.add_argument('--chunk-rows', type=int, default=100000, metavar='N', help="The number of rows per checksum range when comparing data.")
+parser.add_argument('--connections', type=int, default=4, metavar='N', help="The maximum number of connections per server.")
+parser.add_argument('--workers', type=int, default=16, metavar='N', help="The number of databases read at once.")
+parser.add_argument('-j', '--jobs', type=int, default=1, help="The number of processes used to parse (0 uses every core).")
+parser.add_argument('--lexer', choices=['sqlparse', 'fast'], default='sqlparse', help="The tokenizer used for the SQL files.")
+parser.add_argument('--lazy', action='store_true', help="Only parse the tables of a SQL file whose statements differ from the other side.")
+parser.add_argument('--cache', type=str, metavar='FILE', help="Keep parsed statements in FILE to speed up later runs.")
+parser.add_argument('--manifest', type=str, metavar='FILE', help="Remember parsed files of a directory in FILE so later runs only parse what changed.")
+parser.add_argument('--cache-size', type=int, default=256, metavar='MB', help="The maximum size of the cache.")
+parser.add_argument('--stats', type=str, metavar='FILE', help="Write timings and counters as JSON to FILE ('-' for stderr).")
+parser.add_argument('--serve', action='store_true', help="Answer compare requests from src/client.py, keeping parsed schemas in memory.")
+parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="The localhost port to serve on.")
+parser.add_argument('--memory', type=int, default=512, metavar='MB', help="The total size of the inputs kept parsed in memory when serving.")
+parser.add_argument('--trace', type=str, metavar='FILE', help="Write a debug trace of the parser to FILE.")
+
+def iterSchema(source, args, cache, manifest, stats):
+    """ Yields the tables of source, as they're parsed for a SQL file """
+    if os.path.isfile(source) and not isSnapshot(source):
+        for meta, index in iterFileMetaData(source, args.jobs, args.lexer, cache, stats):
+            if meta is not None:
+                yield meta
+    else:
+        yield from loadSchema(source, args, cache, manifest, stats)
+
+def loadSchema(source, args, cache, manifest, stats):
+    """ Returns the tables of source """
+    if os.path.isfile(source):
+        if isSnapshot(source):
+            if stats is None:
+                return loadSnapshot(source)
+            with stats.timePhase('snapshot'):
+                return loadSnapshot(source)
+        if args.lazy:
+            return loadLazyTables(source, args.lexer)
+        return list(iterSchema(source, args, cache, manifest, stats))
+    elif os.path.isdir(source):
+        return loadDirectory(source, args.jobs, args.lexer, manifest, cache, stats)
+    elif isConnectionString(source):
+        connection = connect(source)
+        try:
+            if stats is None:
+                return loadCatalog(connection)
+            with stats.timePhase('catalog'):
+                return loadCatalog(connection)
+        finally:
+            connection.close()
+    parser.error(f"{source} is neither a SQL file, a directory nor a connection string")
+
+def writeStats(filename, stats):
+    if filename == '-':
+        json.dump(stats.toDict(), sys.stderr, indent=2)
+    else:
+        with open(filename, 'w') as f:
+            json.dump(stats.toDict(), f, indent=2)
+
+def writeMigration(filename, changes, sourceTables, updatedTables):
+    script = migrationScript(generateMigration(changes, sourceTables, updatedTables))
+    if filename == '-':
+        sys.stdout.write(script)
+    else:
+        with open(filename, 'w') as f:
+            f.write(script)
+
+def compareData(args, sourceTables, updatedTables, writer):
+    if not (isConnectionString(args.source) and isConnectionString(args.updated)):
+        parser.error("--data needs a connection string for both --source and --updated")
+    updatedNames = {normalizeName(table.tableName) for table in updatedTables}
+    tables = [table for table in sourceTables if normalizeName(table.tableName) in updatedNames]
+    for table in tables:
+        if not primaryKeyColumns(table):
+            writer.write('notice', table=table.tableName, message="skipped, no primary key")
+    writer.endGroup()
+    results = iterDataDiff(tables, lambda: connect(args.source), lambda: connect(args.updated), SqlServerDialect(),
+        args.workers, args.chunk_rows)
+    for table, changes, error in results:
+        if error is not None:
+            writer.write('notice', table=table.tableName, message=str(error))
+        else:
+            for change in changes:
+                writer.write('change', change)
+        writer.endGroup()
+
+def compareTargets(args, sourceTables, renames, writer, cache, manifest, stats):
+    """ Compares the source against every target, reporting each as soon as it's read.
+    Each distinct schema is only diffed once, and its changes are written the first time it's seen. """
+    comparer = VariantComparer(sourceTables, renames)
+
+    def report(description, tables, error):
+        if error is not None:
+            writer.write('target', target=description, error=str(error))
+        else:
+            variant, new = comparer.add(description, tables)
+            writer.write('target', target=description, variant=variant.fingerprint, changes=len(variant.changes))
+            if new:
+                for change in variant.changes:
+                    writer.write('change', change, variant=variant.fingerprint)
+        writer.endGroup() # The next target may take a while to read
+
+    targets = readTargets(args.targets)
+    for target in targets:
+        if isConnectionString(target):
+            continue
+        if not os.path.exists(target):
+            report(target, None, "not found")
+            continue
+        try:
+            tables = loadSchema(target, args, cache, manifest, stats)
+        except Exception as e:
+            report(target, None, e)
+        else:
+            report(target, tables, None)
+
+    with ConnectionPool(maxPerServer=args.connections) as pool:
+        for target, tables, error in iterCatalogs([target for target in targets if isConnectionString(target)], pool, args.workers):
+            report(describeTarget(target), tables, error)
+
+    for variant in comparer.variants():
+        writer.write('variant', variant)
+
+def compare(args, stats, writer):
+    cache = ParseCache(args.cache, args.cache_size * 1024 * 1024) if args.cache else None
+    manifest = DirectoryManifest(args.manifest) if args.manifest else None
+    try:
+        if not (args.updated or args.targets or args.snapshot):
+            # Only dumping, so each table is written as soon as it's parsed
+            for table in iterSchema(args.source, args, cache, manifest, stats):
+                writer.write('table', table)
+            return
+        sourceTables = loadSchema(args.source, args, cache, manifest, stats)
+        if args.updated:
+            updatedTables = loadSchema(args.updated, args, cache, manifest, stats)
+
+        if args.dump:
+            for table in sourceTables:
+                writer.write('table', table)
+
+        if args.snapshot:
+            writeSnapshot(sourceTables, args.snapshot)
+            if not (args.updated or args.targets):
+                return
+
+        renames = None
+        if args.renames:
+            renames = RenameDetection()
+            if args.rename_threshold is not None:
+                renames.columnThreshold = renames.tableThreshold = args.rename_threshold
+
+        if args.targets:
+            compareTargets(args, sourceTables, renames, writer, cache, manifest, stats)
+            return
+
+        start = time.perf_counter()
+        changes = []
+        for change in iterDiff(sourceTables, updatedTables, renames):
+            if args.migrate != '-':
+                writer.write('change', change)
+            changes.append(change)
+        writer.endGroup()
+        if stats is not None:
+            stats.addPhase('diff', time.perf_counter() - start)
+        if args.migrate:
+            writeMigration(args.migrate, changes, sourceTables, updatedTables)
+        if args.data:
+            compareData(args, sourceTables, updatedTables, writer)
+    finally:
+        if cache is not None:
+            cache.close()
+        if manifest is not None:
+            manifest.close()
+
+
+def serve(args):
+    cache = ParseCache(args.cache, args.cache_size * 1024 * 1024) if args.cache else None
+    manifest = DirectoryManifest(args.manifest) if args.manifest else None
+    server = CompareServer(lambda source: loadSchema(source, args, cache, manifest, None), args.port, maxBytes=args.memory * 1024 * 1024)
+    print(f"Listening on http://127.0.0.1:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if cache is not None:
+            cache.close()
+        if manifest is not None:
+            manifest.close()
 
 def main():
     args = parser.parse_args()
-    print(args.source)
-    if os.path.isfile(args.source):
-        for meta in convertFileToMetaData(args.source):
-            print(meta)
+    if args.trace:
+        enableTrace(args.trace)
+    if args.serve:
+        serve(args)
+        return
+    if not args.source:
+        parser.error("the following arguments are required: -s/--source")
+    if not (args.updated or args.targets or args.snapshot or args.dump):
+        parser.error("one of the arguments -u/--updated -t/--targets --snapshot --dump is required")
+    if args.migrate == '-' and args.format == 'ndjson' and not args.output:
+        # The script and the records would share stdout, and neither would be readable
+        parser.error("--migrate - writes the script to stdout, so --format ndjson needs --output")
+    stats = ParseStats() if args.stats else None
+    stream = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        with WRITERS[args.format](stream) as writer:
+            compare(args, stats, writer)
+    finally:
+        if args.output:
+            stream.close()
+        if stats is not None:
+            writeStats(args.stats, stats)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,84 @@
+import hashlib
+import pickle
+import sqlite3
+import time
+from .parser import PARSER_VERSION
+
+class ParseCache():
+    """ An on-disk cache of parsed statements, keyed by a hash of the statement text.
+
+    Entries are evicted least recently used first once the cache grows past
+    maxBytes, and the whole cache is dropped when PARSER_VERSION changes.
+    """
+    def __init__(self, path, maxBytes=256 * 1024 * 1024):
+        self.maxBytes = maxBytes
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS info (name TEXT PRIMARY KEY, value TEXT)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS entries (key BLOB PRIMARY KEY, value BLOB, size INTEGER, used REAL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+        row = self.connection.execute("SELECT value FROM info WHERE name = 'version'").fetchone()
+        if row is None or row[0] != str(PARSER_VERSION):
+            self.clear()
+        self.size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        # Hits are only written back on close so a warm run doesn't write per statement
+        self.hits = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def key(self, sqlCode, lexer):
+        normalized = sqlCode.strip().replace('\r\n', '\n')
+        return hashlib.blake2b(f"{lexer}\0{normalized}".encode('utf-8'), digest_size=16).digest()
+
+    def get(self, sqlCode, lexer):
+        """ Returns the cached result of parsing sqlCode, or None """
+        key = self.key(sqlCode, lexer)
+        row = self.connection.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.hits.add(key)
+        return pickle.loads(row[0])
+
+    def put(self, sqlCode, lexer, metaDatas):
+        value = pickle.dumps(metaDatas, pickle.HIGHEST_PROTOCOL)
+        key = self.key(sqlCode, lexer)
+        # The same statement can come up twice in a run, so the row it replaces no longer counts
+        row = self.connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self.size -= row[0]
+        self.connection.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", (key, value, len(value), time.time()))
+        self.size += len(value)
+
+    def clear(self):
+        self.connection.execute("DELETE FROM entries")
+        self.connection.execute("INSERT OR REPLACE INTO info VALUES ('version', ?)", (str(PARSER_VERSION),))
+        self.connection.commit()
+        self.size = 0
+
+    def evict(self):
+        """ Drops the least recently used entries until the cache fits in maxBytes """
+        while self.size > self.maxBytes:
+            rows = self.connection.execute("SELECT key, size FROM entries ORDER BY used LIMIT 256").fetchall()
+            if not rows:
+                break
+            evicted = []
+            for key, size in rows:
+                evicted.append((key,))
+                self.size -= size
+                if self.size <= self.maxBytes:
+                    break
+            self.connection.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+    def close(self):
+        if self.connection is None:
+            return
+        now = time.time()
+        self.connection.executemany("UPDATE entries SET used = ? WHERE key = ?", [(now, key) for key in self.hits])
+        self.hits.clear()
+        self.evict()
+        self.connection.commit()
+        self.connection.close()
+        self.connection = None
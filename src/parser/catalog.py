@@ -0,0 +1,161 @@
+import re
+from .tables.model import Column, ForeignKey, Table
+
+# Each query covers every table in the database, so loading a catalog takes a
+# fixed number of round trips however many tables there are.
+COLUMNS_QUERY = """
+SELECT t.object_id, s.name, t.name, c.name, ty.name, c.max_length, c.precision, c.scale,
+    c.is_nullable, c.is_identity, CAST(ic.seed_value AS BIGINT), CAST(ic.increment_value AS BIGINT), dc.definition,
+    cc.definition
+FROM sys.tables t
+JOIN sys.schemas s ON s.schema_id = t.schema_id
+JOIN sys.columns c ON c.object_id = t.object_id
+JOIN sys.types ty ON ty.user_type_id = c.user_type_id
+LEFT JOIN sys.identity_columns ic ON ic.object_id = c.object_id AND ic.column_id = c.column_id
+LEFT JOIN sys.default_constraints dc ON dc.parent_object_id = c.object_id AND dc.parent_column_id = c.column_id
+LEFT JOIN sys.computed_columns cc ON cc.object_id = c.object_id AND cc.column_id = c.column_id
+ORDER BY t.object_id, c.column_id
+"""
+
+PRIMARY_KEYS_QUERY = """
+SELECT i.object_id, c.name, i.type_desc
+FROM sys.indexes i
+JOIN sys.tables t ON t.object_id = i.object_id
+JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+WHERE i.is_primary_key = 1
+ORDER BY i.object_id, ic.key_ordinal
+"""
+
+FOREIGN_KEYS_QUERY = """
+SELECT fk.object_id, fk.parent_object_id, pc.name, rs.name, rt.name, rc.name,
+    fk.delete_referential_action_desc, fk.update_referential_action_desc
+FROM sys.foreign_keys fk
+JOIN sys.foreign_key_columns fkc ON fkc.constraint_object_id = fk.object_id
+JOIN sys.columns pc ON pc.object_id = fkc.parent_object_id AND pc.column_id = fkc.parent_column_id
+JOIN sys.tables rt ON rt.object_id = fkc.referenced_object_id
+JOIN sys.schemas rs ON rs.schema_id = rt.schema_id
+JOIN sys.columns rc ON rc.object_id = fkc.referenced_object_id AND rc.column_id = fkc.referenced_column_id
+ORDER BY fk.object_id, fkc.constraint_column_id
+"""
+
+_ACTIONS = {
+    'NO_ACTION': None, # The default, which the parser leaves unset as well
+    'CASCADE': 'CASCADE',
+    'SET_NULL': 'SET NULL',
+    'SET_DEFAULT': 'SET DEFAULT'
+}
+
+def isConnectionString(source):
+    return re.search(r'\b(DRIVER|SERVER|DSN)\s*=', source, re.IGNORECASE) is not None
+
+def connect(connectionString):
+    try:
+        import pyodbc
+    except ImportError:
+        raise Exception("pyodbc is required to read a database")
+    return pyodbc.connect(connectionString, autocommit=True)
+
+def _qualifiedName(schema, name):
+    return name if schema.lower() == 'dbo' else f"{schema}.{name}"
+
+def _closingParenthesis(definition):
+    """ The index of the parenthesis closing the one definition starts with, skipping strings and quoted names """
+    depth = 0
+    index = 0
+    while index < len(definition):
+        char = definition[index]
+        if char in "'[\"":
+            index = definition.find("]" if char == '[' else char, index + 1)
+            if index == -1:
+                return None
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return index
+        index += 1
+    return None
+
+def _stripParentheses(definition):
+    """ SQL Server stores defaults wrapped in parentheses, e.g. ((0)), so drops
+    those enclosing the whole definition, but not the two in (1)+(2) """
+    while definition[:1] == '(' and _closingParenthesis(definition) == len(definition) - 1:
+        definition = definition[1:-1]
+    return definition
+
+def _buildColumn(name, dataType, maxLength, precision, scale, nullable, identity, seed, increment, default, computed):
+    if computed is not None: # The type of a computed column follows from its expression, as in CREATE TABLE
+        column = Column(name)
+        column.computed = _stripParentheses(computed)
+        column.nullable = bool(nullable)
+        return column
+    column = Column(name, dataType.upper())
+    if column.data_type in { 'DECIMAL', 'NUMERIC' }:
+        column.precision = precision
+        column.scale = scale
+    elif column.data_type in { 'DATETIME2', 'DATETIMEOFFSET', 'TIME' }:
+        column.scale = scale
+    elif column.data_type == 'FLOAT':
+        column.size = precision
+    elif column.data_type in { 'VARCHAR', 'CHAR', 'BINARY', 'VARBINARY', 'NVARCHAR', 'NCHAR' }:
+        if maxLength == -1:
+            column.size = 'MAX'
+        elif column.data_type in { 'NVARCHAR', 'NCHAR' }:
+            column.size = maxLength // 2
+        else:
+            column.size = maxLength
+    column.nullable = bool(nullable)
+    if identity:
+        column.identity = (int(seed), int(increment))
+    if default is not None:
+        column.default_value = _stripParentheses(default)
+    return column
+
+def _rows(connection, query):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query)
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+def loadCatalog(connection):
+    """ Returns a Table for each user table in the database behind a DB-API connection """
+    tables = {}
+    for objectId, schema, tableName, *column in _rows(connection, COLUMNS_QUERY):
+        table = tables.get(objectId)
+        if table is None:
+            table = tables[objectId] = Table(_qualifiedName(schema, tableName))
+        column = _buildColumn(*column)
+        table.columns[column.name] = column
+
+    for objectId, columnName, indexType in _rows(connection, PRIMARY_KEYS_QUERY): # In key order
+        table = tables[objectId]
+        table.primaryKey = (table.primaryKey or ()) + (columnName,)
+        column = table.columns[columnName]
+        column.primary_key = True
+        column.clustered = indexType == 'CLUSTERED'
+
+    foreignKeys = {}
+    for keyId, objectId, columnName, refSchema, refTable, refColumn, onDelete, onUpdate in _rows(connection, FOREIGN_KEYS_QUERY):
+        if keyId not in foreignKeys:
+            foreignKeys[keyId] = (objectId, [], _qualifiedName(refSchema, refTable), [], _ACTIONS[onDelete], _ACTIONS[onUpdate])
+        foreignKeys[keyId][1].append(columnName)
+        foreignKeys[keyId][3].append(refColumn)
+
+    for objectId, columns, refTable, refColumns, onDelete, onUpdate in foreignKeys.values():
+        foreignKey = ForeignKey(columns, refTable, refColumns)
+        foreignKey.on_delete = onDelete
+        foreignKey.on_update = onUpdate
+        table = tables[objectId]
+        if len(columns) == 1:
+            table.columns[columns[0]].foreign_key = foreignKey
+        else:
+            table.multiForeignKeys.append(foreignKey)
+    return list(tables.values())
@@ -0,0 +1,158 @@
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .catalog import connect, loadCatalog
+
+logger = logging.getLogger(__name__)
+
+def _option(connectionString, name):
+    match = re.search(rf'(?:^|;)\s*{name}\s*=\s*(\{{[^}}]*\}}|[^;]*)', connectionString, re.IGNORECASE)
+    return match.group(1).strip('{} ') if match else None
+
+def serverOf(connectionString):
+    """ The server a connection string points at, used to bound connections per server """
+    server = _option(connectionString, 'SERVER') or _option(connectionString, 'DSN') or ''
+    return server.lower()
+
+def describeTarget(connectionString):
+    """ A printable name for a connection string that leaves out any credentials """
+    database = databaseOf(connectionString)
+    server = serverOf(connectionString)
+    return f"{server}/{database}" if database else server
+
+def databaseOf(connectionString):
+    return _option(connectionString, 'DATABASE') or _option(connectionString, 'INITIAL CATALOG')
+
+def _login(connectionString):
+    """ The connection string without its database, which a connection can switch with USE """
+    return re.sub(r'(?:^|;)\s*(?:DATABASE|INITIAL CATALOG)\s*=\s*(?:\{[^}]*\}|[^;]*)', '', connectionString, flags=re.IGNORECASE)
+
+def useDatabase(connection, database):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"USE [{database.replace(']', ']]')}]")
+    finally:
+        cursor.close()
+
+def readTargets(filename):
+    """ Reads one connection string per line, skipping blank lines and # comments """
+    with open(filename, 'r') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+class ConnectionPool():
+    """ Shares connections between the databases of a server. A released
+    connection is kept, and the next target on the same server with the same
+    login switches it to its own database with useDatabase instead of paying
+    for a new connection. Never has more than maxPerServer connections open
+    against a single server, idle ones included. """
+    def __init__(self, connect=connect, maxPerServer=4, retries=2, retryDelay=0.5, useDatabase=useDatabase):
+        self.connect = connect
+        self.maxPerServer = maxPerServer
+        self.retries = retries
+        self.retryDelay = retryDelay
+        self.useDatabase = useDatabase
+        self.lock = threading.Lock()
+        self.slots = {}
+        self.idle = {} # Server -> [(login, has a database, connection)]
+
+    def _slot(self, connectionString):
+        server = serverOf(connectionString)
+        with self.lock:
+            if server not in self.slots:
+                self.slots[server] = threading.BoundedSemaphore(self.maxPerServer)
+            return self.slots[server]
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def acquire(self, connectionString):
+        """ Returns a connection to the database of connectionString, waiting while the server is at its limit """
+        self._slot(connectionString).acquire()
+        server = serverOf(connectionString)
+        database = databaseOf(connectionString)
+        # A connection without a database stays in the login's default one, so it only goes to another like it
+        key = (_login(connectionString), database is not None)
+        reused = evicted = None
+        with self.lock:
+            idle = self.idle.get(server, [])
+            for index, (login, hasDatabase, connection) in enumerate(idle):
+                if (login, hasDatabase) == key:
+                    reused = idle.pop(index)[2]
+                    break
+            else:
+                if idle: # Another login's connection makes way, so the server stays within its limit
+                    evicted = idle.pop(0)[2]
+        try:
+            if evicted is not None:
+                self._close(evicted)
+            if reused is None:
+                return self.connect(connectionString)
+            try:
+                if database is not None:
+                    self.useDatabase(reused, database)
+            except BaseException:
+                self._close(reused)
+                raise
+            return reused
+        except BaseException:
+            self._slot(connectionString).release()
+            raise
+
+    def release(self, connectionString, connection, reusable=True):
+        """ Keeps connection for the next target on its server, or closes it when it failed """
+        if reusable:
+            with self.lock:
+                self.idle.setdefault(serverOf(connectionString), []).append(
+                    (_login(connectionString), databaseOf(connectionString) is not None, connection))
+        else:
+            self._close(connection)
+        self._slot(connectionString).release()
+
+    def run(self, connectionString, function):
+        """ Calls function with a connection, retrying on failure with another one """
+        for attempt in range(self.retries + 1):
+            try:
+                connection = self.acquire(connectionString)
+            except Exception as e:
+                error = e
+            else:
+                try:
+                    res = function(connection)
+                except Exception as e:
+                    error = e
+                    self.release(connectionString, connection, False)
+                else:
+                    self.release(connectionString, connection)
+                    return res
+            logger.debug("Attempt %d on %s failed: %s", attempt + 1, describeTarget(connectionString), error)
+            if attempt < self.retries:
+                time.sleep(self.retryDelay * 2 ** attempt)
+        raise error
+
+    def close(self):
+        """ Closes the idle connections """
+        with self.lock:
+            idle = [connection for connections in self.idle.values() for login, hasDatabase, connection in connections]
+            self.idle.clear()
+        for connection in idle:
+            self._close(connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def iterCatalogs(targets, pool, workers=16):
+    """ Loads the catalog of every target concurrently and yields
+    (target, tables, error) as each one finishes. """
+    with ThreadPoolExecutor(workers) as executor:
+        futures = {executor.submit(pool.run, target, loadCatalog): target for target in targets}
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], None if error else future.result(), error
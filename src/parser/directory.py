@@ -0,0 +1,129 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .parser import PARSER_VERSION, convertFileToMetaData
+
+def iterSqlFiles(directory):
+    """ Yields the path of every .sql file under directory, in a stable order """
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith('.sql'):
+                yield os.path.join(root, name)
+
+def hashFile(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.digest()
+
+class DirectoryManifest():
+    """ Remembers the mtime, size and hash of every parsed file along with its tables.
+
+    A file whose mtime and size are unchanged isn't read again, and one whose
+    contents hash the same is only re-stamped. The manifest is dropped when
+    PARSER_VERSION changes.
+    """
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS info (name TEXT PRIMARY KEY, value TEXT)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, lexer TEXT, mtime INTEGER, size INTEGER, hash BLOB, value BLOB)")
+        row = self.connection.execute("SELECT value FROM info WHERE name = 'version'").fetchone()
+        if row is None or row[0] != str(PARSER_VERSION):
+            self.connection.execute("DELETE FROM files")
+            self.connection.execute("INSERT OR REPLACE INTO info VALUES ('version', ?)", (str(PARSER_VERSION),))
+            self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def entries(self, directory):
+        """ Returns {path: (lexer, mtime, size, hash, value)} for the files recorded under directory """
+        prefix = os.path.join(os.path.abspath(directory), '')
+        rows = self.connection.execute("SELECT * FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))
+        return {row[0]: row[1:] for row in rows}
+
+    def put(self, path, lexer, mtime, size, digest, tables):
+        value = pickle.dumps(tables, pickle.HIGHEST_PROTOCOL)
+        self.connection.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(path), lexer, mtime, size, digest, value))
+
+    def stamp(self, path, mtime, size):
+        self.connection.execute("UPDATE files SET mtime = ?, size = ? WHERE path = ?", (mtime, size, os.path.abspath(path)))
+
+    def remove(self, paths):
+        self.connection.executemany("DELETE FROM files WHERE path = ?", [(os.path.abspath(path),) for path in paths])
+
+    def close(self):
+        if self.connection is None:
+            return
+        self.connection.commit()
+        self.connection.close()
+        self.connection = None
+
+def _parseFile(path, lexer, cache=None, stats=None):
+    """ Returns the tables defined in the file at path """
+    try:
+        return [meta for meta, index in convertFileToMetaData(path, 1, lexer, cache, stats) if meta is not None]
+    except Exception as e:
+        raise Exception(f"{path}: {e}") from e
+
+def _iterParsedFiles(paths, jobs, lexer, cache, stats):
+    if jobs == 1 or len(paths) < 2:
+        for path in paths:
+            yield path, _parseFile(path, lexer, cache, stats)
+        return
+    # The cache and stats can't be shared with the workers, the manifest covers for the cache
+    with ProcessPoolExecutor(min(jobs, len(paths))) as executor:
+        yield from zip(paths, executor.map(_parseFile, paths, [lexer] * len(paths), chunksize=8))
+
+def loadDirectory(directory, jobs=1, lexer='sqlparse', manifest=None, cache=None, stats=None):
+    """ Returns the tables defined in every .sql file under directory.
+
+    Files are parsed across jobs processes (0 uses every core). With a
+    manifest only the files that changed since the last run are parsed.
+    """
+    if jobs < 1:
+        jobs = os.cpu_count() or 1
+    start = time.perf_counter()
+    entries = manifest.entries(directory) if manifest is not None else {}
+    tablesByPath = {}
+    changed = []
+    for path in iterSqlFiles(directory):
+        info = os.stat(path)
+        entry = entries.pop(os.path.abspath(path), None)
+        digest = None
+        if entry is not None and entry[0] == lexer:
+            if entry[1:3] == (info.st_mtime_ns, info.st_size):
+                tablesByPath[path] = pickle.loads(entry[4])
+                continue
+            digest = hashFile(path)
+            if entry[3] == digest: # Touched but not edited
+                manifest.stamp(path, info.st_mtime_ns, info.st_size)
+                tablesByPath[path] = pickle.loads(entry[4])
+                continue
+        if manifest is not None and digest is None:
+            digest = hashFile(path) # Hashed before parsing so a later edit isn't missed
+        tablesByPath[path] = None
+        changed.append((path, info, digest))
+    if manifest is not None:
+        manifest.remove(entries) # The files that no longer exist
+
+    parsed = _iterParsedFiles([path for path, info, digest in changed], jobs, lexer, cache, stats)
+    for (path, tables), (_, info, digest) in zip(parsed, changed):
+        tablesByPath[path] = tables
+        if manifest is not None:
+            manifest.put(path, lexer, info.st_mtime_ns, info.st_size, digest, tables)
+
+    if stats is not None:
+        stats.counters['files'] += len(tablesByPath)
+        stats.counters['files_parsed'] += len(changed)
+        stats.addPhase('directory', time.perf_counter() - start)
+    return [table for tables in tablesByPath.values() for table in tables]
@@ -0,0 +1,119 @@
+import hashlib
+import mmap
+import re
+from .parser import ParseError, _parseStatementText
+from .splitter import splitStatements
+
+# Enough of a statement to tell what it creates: leading comments, the verb,
+# the object type and the (possibly schema qualified) name
+_NAME = rb'(?:\[[^\]]*(?:\]\][^\]]*)*\]|"[^"]*(?:""[^"]*)*"|[\w@#$]+)'
+_HEADER = re.compile(rb'(?:\xef\xbb\xbf)?(?:\s+|--[^\n]*|/\*.*?\*/)*(CREATE|ALTER|DROP)\s+(\w+)\s+(' + _NAME + rb'(?:\s*\.\s*' + _NAME + rb')*)',
+    re.IGNORECASE | re.DOTALL)
+_BLANK = re.compile(rb'(?:\xef\xbb\xbf)?(?:\s+|--[^\n]*|/\*.*?\*/)*\Z', re.DOTALL)
+
+def _hashStatement(text):
+    return hashlib.blake2b(text, digest_size=16).digest()
+
+class StatementHeader():
+    """ What the first pass records of a statement: its index, verb and object
+    type ('CREATE', 'TABLE'), name, byte offsets in the file and content hash.
+    verb, objectType and name are None for statements it can't make out. """
+    __slots__ = ('index', 'verb', 'objectType', 'name', 'start', 'end', 'hash')
+
+    def __init__(self, index, verb, objectType, name, start, end, hash):
+        self.index = index
+        self.verb = verb
+        self.objectType = objectType
+        self.name = name
+        self.start = start
+        self.end = end
+        self.hash = hash
+
+    def __repr__(self):
+        return f"{self.verb} {self.objectType} {self.name} [{self.start}:{self.end}]"
+
+def iterHeaders(buffer):
+    """ Yields a StatementHeader for each non-empty statement in buffer (bytes or an mmap) """
+    index = 0
+    for start, end in splitStatements(buffer):
+        if _BLANK.match(buffer, start, end):
+            continue
+        match = _HEADER.match(buffer, start, end)
+        if match is None:
+            verb = objectType = name = None
+        else:
+            # Comments before the statement don't count towards its text
+            start = match.start(1)
+            verb = match.group(1).upper().decode('ascii')
+            objectType = match.group(2).upper().decode('ascii')
+            name = str(match.group(3), 'utf-8')
+        yield StatementHeader(index, verb, objectType, name, start, end, _hashStatement(buffer[start:end]))
+        index += 1
+
+class LazyTable():
+    """ A CREATE TABLE whose columns are only parsed the first time they're used.
+
+    tableName and contentHash come from the header, so looking at them costs
+    nothing; any other attribute parses the statement once and is then read
+    from the parsed table.
+    """
+    __slots__ = ('filename', 'header', 'lexer', 'table')
+
+    def __init__(self, filename, header, lexer='sqlparse'):
+        self.filename = filename
+        self.header = header
+        self.lexer = lexer
+        self.table = None
+
+    @property
+    def tableName(self):
+        return self.header.name
+
+    @property
+    def contentHash(self):
+        return self.header.hash
+
+    def __repr__(self):
+        return repr(self.parse())
+
+    def __getattr__(self, name):
+        if name in LazyTable.__slots__:
+            raise AttributeError(name)
+        return getattr(self.parse(), name)
+
+    def parse(self):
+        """ Returns the parsed table, reading its statement back from the file the first time """
+        if self.table is None:
+            header = self.header
+            with open(self.filename, 'rb') as f:
+                f.seek(header.start)
+                text = f.read(header.end - header.start)
+            if _hashStatement(text) != header.hash:
+                raise Exception(f"{self.filename} changed since it was indexed")
+            try:
+                metaDatas = _parseStatementText(str(text, 'utf-8'), self.lexer)
+            except ParseError as e:
+                raise ParseError(header.index + e.statementIndex, e.message) from e
+            self.table = next(metaData for metaData in metaDatas if metaData is not None)
+        return self.table
+
+def indexFile(filename):
+    """ Returns the StatementHeader of every statement in filename """
+    with open(filename, 'rb') as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # Empty files can't be mapped
+            return []
+        with buffer:
+            return list(iterHeaders(buffer))
+
+def loadLazyTables(filename, lexer='sqlparse'):
+    """ Returns a LazyTable for each CREATE TABLE in filename.
+
+    Only the headers are read up front, which takes a single pass over the
+    file without tokenizing it. Tables are parsed when their columns or keys
+    are first looked at, so comparing two scripts where few tables differ
+    only parses those.
+    """
+    return [LazyTable(filename, header, lexer) for header in indexFile(filename)
+        if header.verb == 'CREATE' and header.objectType == 'TABLE']
@@ -0,0 +1,68 @@
+import re
+
+_TOKENS = re.compile(r"""
+    (?P<newline>\n)
+  | (?P<space>[^\S\n]+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<go>^[ \t]*GO(?:[ \t]+\d+)?[ \t]*(?:--[^\n]*)?\r?$)
+  | (?P<notnull>NOT\s+NULL\b)
+  | (?P<string>N?'[^']*(?:''[^']*)*')
+  | (?P<name>\[[^\]]*(?:\]\][^\]]*)*\]|"[^"]*(?:""[^"]*)*")
+  | (?P<number>-?(?:\d+(?:\.\d*)?|\.\d+)(?:E[-+]?\d+)?(?!\w))
+  | (?P<word>[^\W\d][\w@$\#]*|[@\#]+[\w@$\#]*)
+  | (?P<unterminated>/\*|['"\[])
+  | (?P<punctuation>[(),;.])
+  | (?P<operator>[-+*/%=<>!~&|^:])
+  | (?P<error>.)
+""", re.VERBOSE | re.IGNORECASE | re.MULTILINE | re.DOTALL)
+
+_SKIP = frozenset(['newline', 'space', 'comment'])
+
+class LexError(Exception):
+    pass
+
+class Token():
+    """ A flat token, exposing the same ttype/value pair as a sqlparse token """
+    __slots__ = ('ttype', 'value')
+
+    def __init__(self, ttype, value):
+        self.ttype = ttype
+        self.value = value
+
+    def __str__(self):
+        return self.value
+
+    def __repr__(self):
+        return f"<{self.ttype} '{self.value}'>"
+
+def tokenizeStatements(sqlCode):
+    """ Splits sqlCode into statements of flat tokens without sqlparse.
+
+    The result mirrors expandTokens over sqlparse.parse: whitespace and
+    comments are dropped, NOT NULL is one token and a ';' stays at the end of
+    its statement. GO lines separate statements and are dropped.
+    """
+    statements = []
+    tokens = []
+    for match in _TOKENS.finditer(sqlCode):
+        kind = match.lastgroup
+        if kind in _SKIP:
+            continue
+        elif kind == 'go':
+            if tokens:
+                statements.append(tokens)
+                tokens = []
+        elif kind == 'unterminated':
+            raise LexError(f"Unterminated {match.group()!r} at {match.start()}")
+        elif kind == 'error':
+            raise LexError(f"Unexpected {match.group()!r} at {match.start()}")
+        elif kind == 'notnull':
+            tokens.append(Token(kind, ' '.join(match.group().split())))
+        else:
+            tokens.append(Token(kind, match.group()))
+            if kind == 'punctuation' and tokens[-1].value == ';':
+                statements.append(tokens)
+                tokens = []
+    if tokens:
+        statements.append(tokens)
+    return statements
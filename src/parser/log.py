@@ -0,0 +1,30 @@
+import logging
+
+# Every module in the package logs under this logger. It has no sink until
+# enableTrace is called, so tracing costs nothing by default.
+logger = logging.getLogger(__name__.rpartition('.')[0])
+logger.addHandler(logging.NullHandler())
+logger.setLevel(logging.WARNING)
+logger.propagate = False
+
+formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_handler = None
+
+def enableTrace(filename=None, level=logging.DEBUG):
+    """ Sends the parser trace to filename, or stderr when no filename is given.
+    There is only one sink, so calling this again replaces the previous one. """
+    global _handler
+    disableTrace()
+    _handler = logging.FileHandler(filename) if filename else logging.StreamHandler()
+    _handler.setFormatter(formatter)
+    logger.addHandler(_handler)
+    logger.setLevel(level)
+
+def disableTrace():
+    """ Closes the trace sink, if any """
+    global _handler
+    if _handler is not None:
+        logger.removeHandler(_handler)
+        _handler.close()
+        _handler = None
+    logger.setLevel(logging.WARNING)
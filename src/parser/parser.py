@@ -1,47 +1,247 @@
+import collections
+import mmap
+import os
+import time
 import sqlparse
+from concurrent.futures import ProcessPoolExecutor
+from .lexer import LexError, tokenizeStatements
+from .splitter import isModule, splitStatements
+from .stats import timeIterator
 from .tables.create import SQLCreateTable
+from .tokens import TokenStream
 
-def expandTokens(tokens):
-    res = []
-    for token in tokens:
-        if type(token) == sqlparse.sql.Comment or token.value[:2] == '--':
-            continue
-        elif type(token) in [ sqlparse.sql.IdentifierList, sqlparse.sql.Function, sqlparse.sql.Identifier, sqlparse.sql.Parenthesis ] :
-            if type(token) == sqlparse.sql.Identifier and len(token.tokens) == 1:
-                res.append(token)
+# Bump this whenever a change alters the metadata produced for the same SQL,
+# so cached results from older versions are thrown away
+PARSER_VERSION = 7
+BATCH_SIZE = 256
+
+class ParseError(Exception):
+    """ Raised when a statement can't be parsed, with the index of that statement """
+    def __init__(self, statementIndex, message):
+        super().__init__(statementIndex, message)
+        self.statementIndex = statementIndex
+        self.message = message
+
+    def __str__(self):
+        return f"Statement {self.statementIndex}: {self.message}"
+
+_GROUPS = frozenset([ sqlparse.sql.IdentifierList, sqlparse.sql.Function, sqlparse.sql.Identifier, sqlparse.sql.Parenthesis ])
+
+def iterTokens(tokens):
+    """ Lazily flattens a sqlparse token tree, using a stack instead of recursion """
+    stack = [iter(tokens)]
+    while stack:
+        for token in stack[-1]:
+            if type(token) == sqlparse.sql.Comment or token.value[:2] == '--':
+                continue
+            elif type(token) in _GROUPS:
+                if type(token) == sqlparse.sql.Identifier and len(token.tokens) == 1:
+                    yield token
+                else:
+                    stack.append(iter(token.tokens))
+                    break
+            elif token.value == ' ':
+                continue
+            elif token.value == '\n':
+                continue
             else:
-                res += expandTokens(token.tokens)
-            continue
-        elif token.value == ' ':
-            continue
-        elif token.value == '\n':
-            continue
+                yield token
         else:
-            res.append(token)
-    return res
+            stack.pop()
+
+def expandTokens(tokens):
+    return list(iterTokens(tokens))
 
-def convertToMetaData(sqlCode):
+def _tokenizeStatements(sqlCode, lexer, timing=None):
+    """ Returns an iterable of flat tokens for each statement in sqlCode """
+    if timing is not None:
+        start = time.perf_counter()
+    if lexer == 'fast':
+        try:
+            statements = tokenizeStatements(sqlCode)
+            if timing is not None:
+                timing['tokenize'] = time.perf_counter() - start
+            return statements
+        except LexError:
+            pass # Let sqlparse deal with whatever the fast lexer doesn't know
+    elif lexer != 'sqlparse':
+        raise Exception(f"Unknown lexer {lexer}")
     statements = sqlparse.parse(sqlCode)
-    
-    stmtCount = 0
-    metaDatas = []
-    for statement in statements:
-        tokens = expandTokens(statement.tokens)
-        #print(tokens)
-        if len(tokens) == 0:
+    if timing is not None:
+        timing['tokenize'] = time.perf_counter() - start
+    # The trees are flattened as the parser reads them, so that time counts towards create
+    return [iterTokens(statement.tokens) for statement in statements]
+
+def _parseStatementText(sqlCode, lexer='sqlparse', timing=None):
+    """ Returns the metadata (or None) of every non-empty statement in sqlCode.
+    When timing is a dict, the time spent in each phase and the token count are added to it. """
+    if isModule(sqlCode):
+        return [None] # Nothing in a procedure, function, trigger or view body is part of the schema
+    res = []
+    statements = _tokenizeStatements(sqlCode, lexer, timing)
+    if timing is not None:
+        start = time.perf_counter()
+        timing['tokens'] = 0
+    for tokens in statements:
+        tokens = TokenStream(tokens)
+        if tokens.peek() is None:
             continue
-        stmtCount += 1
-        firstToken = tokens[0]
+        metaData = None
+        firstToken = tokens.next()
         if firstToken.value.upper() == 'ALTER':
             pass
         elif firstToken.value.upper() == 'CREATE':
-            objectType = tokens[1]
-            if objectType.value.upper() == 'TABLE':
-                metaDatas.append((SQLCreateTable(tokens), stmtCount-1)) 
-        
-    return metaDatas
-
-def convertFileToMetaData(filename):
-    with open(filename, 'r') as f:
-        sqlCode = f.read()
-        return convertToMetaData(sqlCode)
+            objectType = tokens.peek()
+            if objectType is not None and objectType.value.upper() == 'TABLE':
+                try:
+                    metaData = SQLCreateTable(tokens)
+                except Exception as e:
+                    raise ParseError(len(res), str(e)) from e
+        if timing is not None:
+            timing['tokens'] += tokens.index + 1
+        res.append(metaData)
+    if timing is not None:
+        timing['create'] = time.perf_counter() - start
+    return res
+
+def _parseBatch(texts, lexer, timed):
+    """ Worker entry point. Errors are returned rather than raised so the
+    results before them are still delivered in order. """
+    res = []
+    timings = []
+    for text in texts:
+        timing = {} if timed else None
+        try:
+            res.append(_parseStatementText(text, lexer, timing))
+        except ParseError as e:
+            return res, timings, e
+        timings.append(timing)
+    return res, timings, None
+
+def _iterBatches(texts, size):
+    batch = []
+    for text in texts:
+        batch.append(text)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _getCached(cache, text, lexer, timed):
+    if not timed:
+        return cache.get(text, lexer), None
+    start = time.perf_counter()
+    res = cache.get(text, lexer)
+    return res, {'cache': time.perf_counter() - start}
+
+def _submitBatch(executor, batch, lexer, cache, timed):
+    if cache is None:
+        cached = [(None, None)] * len(batch)
+    else:
+        cached = [_getCached(cache, text, lexer, timed) for text in batch]
+    misses = [text for text, (res, timing) in zip(batch, cached) if res is None]
+    future = executor.submit(_parseBatch, misses, lexer, timed) if misses else None
+    return batch, cached, future
+
+def _collectBatch(batch, cached, future, lexer, cache):
+    parsed, timings, error = future.result() if future is not None else ([], [], None)
+    parsed = iter(zip(parsed, timings))
+    for text, (res, timing) in zip(batch, cached):
+        if res is None:
+            res, parseTiming = next(parsed, (None, None))
+            if res is None:
+                raise error
+            if cache is not None:
+                cache.put(text, lexer, res)
+            if timing is not None:
+                parseTiming.update(timing)
+            timing = parseTiming
+        yield res, text, timing
+
+def _iterParsedTexts(texts, jobs, lexer, cache, timed):
+    """ Yields (result of _parseStatementText, text, timing) for each text, in order """
+    if jobs == 1:
+        for text in texts:
+            res, timing = (None, None) if cache is None else _getCached(cache, text, lexer, timed)
+            if res is None:
+                parseTiming = {} if timed else None
+                res = _parseStatementText(text, lexer, parseTiming)
+                if cache is not None:
+                    cache.put(text, lexer, res)
+                if timing is not None:
+                    parseTiming.update(timing)
+                timing = parseTiming
+            yield res, text, timing
+        return
+
+    with ProcessPoolExecutor(jobs) as executor:
+        # Only keep a couple of batches per worker in flight so memory stays bounded
+        pending = collections.deque()
+        for batch in _iterBatches(texts, BATCH_SIZE):
+            pending.append(_submitBatch(executor, batch, lexer, cache, timed))
+            if len(pending) >= jobs * 2:
+                yield from _collectBatch(*pending.popleft(), lexer, cache)
+        while pending:
+            yield from _collectBatch(*pending.popleft(), lexer, cache)
+
+def _iterStatementTexts(buffer, decode=None):
+    for start, end in splitStatements(buffer):
+        text = buffer[start:end]
+        if decode is not None:
+            text = decode(text)
+        if text.strip():
+            yield text
+
+def _iterMetaData(texts, jobs, lexer, cache, stats):
+    if jobs < 1:
+        jobs = os.cpu_count() or 1
+    if stats is not None:
+        texts = timeIterator(texts, stats, 'read')
+    stmtCount = 0
+    parsedTexts = _iterParsedTexts(texts, jobs, lexer, cache, stats is not None)
+    try:
+        for metaDatas, text, timing in parsedTexts:
+            if stats is not None:
+                stats.addStatement(stmtCount, text, timing)
+            for metaData in metaDatas:
+                stmtCount += 1
+                if metaData is not None:
+                    yield (metaData, stmtCount-1)
+    except ParseError as e:
+        # Errors are relative to the statement text they came from
+        raise ParseError(stmtCount + e.statementIndex, e.message) from e
+    finally:
+        parsedTexts.close()
+
+def iterMetaData(sqlCode, jobs=1, lexer='sqlparse', cache=None, stats=None):
+    """ Yields (metadata, statementIndex) for each CREATE TABLE in sqlCode.
+
+    With jobs > 1 the statements are parsed in that many processes (0 uses
+    every core); the results still come back in statement order. lexer is
+    either 'sqlparse' or 'fast', the built-in DDL lexer which falls back to
+    sqlparse on input it can't tokenize. A ParseCache passed as cache is
+    used to skip statements that were already parsed in an earlier run, and
+    a ParseStats passed as stats collects timings.
+    """
+    return _iterMetaData(_iterStatementTexts(sqlCode), jobs, lexer, cache, stats)
+
+def iterFileMetaData(filename, jobs=1, lexer='sqlparse', cache=None, stats=None):
+    """ Same as iterMetaData, but memory maps the file instead of reading it """
+    with open(filename, 'rb') as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # Empty files can't be mapped
+            return
+        with buffer:
+            texts = _iterStatementTexts(buffer, lambda text: str(text, 'utf-8').lstrip('\ufeff'))
+            try:
+                yield from _iterMetaData(texts, jobs, lexer, cache, stats)
+            finally:
+                texts.close()
+
+def convertToMetaData(sqlCode, jobs=1, lexer='sqlparse', cache=None, stats=None):
+    return list(iterMetaData(sqlCode, jobs, lexer, cache, stats))
+
+def convertFileToMetaData(filename, jobs=1, lexer='sqlparse', cache=None, stats=None):
+    return list(iterFileMetaData(filename, jobs, lexer, cache, stats))
@@ -0,0 +1,179 @@
+""" A snapshot is a compact binary copy of parsed metadata, so a baseline
+doesn't have to be parsed again on every run. All integers are little endian.
+
+    header       magic, format version, the byte length of the strings, then the
+                 number of strings, tables, columns, foreign keys and name references
+    strings      every distinct string once, utf-8, each ended by a NUL
+    tables       name, first column, column count, first foreign key, foreign key count,
+                 and a range of the name references for the primary key
+    columns      the column attributes, strings as indexes into the strings
+    foreign keys ref table, actions, and a range of the name references
+    names        the column names of the foreign keys and primary keys, as string indexes
+"""
+import mmap
+import struct
+import sys
+from .tables.model import Column, ForeignKey, Table
+
+MAGIC = b'MSQLSNAP'
+FORMAT_VERSION = 3
+
+_HEADER = struct.Struct('<8sHxxIIIIII')
+_TABLE = struct.Struct('<IIIIIII')
+_COLUMN = struct.Struct('<IIiiiqqIIiB')
+_FOREIGN_KEY = struct.Struct('<IIIIII')
+
+_NONE = 0xFFFFFFFF # The string index of None
+_NO_SIZE = -2
+_MAX_SIZE = -1
+
+# Column flags: each optional bool takes a bit for "is set" and one for its value
+_NULLABLE = 1
+_PRIMARY_KEY = 4
+_CLUSTERED = 16
+_IDENTITY = 64
+
+def isSnapshot(filename):
+    with open(filename, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+class _StringTable():
+    __slots__ = ('indexes', 'strings')
+
+    def __init__(self):
+        self.indexes = {}
+        self.strings = []
+
+    def add(self, value):
+        if value is None:
+            return _NONE
+        index = self.indexes.get(value)
+        if index is None:
+            if '\0' in value:
+                raise Exception(f"Can't store {value!r} in a snapshot")
+            index = self.indexes[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+def _flag(value, bit):
+    if value is None:
+        return 0
+    return bit | (bit << 1 if value else 0)
+
+def _unflag(flags, bit):
+    if not flags & bit:
+        return None
+    return bool(flags & bit << 1)
+
+def writeSnapshot(tables, filename):
+    """ Writes the metadata of tables to filename """
+    strings = _StringTable()
+    tableRecords = []
+    columnRecords = []
+    foreignKeyRecords = []
+    names = []
+
+    def addForeignKey(foreignKey):
+        foreignKeyRecords.append(_FOREIGN_KEY.pack(strings.add(foreignKey.ref_table), strings.add(foreignKey.on_delete),
+            strings.add(foreignKey.on_update), len(names), len(foreignKey.columns), len(foreignKey.ref_columns)))
+        names.extend(strings.add(name) for name in foreignKey.columns + foreignKey.ref_columns)
+        return len(foreignKeyRecords) - 1
+
+    for table in tables:
+        if table is None:
+            continue
+        firstColumn = len(columnRecords)
+        for column in table.columns.values():
+            if column.size is None:
+                size = _NO_SIZE
+            elif column.size == 'MAX':
+                size = _MAX_SIZE
+            else:
+                size = column.size
+            seed, increment = column.identity or (0, 0)
+            flags = _flag(column.nullable, _NULLABLE) | _flag(column.primary_key, _PRIMARY_KEY) | _flag(column.clustered, _CLUSTERED)
+            if column.identity is not None:
+                flags |= _IDENTITY
+            foreignKey = -1 if column.foreign_key is None else addForeignKey(column.foreign_key)
+            columnRecords.append(_COLUMN.pack(strings.add(column.name), strings.add(column.data_type), size,
+                -1 if column.precision is None else column.precision, -1 if column.scale is None else column.scale,
+                seed, increment, strings.add(column.default_value), strings.add(column.computed), foreignKey, flags))
+        firstForeignKey = len(foreignKeyRecords)
+        for foreignKey in table.multiForeignKeys:
+            addForeignKey(foreignKey)
+        primaryKey = table.primaryKey
+        tableRecords.append(_TABLE.pack(strings.add(table.tableName), firstColumn, len(columnRecords) - firstColumn,
+            firstForeignKey, len(foreignKeyRecords) - firstForeignKey, len(names), _NONE if primaryKey is None else len(primaryKey)))
+        if primaryKey is not None:
+            names.extend(strings.add(name) for name in primaryKey)
+
+    stringBytes = ''.join(string + '\0' for string in strings.strings).encode('utf-8')
+    with open(filename, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(stringBytes), len(strings.strings), len(tableRecords),
+            len(columnRecords), len(foreignKeyRecords), len(names)))
+        f.write(stringBytes)
+        f.write(b''.join(tableRecords))
+        f.write(b''.join(columnRecords))
+        f.write(b''.join(foreignKeyRecords))
+        f.write(struct.pack(f'<{len(names)}I', *names))
+
+def _iterRecords(record, buffer, offset, count):
+    end = offset + record.size * count
+    return record.iter_unpack(buffer[offset:end]), end
+
+def loadSnapshot(filename):
+    """ Returns the tables stored in a snapshot written by writeSnapshot """
+    with open(filename, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return _readSnapshot(buffer, filename)
+
+def _readSnapshot(buffer, filename):
+    if len(buffer) < _HEADER.size:
+        raise Exception(f"{filename} is not a snapshot")
+    magic, version, stringBytes, stringCount, tableCount, columnCount, foreignKeyCount, nameCount = _HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise Exception(f"{filename} is not a snapshot")
+    if version != FORMAT_VERSION:
+        raise Exception(f"{filename} is a version {version} snapshot, expected version {FORMAT_VERSION}")
+
+    end = _HEADER.size + stringBytes
+    strings = [sys.intern(string) for string in buffer[_HEADER.size:end].decode('utf-8').split('\0')[:stringCount]]
+    string = lambda index: None if index == _NONE else strings[index]
+
+    tableRecords, offset = _iterRecords(_TABLE, buffer, end, tableCount)
+    tableRecords = list(tableRecords)
+    columnRecords, offset = _iterRecords(_COLUMN, buffer, offset, columnCount)
+    foreignKeyRecords, offset = _iterRecords(_FOREIGN_KEY, buffer, offset, foreignKeyCount)
+    foreignKeyRecords = list(foreignKeyRecords)
+    names = [string(index) for index in struct.unpack_from(f'<{nameCount}I', buffer, offset)]
+
+    def foreignKey(index):
+        refTable, onDelete, onUpdate, first, count, refCount = foreignKeyRecords[index]
+        res = ForeignKey(names[first:first + count], string(refTable), names[first + count:first + count + refCount])
+        res.on_delete = string(onDelete)
+        res.on_update = string(onUpdate)
+        return res
+
+    tables = []
+    for name, firstColumn, count, firstForeignKey, foreignKeyTotal, firstKey, keyCount in tableRecords:
+        table = Table(string(name))
+        for _ in range(count):
+            columnName, dataType, size, precision, scale, seed, increment, default, computed, foreignKeyIndex, flags = next(columnRecords)
+            column = Column(string(columnName), string(dataType))
+            column.size = None if size == _NO_SIZE else 'MAX' if size == _MAX_SIZE else size
+            column.precision = None if precision < 0 else precision
+            column.scale = None if scale < 0 else scale
+            column.identity = (seed, increment) if flags & _IDENTITY else None
+            column.nullable = _unflag(flags, _NULLABLE)
+            column.default_value = string(default)
+            column.computed = string(computed)
+            column.primary_key = _unflag(flags, _PRIMARY_KEY)
+            column.clustered = _unflag(flags, _CLUSTERED)
+            if foreignKeyIndex >= 0:
+                column.foreign_key = foreignKey(foreignKeyIndex)
+            table.columns[column.name] = column
+        table.multiForeignKeys = [foreignKey(index) for index in range(firstForeignKey, firstForeignKey + foreignKeyTotal)]
+        if keyCount != _NONE:
+            table.primaryKey = tuple(names[firstKey:firstKey + keyCount])
+        tables.append(table)
+    return tables
@@ -0,0 +1,57 @@
+import re
+
+# Everything that can hide a statement terminator (strings, quoted identifiers,
+# comments) is matched as a whole so the ';' or GO inside it is skipped.
+_BOUNDARIES = r"""
+    '[^']*(?:''[^']*)*'?
+  | "[^"]*(?:""[^"]*)*"?
+  | \[[^\]]*(?:\]\][^\]]*)*\]?
+  | --[^\n]*
+  | /\*.*?(?:\*/|\Z)
+  | (?P<semi>;)
+  | (?P<go>^[ \t]*GO(?:[ \t]+\d+)?[ \t]*(?:--[^\n]*)?\r?$)
+"""
+_FLAGS = re.VERBOSE | re.MULTILINE | re.IGNORECASE | re.DOTALL
+_strPattern = re.compile(_BOUNDARIES, _FLAGS)
+_bytesPattern = re.compile(_BOUNDARIES.encode('ascii'), _FLAGS)
+
+# Procedures, functions, triggers and views have to be alone in their batch,
+# and their bodies contain ';' of their own, so such a batch only ends at GO
+_MODULE = r"""
+    (?:\s+|--[^\n]*|/\*.*?\*/)*
+    (?:CREATE(?:\s+OR\s+ALTER)?|ALTER)\s+(?:PROC|PROCEDURE|FUNCTION|TRIGGER|VIEW)\b
+"""
+_strModule = re.compile(r'\ufeff?' + _MODULE, re.VERBOSE | re.IGNORECASE | re.DOTALL)
+_bytesModule = re.compile(rb'(?:\xef\xbb\xbf)?' + _MODULE.encode('ascii'), re.VERBOSE | re.IGNORECASE | re.DOTALL)
+
+def isModule(buffer, start=0):
+    """ Whether the statement at start creates or alters a procedure, function, trigger or view """
+    pattern = _strModule if isinstance(buffer, str) else _bytesModule
+    return pattern.match(buffer, start) is not None
+
+def splitStatements(buffer):
+    """ Yields the (start, end) offsets of each statement in buffer.
+
+    buffer can be a str, bytes or any bytes-like object such as an mmap, so a
+    file never has to be read into memory as a whole. Statements end on a ';'
+    (which is kept) or on a GO batch separator line (which is dropped). A
+    batch that creates a procedure, function, trigger or view is a single
+    statement ending at GO.
+    """
+    pattern = _strPattern if isinstance(buffer, str) else _bytesPattern
+    start = 0
+    module = None # Only looked up once a ';' is found in the statement
+    for match in pattern.finditer(buffer):
+        if match.lastgroup == 'semi':
+            if module is None:
+                module = isModule(buffer, start)
+            if not module:
+                yield (start, match.end())
+                start = match.end()
+                module = None
+        elif match.lastgroup == 'go':
+            yield (start, match.start())
+            start = match.end()
+            module = None
+    if start < len(buffer):
+        yield (start, len(buffer))
@@ -0,0 +1,81 @@
+import collections
+import heapq
+import time
+
+class ParseStats():
+    """ Collects per-phase wall time, per-statement parse times and token counts.
+
+    Pass one as the stats argument of iterMetaData and friends; nothing is
+    measured when it is left out. onStatement, if given, is called with
+    (statementIndex, seconds, tokenCount, text) as each statement is parsed,
+    and can be used to stream the measurements elsewhere.
+    """
+    def __init__(self, slowest=10, onStatement=None):
+        self.phases = collections.defaultdict(float)
+        self.counters = collections.defaultdict(int)
+        self.slowestCount = slowest
+        self.slowest = []
+        self.onStatement = onStatement
+
+    def addPhase(self, phase, seconds):
+        self.phases[phase] += seconds
+
+    def timePhase(self, phase):
+        """ A context manager adding the time spent in its block to phase """
+        return _PhaseTimer(self, phase)
+
+    def addStatement(self, statementIndex, text, timing):
+        """ Records the timing dict filled in while parsing one statement text """
+        seconds = 0.0
+        for phase, value in timing.items():
+            if phase == 'tokens':
+                continue
+            self.phases[phase] += value
+            seconds += value
+        tokens = timing.get('tokens', 0)
+        self.counters['statements'] += 1
+        self.counters['tokens'] += tokens
+        entry = (seconds, statementIndex, text.strip()[:80])
+        if len(self.slowest) < self.slowestCount:
+            heapq.heappush(self.slowest, entry)
+        elif self.slowest and entry > self.slowest[0]:
+            heapq.heapreplace(self.slowest, entry)
+        if self.onStatement is not None:
+            self.onStatement(statementIndex, seconds, tokens, text)
+
+    def toDict(self):
+        return {
+            'phases': dict(self.phases),
+            'counters': dict(self.counters),
+            'slowest': [
+                {'statement': index, 'seconds': seconds, 'text': text}
+                for seconds, index, text in sorted(self.slowest, reverse=True)
+            ]
+        }
+
+class _PhaseTimer():
+    __slots__ = ('stats', 'phase', 'start')
+
+    def __init__(self, stats, phase):
+        self.stats = stats
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.stats.addPhase(self.phase, time.perf_counter() - self.start)
+
+def timeIterator(iterable, stats, phase):
+    """ Yields from iterable, adding the time spent producing each item to phase """
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            stats.addPhase(phase, time.perf_counter() - start)
+            return
+        stats.addPhase(phase, time.perf_counter() - start)
+        yield item
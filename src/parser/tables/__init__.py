@@ -1,2 +0,0 @@
-import os
-os.makedirs('logs', exist_ok=True)
\ No newline at end of file
@@ -1,412 +1,469 @@
-import sqlparse
 import logging
-import datetime
+import sys
+from ..tokens import TokenStream
+from .model import Column, ForeignKey, Table
+try:
+    from compare.canonical import expressionTokens, normalizeName, unquoteName # Run from src, as main.py is
+except ImportError:
+    from ...compare.canonical import expressionTokens, normalizeName, unquoteName
+
+logger = logging.getLogger(__name__)
+
+# Every token is classified once into a kind: the upper case keyword for the
+# words the grammar knows, the character itself for punctuation, and
+# IDENTIFIER for everything else. Keywords that aren't reserved in T-SQL are
+# still accepted as names wherever a name is expected.
+IDENTIFIER = sys.intern('IDENTIFIER')
+_KINDS = {keyword: sys.intern(keyword) for keyword in (
+    'ACTION', 'AS', 'ASC', 'CASCADE', 'CHECK', 'CLUSTERED', 'COLLATE', 'CONSTRAINT', 'DEFAULT', 'DELETE', 'DESC',
+    'FILESTREAM', 'FOR', 'FOREIGN', 'IDENTITY', 'INDEX', 'KEY', 'NO', 'NONCLUSTERED', 'NOT', 'NOT NULL', 'NULL', 'ON',
+    'PERSISTED', 'PRIMARY', 'REFERENCES', 'REPLICATION', 'ROWGUIDCOL', 'SET', 'SPARSE', 'UNIQUE', 'UPDATE', 'WITH'
+)}
+_KINDS.update({punctuation: sys.intern(punctuation) for punctuation in '(),;.'})
+_classified = {}
+
+def _classify(value):
+    """ Returns the kind of a token value, remembering it for the next time the value is seen """
+    kind = _classified.get(value)
+    if kind is None:
+        kind = _KINDS.get(' '.join(value.upper().split()), IDENTIFIER)
+        if len(_classified) >= 65536: # Names are endless, so the memo is bounded
+            _classified.clear()
+        _classified[value] = kind
+    return kind
+
+# What a data type takes in parentheses, and what SQL Server uses when they're left out
+_TYPE_ARGUMENTS = {
+    'DECIMAL': ('precision', (18, 0)), 'NUMERIC': ('precision', (18, 0)), 'DEC': ('precision', (18, 0)),
+    'FLOAT': ('size', 53),
+    'CHAR': ('size', 1), 'VARCHAR': ('size', 1), 'NCHAR': ('size', 1), 'NVARCHAR': ('size', 1),
+    'BINARY': ('size', 1), 'VARBINARY': ('size', 1),
+    'DATETIME2': ('scale', 7), 'DATETIMEOFFSET': ('scale', 7), 'TIME': ('scale', 7)
+}
+
+# The kinds a column definition or an expression inside it stops at
+_ELEMENT_END = frozenset([',', ')'])
+_ACTIONS = {'CASCADE': 'CASCADE', 'NO': 'NO ACTION', 'SET': None}
+
+# Operators the fast lexer yields one character at a time
+_OPERATORS = frozenset(['>=', '<=', '<>', '!=', '!<', '!>'])
+
+def _isWord(token):
+    return token[:1].isalnum() or token[:1] in "_@#$[\"'"
+
+def _expressionText(values):
+    """ Joins the tokens of an expression back into text, the same way whether
+    the lexer grouped them (a*2) or not (a, *, 2): spaces only go between
+    words, and where leaving them out would start a comment """
+    tokens = []
+    for value in values:
+        for token in expressionTokens(value):
+            if tokens and (tokens[-1] + token in _OPERATORS or (token[:1] == "'" and tokens[-1] in ('N', 'n'))):
+                tokens[-1] += token
+            else:
+                tokens.append(token)
+    text = ''
+    for token in tokens:
+        if text and (_isWord(text[-1]) and _isWord(token) or text[-1] + token[:1] in ('--', '/*')):
+            text += ' '
+        text += token
+    return text
+
+def _stripParentheses(values):
+    """ Drops parentheses around a whole expression, as SQL Server does for defaults """
+    while len(values) > 1 and values[0] == '(' and values[-1] == ')':
+        depth = 0
+        for index, value in enumerate(values):
+            depth += value == '('
+            depth -= value == ')'
+            if depth == 0 and index < len(values) - 1:
+                return values
+        values = values[1:-1]
+    return values
+
+class SQLCreateTable(Table):
+    """ https://docs.microsoft.com/en-us/sql/t-sql/statements/create-table-transact-sql?view=sql-server-ver15
+
+    The grammar is a set of dispatch tables, one per state (the table's
+    elements, the options of a column), from a token kind to the method
+    handling it, so each token costs a lookup whatever the size of the grammar.
+    """
+    __slots__ = ('tokens',)
 
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-
-mode = logging.DEBUG
-class SQLCreateTable():
-    """ https://docs.microsoft.com/en-us/sql/t-sql/statements/create-table-transact-sql?view=sql-server-ver15 """
     def __init__(self, tokens):
-        self.index = 2
-        self.tokens = tokens
-        self.tableName = ''
-        self.columns = {}
-        self.multiForeignKeys = []
-
-        # Set up logger
-        self.logger = logging.getLogger()
-        self.logger.setLevel(level=mode)
-        fh = logging.FileHandler(f'logs/create-table-{datetime.datetime.now()}.log')
-        fh.setLevel(level=mode)
-        fh.setFormatter(formatter)
-        self.logger.addHandler(fh)
-        self.logger.info(' '.join([token.value for token in self.tokens]))
+        """ tokens is a TokenStream, or any iterable of flat tokens, starting at CREATE """
+        super().__init__()
+        self.tokens = tokens if isinstance(tokens, TokenStream) else TokenStream(tokens)
         # Generate the metadata
-        self._getMetaData()
-        fh.close()
-        self.logger.removeHandler(fh)
-
-    def __repr__(self):
-        return str((f"CREATE TABLE {self.tableName}", self.getColumns()))
-
-    def getColumns(self):
-        return str(self.columns)
+        try:
+            while self.tokens.index < 1: # Skip CREATE TABLE
+                self.tokens.next()
+            self._getMetaData()
+        finally:
+            # The tokens are only needed while parsing
+            self.tokens = None
 
     def _nextToken(self):
-        """ Allows you to go to the next token """
-        self.index += 1
-        self.logger.debug("Next token is {}".format(self.tokens[self.index]))
-        return self.tokens[self.index]
-    
-    def _currentToken(self):
-        self.logger.debug("Current token is {}".format(self.tokens[self.index]))
-        return self.tokens[self.index]
-
-    def _rewindToken(self):
-        """ Allows you to rewind to the previous token """
-        self.index -= 1
-        self.logger.debug("Previous token is {}".format(self.tokens[self.index]))
-
-    def _isDataType(self, token):
-        """ https://docs.microsoft.com/en-us/sql/t-sql/data-types/data-types-transact-sql?view=sql-server-ver15 """
-        dtypes = {
-            # Exact Numerics
-            "BIGINT", "NUMERIC", "BIT", "SMALLINT", "DECIMAL", "SMALLMONEY", "INT", "TINYINT", "MONEY",
-            # Approximate Numerics
-            "FLOAT", "REAL",
-            # Date and Time
-            "DATE", "DATETIMEOFFSET", "DATETIME2", "SMALLDATETIME", "DATETIME", "TIME",
-            # Character Strings
-            "CHAR", "VARCHAR", "TEXT",
-            # Unicode Character strings
-            "NCHAR", "NVARCHAR", "NTEXT",
-            # Binary Strings
-            "BINARY", "VARBINARY", "IMAGE",
-            # Other
-            "ROWVERSION", "UNIQUEIDENTIFIER"
-        }
-        return token.upper() in dtypes
-
-    def _isPunctuation(self, token):
-        grammar = {
-            ',', "'", '"', ';',
-            '$', '@', '+', '-',
-            '_', '=', '(', ')',
-            '{', '[', ']', '}',
-            ':', '<', '>', '/'
-        }
-        return token in grammar
-
-    def _isKeyword(self, token):
-        keywords = {
-            # Constraint Keys
-            'PRIMARY', 'FOREIGN', 'KEY', 'REFERENCES',
-            # DDL
-            'CREATE', 'DROP', 'ALTER',
-            'TABLE', 'IDENTITY', 'NOT', 'NULL', 'ON',
-            'SPARSE', 'CLUSTERED', 'NONCLUSTERED',
-            'DEFAULT', 'ADD',
-            # SQL DML
-            'DELETE', 'UPDATE', 'INSERT', 'SELECT'
-        }
-        return token.upper() in keywords
-
-    def _isIdentifier(self, token):
-        return not (self._isKeyword(token) or self._isDataType(token) or self._isPunctuation(token))
-
-    def _getNumberSizes(self, token):
-        return [int(tkn.value) for tkn in self._filterTokens(token.tokens) if tkn.value.isnumeric()]
-
-    def _getKeys(self, tokens):
-        res = []
-        for token in tokens:
-            if type(token) == sqlparse.sql.Identifier:
-                res.append(token.value.upper())
-        return tuple(res)
-
-    def _validForeignReference(self, data):
-        return data['table_reference'] in self.metaData or data['delete_action'] != 'NO_ACTION'
-
-    def _getForiegnKey(self, tableMode=False):
-        """ Parses the PRIMARY KEY attributes """
-        self.logger.debug("Begin _getForiegnKey")
-        res = {}
-        token = self._nextToken()
-        if token.value.upper() != 'KEY':
-            raise Exception("Expected keyword KEY")
-
-        # For table constraint, get mulitple columns
-        if tableMode:
-            token = self._nextToken()
-            if token.value != '(':
-                raise Exception("Expected (")
-            res['columns'] = []
-            while True:
-                token = self._nextToken()
-                if not self._isIdentifier(token.value):
-                    raise Exception("Expected identifier")
-                res['columns'].append(token.value)
-                token = self._nextToken()
-                if token.value == ')':
-                    break
-                elif token.value != ',':
-                    raise Exception("Expected ,")
-
-        token = self._nextToken()
-        if token.value.upper() != 'REFERENCES':
-            raise Exception("Expected keyword REFERENCES")
-
-        token = self._nextToken()
-        if not self._isIdentifier(token.value):
+        """ Moves to the next token and returns (value, kind) """
+        token = self.tokens.next()
+        logger.debug("Next token is %s", token)
+        return token.value, _classify(token.value)
+
+    def _peekKind(self):
+        token = self.tokens.peek()
+        return None if token is None else _classify(token.value)
+
+    def _expect(self, kind, message=None):
+        value, actual = self._nextToken()
+        if actual != kind:
+            raise Exception(message or f"Expected {kind}")
+        return value
+
+    def _getName(self, value, kind):
+        """ Reads a possibly multi-part name starting at value """
+        if kind in _RESERVED:
             raise Exception("Expected identifier")
-        res['ref_table'] = token.value
-
-        token = self._nextToken()
-        if token.value != '(':
-            raise Exception("Expected (")
-        
-        if tableMode:
-            res['ref_column'] = []
-            while True:
-                token = self._nextToken()
-                if not self._isIdentifier(token.value):
-                    raise Exception("Expected identifier")
-                res['ref_column'].append(token.value)
-                token = self._nextToken()
-                if token.value == ')':
-                    self._rewindToken()
-                    break
-                elif token.value != ',':
-                    raise Exception("Expected ,")
-        else:
-            token = self._nextToken()
-            if not self._isIdentifier(token.value):
-                raise Exception("Expected identifier")
-            res['ref_column'] = token.value
-
-        token = self._nextToken()
-        if token.value != ')':
-            raise Exception("Expected )")
-        
-        token = self._nextToken()
-        if token.value.upper() == 'ON':
-            while True:
-                token = self._nextToken()
-                print(token)
-                if token.value.upper() not in {'DELETE', 'UPDATE'}:
-                    break
-                action = token.value
-                token = self._nextToken()
-                if token.value.upper() == 'CASCADE':
-                    res[action] = 'CASCADE'
-                elif token.value.upper() =='SET':
-                    token = self._nextToken()
-                    res[action] = token.value.upper()
-                elif token.value.upper() == 'NO':
-                    self._nextToken()
-                    res[action] = 'NONE'
-            self._rewindToken()
-        elif token.value.upper() == 'NOT':
-            pass
-        else:
-            self._rewindToken()
-        self.logger.debug("End _getForiegnKey")
-        return res
+        while self._peekKind() == '.':
+            self._nextToken()
+            part, kind = self._nextToken()
+            value += '.' + part
+        return sys.intern(value)
+
+    def _getNameList(self):
+        """ Parses (name [ASC|DESC], ...) """
+        self._expect('(')
+        names = []
+        while True:
+            value, kind = self._nextToken()
+            names.append(self._getName(value, kind))
+            value, kind = self._nextToken()
+            if kind in ('ASC', 'DESC'):
+                value, kind = self._nextToken()
+            if kind == ')':
+                return names
+            if kind != ',':
+                raise Exception("Expected ,")
 
-    def _getPrimaryKeyColumn(self):
-        """ Parses the PRIMARY KEY attributes """
-        res = {}
-        token = self._nextToken()
-        if token.value.upper() != 'KEY':
-            raise Exception("Expected keyword KEY")
-        res['primary_key'] = True
-        token = self._nextToken()
-
-        # Check for clustered indexing
-        if token.value.upper() == 'NONCLUSTERED':
-            res['clustered'] = False
-            token = self._nextToken()
-        elif token.value.upper() == 'CLUSTERED':
-            res['clustered'] = True
-            token = self._nextToken()
-
-        token = self._rewindToken()
-        return res
-
-    def _getPrimaryKeyTable(self):
-        """ Parses the PRIMARY KEY attributes """
-        res = {}
-        column = ''
-        token = self._nextToken()
-        if token.value.upper() != 'KEY':
-            raise Exception("Expected keyword KEY")
-        res['primary_key'] = True
-        token = self._nextToken()
-
-        # Check for clustered indexing
-        if token.value.upper() == 'NONCLUSTERED':
-            res['clustered'] = False
-            token = self._nextToken()
-        elif token.value.upper() == 'CLUSTERED':
-            res['clustered'] = True
-            token = self._nextToken()
-        
-        if token.value == '(':
-            token = self._nextToken()
-            if token.value not in self.columns:
-                raise Exception(f"The column {token.value} doesn't exist")
-            column = token.value
-            token = self._nextToken()
-            if token.value != ')':
-                raise Exception(f"Expected )")
-            token = self._nextToken()
-        else:
-            raise Exception(f"Expected (")
-        
-        token = self._rewindToken()
-        self.columns[column] |= res
+    def _getExpression(self, stop=_ELEMENT_END, required=False):
+        """ Returns the values of the tokens up to one of the stop kinds outside
+        of parentheses. A required expression takes at least one token. """
+        values = []
+        depth = 0
+        while True:
+            kind = self._peekKind()
+            if kind is None or (depth == 0 and kind in stop and not (required and not values and kind not in _ELEMENT_END)):
+                return values
+            value, kind = self._nextToken()
+            depth += (kind == '(') - (kind == ')')
+            values.append(value)
+
+    def _getGroup(self):
+        """ Returns the values inside the parentheses that come next """
+        self._expect('(')
+        values = self._getExpression((')',))
+        self._expect(')')
+        return values
+
+    def _getNumber(self, message):
+        value, kind = self._nextToken()
+        if not value.isnumeric():
+            raise Exception(message)
+        return int(value)
 
     def _getIdentityInfo(self):
         """ Parses the IDENTITY attributes """
-        self.logger.debug("Begin _getIdentityInfo")
-        info = None
-        token = self._nextToken()
-        if token.value == '(':
-            seed = self._nextToken()
-            self.logger.debug(seed.value)
-            if not seed.value.isnumeric():
-                raise Exception("Seed value is not numeric")
-            token = self._nextToken()
-            if not token.value == ',':
-                raise Exception("Expected ,")
-            increment = self._nextToken()
-            if not increment.value.isnumeric():
-                raise Exception("Increment value is not numeric")
-            token = self._nextToken()
-            if token.value != ')':
-                raise Exception("Expected )")
-            info = (int(seed.value), int(increment.value))
-        else:
-            token = self._rewindToken()
-            info = (1, 1)
-        self.logger.debug("End _getIdentityInfo")
-        return info
-
-    def _getDecimalInfo(self):
-        """ Parses the DECIMAL/NUMERIC attributes """
-        self.logger.debug("Begin _getDecimalInfo")
-        res = { 'precision': 8, 'scale': 0 }
-        token = self._nextToken()
-        if token.value == '(':
-            precision = self._nextToken()
-            if not precision.value.isnumeric():
-                raise Exception("Precision value is not numeric")
-            res['precision'] = int(precision.value)
-            token = self._nextToken()
-            # Check if there's a scale to evaluate
-            if token.value == ')':
-                return res
-            elif not token.value == ',':
-                raise Exception("Expected ,")
-            
-            scale = self._nextToken()
-            if not scale.value.isnumeric():
-                raise Exception("Scale value is not numeric")
-            res['scale'] = int(scale.value)
-            token = self._nextToken()
-            if token.value != ')':
-                raise Exception("Expected )")
-        else:
-            token = self._rewindToken()
-        self.logger.debug("End _getDecimalInfo")
-        return res
-
-    def _getDataSize(self, dtype):
-        """ Parses the FLOAT, VARCHAR, NCHAR, NVARCHAR, CHAR, BINARY, VARBINARY attributes """
-        self.logger.debug("Begin _getDataSize")
-        res = { 'size': 1 }
-        token = self._nextToken()
-        if token.value == '(':
-            size = self._nextToken()
-            if not size.value.isnumeric():
-                raise Exception("Precision value is not numeric")
-            res['size'] = int(size.value)
-            token = self._nextToken()
-            # Check if there's a scale to evaluate
-            if not token.value == ')':
-                raise Exception("Expected ,")
+        if self._peekKind() != '(':
+            return (1, 1)
+        self._nextToken()
+        seed = self._getNumber("Seed value is not numeric")
+        self._expect(',', "Expected ,")
+        increment = self._getNumber("Increment value is not numeric")
+        self._expect(')', "Expected )")
+        return (seed, increment)
+
+    def _processDataType(self, column, value):
+        """ Parses the data type and its size, precision or scale """
+        dataType = unquoteName(value).upper()
+        while self._peekKind() == '.': # A user defined type in a schema
+            self._nextToken()
+            dataType += '.' + unquoteName(self._nextToken()[0]).upper()
+        column.data_type = sys.intern(dataType)
+        argument, default = _TYPE_ARGUMENTS.get(column.data_type, (None, None))
+        if self._peekKind() != '(':
+            if argument == 'precision':
+                column.precision, column.scale = default
+            elif argument is not None:
+                setattr(column, argument, default)
+            return
+        self._nextToken()
+        value, kind = self._nextToken()
+        if argument == 'size' and value.upper() == 'MAX':
+            column.size = 'MAX'
+        elif not value.isnumeric():
+            raise Exception("Precision value is not numeric")
+        elif argument == 'precision':
+            column.precision, column.scale = int(value), 0
+            if self._peekKind() == ',':
+                self._nextToken()
+                column.scale = self._getNumber("Scale value is not numeric")
+        elif argument == 'scale':
+            column.scale = int(value)
         else:
-            if dtype == 'FLOAT':
-                res['size'] = 53
-            token = self._rewindToken()
-        return res
-
-
-    def _processDataType(self):
-        """ Process the data type column """
-        res = {}
-        token = self._currentToken()
-        res['data_type'] = token.value.upper()
-        if token.value.upper() in { 'DECIMAL', 'NUMERIC' }:
-            res |= self._getDecimalInfo()
-        elif token.value.upper() in { 'FLOAT', 'VARCHAR', 'NCHAR', 'NVARCHAR', 'CHAR', 'BINARY', 'VARBINARY' }:
-            res |= self._getDataSize(token.value.upper())
+            column.size = int(value)
+        self._expect(')', "Expected )")
+
+    def _getReferences(self, foreignKey):
+        """ Parses table (columns) [ON DELETE|UPDATE action] [NOT FOR REPLICATION] after REFERENCES """
+        foreignKey.ref_table = self._getName(*self._nextToken())
+        foreignKey.ref_columns = tuple(self._getNameList()) if self._peekKind() == '(' else ()
+        while True:
+            kind = self._peekKind()
+            if kind == 'ON':
+                self._nextToken()
+                value, event = self._nextToken()
+                if event not in ('DELETE', 'UPDATE'):
+                    raise Exception("Expected DELETE or UPDATE")
+                value, kind = self._nextToken()
+                action = _ACTIONS.get(kind)
+                if kind == 'SET':
+                    action = f"SET {self._nextToken()[0].upper()}"
+                elif kind == 'NO':
+                    self._expect('ACTION')
+                elif action is None:
+                    raise Exception(f"Unknown foreign key action {value}")
+                setattr(foreignKey, 'on_delete' if event == 'DELETE' else 'on_update', action)
+            elif kind == 'NOT':
+                self._nextToken()
+                self._skipForReplication()
+            else:
+                return foreignKey
+
+    def _skipForReplication(self):
+        """ Skips FOR REPLICATION after a NOT """
+        self._expect('FOR', "Expected FOR REPLICATION")
+        self._expect('REPLICATION', "Expected FOR REPLICATION")
+
+    def _skipClustered(self):
+        """ Returns True or False for CLUSTERED or NONCLUSTERED, None when neither follows """
+        kind = self._peekKind()
+        if kind == 'CLUSTERED' or kind == 'NONCLUSTERED':
+            self._nextToken()
+            return kind == 'CLUSTERED'
+        return None
+
+    def _skipIndexOptions(self):
+        """ Skips WITH (options) and ON filegroup after a key or index """
+        while True:
+            kind = self._peekKind()
+            if kind == 'WITH':
+                self._nextToken()
+                if self._peekKind() == '(':
+                    self._getGroup()
+                else:
+                    self._nextToken() # e.g. WITH FILLFACTOR = 90, a legacy form
+                    self._getExpression()
+            elif kind == 'ON':
+                self._nextToken()
+                self._getExpression()
+            else:
+                return
+
+    # Column options, after the data type or computed expression
+
+    def _columnIdentity(self, column, value):
+        column.identity = self._getIdentityInfo()
+
+    def _columnNotNull(self, column, value):
+        column.nullable = False
+
+    def _columnNull(self, column, value):
+        column.nullable = True
+
+    def _columnDefault(self, column, value):
+        values = self._getExpression(_COLUMN_OPTION_STOPS, required=True)
+        if not values:
+            raise Exception("Expected default value")
+        column.default_value = sys.intern(_expressionText(_stripParentheses(values)))
+
+    def _columnPrimaryKey(self, column, value):
+        self._expect('KEY', "Expected keyword KEY")
+        column.primary_key = True
+        self.primaryKey = (column.name,)
+        clustered = self._skipClustered()
+        if clustered is not None:
+            column.clustered = clustered
+        self._skipIndexOptions()
+
+    def _columnUnique(self, column, value):
+        self._skipClustered()
+        self._skipIndexOptions()
+
+    def _columnCheck(self, column, value):
+        self._elementCheck(value, 'CHECK')
+
+    def _columnForeignKey(self, column, value):
+        self._expect('KEY', "Expected keyword KEY")
+        self._expect('REFERENCES', "Expected keyword REFERENCES")
+        self._columnReferences(column, value)
+
+    def _columnReferences(self, column, value):
+        column.foreign_key = self._getReferences(ForeignKey((column.name,)))
+
+    def _columnConstraint(self, column, value):
+        self._nextToken() # The name of the constraint, which isn't kept
+
+    def _columnNot(self, column, value):
+        self._skipForReplication()
+
+    def _columnSkipNext(self, column, value):
         self._nextToken()
-        return res
-
-    def _parseColumn(self, column):
-        self.logger.debug("Begin _parseColumn")
-        self.columns[column] = {}
-        token = self._nextToken()
-        self.logger.debug(token.value)
-        if self._isDataType(token.value):
-            self.columns[column] = self._processDataType() 
-
-            token = self._currentToken()
-            while token.value not in { ',', ')' }:
-                if token.value.upper() == 'IDENTITY':
-                    self.columns[column]['identity'] = self._getIdentityInfo()
-                #elif token.value.upper() == 'NOT':
-                #    token = self._nextToken()
-                #    if token.value.upper() == 'NULL':
-                #        self.columns[column]['nullable'] = False
-                elif token.value.upper() == 'NOT NULL':
-                    self.columns[column]['nullable'] = False
-                elif token.value.upper() == 'NULL':
-                    self.columns[column]['nullable'] = True
-                elif token.value.upper() == 'DEFAULT':
-                    token = self._nextToken()
-                    self.columns[column]['default_value'] = token.value
-                elif token.value.upper() == 'PRIMARY':
-                    self.columns[column] |= self._getPrimaryKeyColumn()
-                elif token.value.upper() == 'FOREIGN':
-                    self.columns[column]['foreign_key'] = self._getForiegnKeyColumn()
-
-                token = self._nextToken()
-            self._rewindToken() # If we hit a ',' or ')', go back one token
-            self.logger.debug("End _parseColumn")
-            return # Go to the next column or we reached the end of the table
-        elif token.value.upper() == 'AS':
-            pass
+
+    def _columnSkip(self, column, value):
         pass
 
+    def _columnUnknown(self, column, value):
+        """ Options the metadata doesn't cover are skipped, along with anything in parentheses after them """
+        logger.debug("Skipping column option %s", value)
+        if self._peekKind() == '(':
+            self._getGroup()
+
+    def _parseColumn(self, name):
+        logger.debug("Begin _parseColumn")
+        column = Column(name)
+        self.columns[column.name] = column
+        value, kind = self._nextToken()
+        if kind == 'AS':
+            values = self._getExpression(_COLUMN_OPTION_STOPS, required=True)
+            if not values:
+                raise Exception("Expected computed column expression")
+            column.computed = sys.intern(_expressionText(_stripParentheses(values)))
+        elif kind in _RESERVED:
+            raise Exception(f"Expected data type for {name}")
+        else:
+            self._processDataType(column, value)
+        while self._peekKind() not in _ELEMENT_END:
+            value, kind = self._nextToken()
+            _COLUMN_OPTIONS.get(kind, SQLCreateTable._columnUnknown)(self, column, value)
+        logger.debug("End _parseColumn")
+
+    # Table elements: columns and table constraints
+
+    def _elementColumn(self, value, kind):
+        if kind in _RESERVED:
+            raise Exception(f"Unexpected {value}")
+        if kind == IDENTIFIER and value.upper() == 'PERIOD' and self._peekKind() == 'FOR':
+            self._getExpression() # PERIOD FOR SYSTEM_TIME (start, end)
+            return
+        self._parseColumn(sys.intern(value))
+
+    def _elementConstraint(self, value, kind):
+        self._nextToken() # The name of the constraint, which isn't kept
+        value, kind = self._nextToken()
+        if kind not in _CONSTRAINTS:
+            raise Exception(f"Expected constraint after CONSTRAINT, got {value}")
+        _TABLE_ELEMENTS[kind](self, value, kind)
+
+    def _findColumn(self, name):
+        """ Returns the column called name, which SQL Server matches ignoring case and quoting """
+        column = self.columns.get(name)
+        if column is None:
+            key = normalizeName(name)
+            column = next((column for columnName, column in self.columns.items() if normalizeName(columnName) == key), None)
+            if column is None:
+                raise Exception(f"The column {name} doesn't exist")
+        return column
+
+    def _getPrimaryKeyTable(self, value=None, kind=None):
+        """ Parses the PRIMARY KEY attributes """
+        self._expect('KEY', "Expected keyword KEY")
+        clustered = self._skipClustered()
+        if self._peekKind() != '(':
+            raise Exception("Expected (")
+        columns = [self._findColumn(name) for name in self._getNameList()]
+        self._skipIndexOptions()
+        self.primaryKey = tuple(column.name for column in columns)
+        for column in columns:
+            column.primary_key = True
+            column.clustered = clustered
+
+    def _getForeignKeyTable(self, value=None, kind=None):
+        """ Parses the FOREIGN KEY attributes of a table constraint """
+        self._expect('KEY', "Expected keyword KEY")
+        if self._peekKind() != '(':
+            raise Exception("Expected (")
+        columns = self._getNameList()
+        self._expect('REFERENCES', "Expected keyword REFERENCES")
+        foreignKey = self._getReferences(ForeignKey(columns))
+        if len(foreignKey.columns) == 1:
+            self._findColumn(foreignKey.columns[0]).foreign_key = foreignKey
+        else:
+            self.multiForeignKeys.append(foreignKey)
+
+    def _elementUnique(self, value, kind):
+        self._skipClustered()
+        self._getNameList()
+        self._skipIndexOptions()
+
+    def _elementCheck(self, value, kind):
+        if self._peekKind() == 'NOT':
+            self._nextToken()
+            self._skipForReplication()
+        self._getGroup()
+
+    def _elementSkip(self, value, kind):
+        """ Indexes and anything else that isn't metadata are skipped """
+        logger.debug("Skipping table element %s", value)
+        self._getExpression()
+
     def _parseColumns(self):
-        self.logger.debug("Begin _parseColumns")
+        logger.debug("Begin _parseColumns")
         while True:
-            token = self._nextToken() # Should be either identitiy token, ',', or ')'
-            #print(f'Next token for column: {token}')
-            #print(self.columns)
-            #self.logger.debug("Look for Identifier: ", token, type(token), type(token) == sqlparse.sql.Identifier)
-            if self._isIdentifier(token.value.upper()):
-                self._parseColumn(token.value)
-            elif token.value.upper() == 'PRIMARY':
-                self._getPrimaryKeyTable()
-            elif token.value.upper() == 'FOREIGN':
-                obj = self._getForiegnKey(tableMode=True)
-                if len(obj['columns']) == 1:
-                    obj['ref_column'] = obj['ref_column'][0]
-                    column = obj['columns'][0]
-                    del obj['columns']
-                    self.columns[column]['foreign_key'] = obj
-                else:
-                    self.multiForeignKeys.append(obj)
-            elif token.value == ',':
-                continue
-            elif token.value == ')':
+            value, kind = self._nextToken() # Either a column, a table constraint, ',' or ')'
+            if kind == ')':
                 break
-        self.logger.debug("End _parseColumns")
+            if kind != ',':
+                _TABLE_ELEMENTS.get(kind, SQLCreateTable._elementColumn)(self, value, kind)
+        logger.debug("End _parseColumns")
 
     def _getMetaData(self):
-        tableName = self._currentToken()
-        if self._isIdentifier(tableName.value.upper()):
-            self.tableName = tableName.value
-        else:
+        value, kind = self._nextToken()
+        if kind in _RESERVED:
             raise Exception("Table name expected")
-        token = self._nextToken() # Should be either ',' or AS
-        if token.value.upper() == 'AS':
-            pass
-        if token.value == '(':
-            self._parseColumns()
-        else:
-            raise Exception("Expected (")
\ No newline at end of file
+        self.tableName = self._getName(value, kind)
+        logger.info("Parsing CREATE TABLE %s", self.tableName)
+        self._expect('(', "Expected (")
+        self._parseColumns()
+
+# The kinds that can't be a name, which is every keyword but the unreserved ones
+_RESERVED = frozenset(_KINDS.values()) - frozenset(['ACTION', 'CASCADE', 'FILESTREAM', 'NO', 'PERSISTED', 'REPLICATION', 'ROWGUIDCOL', 'SPARSE'])
+
+_COLUMN_OPTIONS = {
+    'IDENTITY': SQLCreateTable._columnIdentity,
+    'NOT NULL': SQLCreateTable._columnNotNull,
+    'NULL': SQLCreateTable._columnNull,
+    'DEFAULT': SQLCreateTable._columnDefault,
+    'PRIMARY': SQLCreateTable._columnPrimaryKey,
+    'UNIQUE': SQLCreateTable._columnUnique,
+    'CHECK': SQLCreateTable._columnCheck,
+    'FOREIGN': SQLCreateTable._columnForeignKey,
+    'REFERENCES': SQLCreateTable._columnReferences,
+    'CONSTRAINT': SQLCreateTable._columnConstraint,
+    'NOT': SQLCreateTable._columnNot,
+    'COLLATE': SQLCreateTable._columnSkipNext,
+    'PERSISTED': SQLCreateTable._columnSkip,
+    'SPARSE': SQLCreateTable._columnSkip,
+    'ROWGUIDCOL': SQLCreateTable._columnSkip,
+    'FILESTREAM': SQLCreateTable._columnSkip
+}
+# An expression in a column ends where its next option begins
+_COLUMN_OPTION_STOPS = _ELEMENT_END | frozenset(kind for kind in _COLUMN_OPTIONS if kind != 'NOT')
+
+_TABLE_ELEMENTS = {
+    'CONSTRAINT': SQLCreateTable._elementConstraint,
+    'PRIMARY': SQLCreateTable._getPrimaryKeyTable,
+    'FOREIGN': SQLCreateTable._getForeignKeyTable,
+    'UNIQUE': SQLCreateTable._elementUnique,
+    'CHECK': SQLCreateTable._elementCheck,
+    'INDEX': SQLCreateTable._elementSkip
+}
+_CONSTRAINTS = frozenset(['PRIMARY', 'FOREIGN', 'UNIQUE', 'CHECK'])
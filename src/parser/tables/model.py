@@ -0,0 +1,92 @@
+import sys
+
+def _intern(value):
+    return None if value is None else sys.intern(value)
+
+class Column():
+    """ The definition of a single column """
+    __slots__ = ('name', 'data_type', 'size', 'precision', 'scale', 'identity',
+        'nullable', 'default_value', 'computed', 'primary_key', 'clustered', 'foreign_key')
+
+    def __init__(self, name, data_type=None):
+        self.name = _intern(name)
+        self.data_type = _intern(data_type)
+        self.size = None
+        self.precision = None
+        self.scale = None
+        self.identity = None
+        self.nullable = None
+        self.default_value = None
+        self.computed = None # The expression of a computed column, which has no data type
+        self.primary_key = None
+        self.clustered = None
+        self.foreign_key = None
+
+    def __repr__(self):
+        return repr(self.toDict())
+
+    def toDict(self):
+        """ Returns the attributes that are set, without the name """
+        res = {}
+        for attribute in Column.__slots__[1:]:
+            value = getattr(self, attribute)
+            if value is not None:
+                res[attribute] = value.toDict() if attribute == 'foreign_key' else value
+        return res
+
+class ForeignKey():
+    """ A FOREIGN KEY constraint, either on a single column or across several """
+    __slots__ = ('columns', 'ref_table', 'ref_columns', 'on_delete', 'on_update')
+
+    def __init__(self, columns=(), ref_table=None, ref_columns=()):
+        self.columns = tuple(_intern(column) for column in columns)
+        self.ref_table = _intern(ref_table)
+        self.ref_columns = tuple(_intern(column) for column in ref_columns)
+        self.on_delete = None
+        self.on_update = None
+
+    def __repr__(self):
+        return repr(self.toDict())
+
+    def toDict(self):
+        res = {
+            'columns': list(self.columns),
+            'ref_table': self.ref_table,
+            'ref_columns': list(self.ref_columns)
+        }
+        if self.on_delete is not None:
+            res['on_delete'] = self.on_delete
+        if self.on_update is not None:
+            res['on_update'] = self.on_update
+        return res
+
+class Table():
+    """ The metadata of a table: its columns by name, the foreign keys spanning
+    several columns and, when known, the primary key columns in key order """
+    __slots__ = ('tableName', 'columns', 'multiForeignKeys', 'primaryKey')
+
+    def __init__(self, tableName=''):
+        self.tableName = _intern(tableName)
+        self.columns = {}
+        self.multiForeignKeys = []
+        self.primaryKey = None
+
+    def __repr__(self):
+        return str((f"CREATE TABLE {self.tableName}", self.getColumns()))
+
+    def primaryKeyColumns(self):
+        """ The names of the primary key columns in key order, falling back to column order """
+        if self.primaryKey is not None:
+            return list(self.primaryKey)
+        return [name for name, column in self.columns.items() if column.primary_key]
+
+    def getColumns(self):
+        return str({name: column.toDict() for name, column in self.columns.items()})
+
+    def toDict(self):
+        return {
+            'table': self.tableName,
+            'columns': {name: column.toDict() for name, column in self.columns.items()},
+            'foreign_keys': [foreignKey.toDict() for foreignKey in self.multiForeignKeys],
+            'primary_key': self.primaryKeyColumns()
+        }
@@ -0,0 +1,27 @@
+class TokenStream():
+    """ A cursor over a token iterator for the parsers.
+
+    The parser looks at most one token ahead, so only that token is kept;
+    the statement is never materialized as a whole list.
+    """
+    __slots__ = ('iterator', 'peeked', 'index')
+
+    def __init__(self, tokens):
+        self.iterator = iter(tokens)
+        self.peeked = None # A token read ahead by peek
+        self.index = -1 # The position of the current token in the statement
+
+    def next(self):
+        """ Moves to and returns the next token """
+        token = self.peek()
+        if token is None:
+            raise Exception("Unexpected end of statement")
+        self.peeked = None
+        self.index += 1
+        return token
+
+    def peek(self):
+        """ Returns the next token without moving to it, or None at the end """
+        if self.peeked is None:
+            self.peeked = next(self.iterator, None)
+        return self.peeked
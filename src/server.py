@@ -0,0 +1,151 @@
+import collections
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from compare.diff import indexSchema, iterDiff
+from compare.output import WRITERS
+from compare.renames import RenameDetection
+from parser.catalog import isConnectionString
+from parser.directory import hashFile, iterSqlFiles
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+
+class SchemaCache():
+    """ Keeps loaded schemas in memory, least recently used first out.
+
+    Schemas are keyed by path and a hash of their contents, so an edited
+    file is loaded again while an unchanged one is served from memory. Files
+    whose mtime and size didn't change aren't hashed again either. The size
+    of the inputs is what counts towards maxBytes, as a stand-in for the
+    memory their tables take. Connection strings are never cached.
+    """
+    def __init__(self, load, maxBytes=512 * 1024 * 1024):
+        self.load = load
+        self.maxBytes = maxBytes
+        self.entries = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.hashes = {}
+
+    def _hashFile(self, path):
+        info = os.stat(path)
+        known = self.hashes.get(path)
+        if known is not None and known[:2] == (info.st_mtime_ns, info.st_size):
+            return known[2], info.st_size
+        digest = hashFile(path)
+        self.hashes[path] = (info.st_mtime_ns, info.st_size, digest)
+        return digest, info.st_size
+
+    def key(self, path):
+        """ Returns (hash, size) of the file or of every .sql file under the directory at path """
+        if os.path.isfile(path):
+            return self._hashFile(path)
+        digest = hashlib.blake2b(digest_size=16)
+        size = 0
+        for filename in iterSqlFiles(path):
+            fileDigest, fileSize = self._hashFile(filename)
+            digest.update(os.path.relpath(filename, path).encode('utf-8') + b'\0' + fileDigest)
+            size += fileSize
+        return digest.digest(), size
+
+    def get(self, source):
+        """ Returns the schema at source indexed by indexSchema """
+        if isConnectionString(source):
+            return indexSchema(self.load(source))
+        path = os.path.abspath(source)
+        if not os.path.exists(path):
+            raise Exception(f"{source} not found")
+        digest, size = self.key(path)
+        entry = self.entries.get(path)
+        if entry is not None and entry[0] == digest:
+            self.hits += 1
+            self.entries.move_to_end(path)
+            return entry[2]
+        self.misses += 1
+        index = indexSchema(self.load(path))
+        self.put(path, digest, size, index)
+        return index
+
+    def put(self, path, digest, size, index):
+        entry = self.entries.pop(path, None)
+        if entry is not None:
+            self.size -= entry[1]
+        self.entries[path] = (digest, size, index)
+        self.size += size
+        while self.size > self.maxBytes and len(self.entries) > 1:
+            evicted, (digest, size, index) = self.entries.popitem(last=False)
+            logger.debug("Evicted %s", evicted)
+            self.size -= size
+
+    def toDict(self):
+        return {'schemas': len(self.entries), 'bytes': self.size, 'max_bytes': self.maxBytes,
+            'hits': self.hits, 'misses': self.misses}
+
+def compareRequest(cache, request):
+    """ Answers a compare request, a dict with source, updated and optionally
+    format, renames and rename_threshold, with the text of the results """
+    start = time.perf_counter()
+    source = cache.get(request['source'])
+    updated = cache.get(request['updated'])
+    renames = None
+    if request.get('renames'):
+        renames = RenameDetection()
+        if request.get('rename_threshold') is not None:
+            renames.columnThreshold = renames.tableThreshold = float(request['rename_threshold'])
+    stream = io.StringIO()
+    with WRITERS[request.get('format', 'text')](stream) as writer:
+        for change in iterDiff(source, updated, renames):
+            writer.write('change', change)
+    logger.info("Compared %s to %s in %.1f ms", request['source'], request['updated'], (time.perf_counter() - start) * 1000)
+    return stream.getvalue()
+
+class _Handler(BaseHTTPRequestHandler):
+    def _reply(self, status, body, contentType='text/plain; charset=utf-8'):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', contentType)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/status':
+            self._reply(200, json.dumps(self.server.cache.toDict()), 'application/json')
+        else:
+            self._reply(404, "Not found\n")
+
+    def do_POST(self):
+        if self.path != '/compare':
+            self._reply(404, "Not found\n")
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            if request.get('format', 'text') not in WRITERS:
+                raise Exception(f"Unknown format {request['format']}")
+            body = compareRequest(self.server.cache, request)
+        except Exception as e:
+            logger.debug("Request failed", exc_info=True)
+            self._reply(400, f"{e}\n")
+            return
+        self._reply(200, body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+class CompareServer(HTTPServer):
+    """ Answers compare requests over HTTP from a warm SchemaCache.
+
+    Requests are handled one at a time, which keeps the cache and whatever
+    load uses (such as a ParseCache) on a single thread. It only listens on
+    the loopback interface unless told otherwise.
+    """
+    def __init__(self, load, port=DEFAULT_PORT, host='127.0.0.1', maxBytes=512 * 1024 * 1024):
+        super().__init__((host, port), _Handler)
+        self.cache = SchemaCache(load, maxBytes)
@@ -0,0 +1,68 @@
+import sqlite3
+
+# Just enough of the SQL Server catalog views for parser.catalog to run against SQLite
+CATALOG = """
+CREATE TABLE sys.schemas (schema_id INTEGER, name TEXT);
+CREATE TABLE sys.tables (object_id INTEGER, schema_id INTEGER, name TEXT);
+CREATE TABLE sys.types (user_type_id INTEGER, name TEXT);
+CREATE TABLE sys.columns (object_id INTEGER, column_id INTEGER, name TEXT, user_type_id INTEGER,
+    max_length INTEGER, precision INTEGER, scale INTEGER, is_nullable INTEGER, is_identity INTEGER);
+CREATE TABLE sys.identity_columns (object_id INTEGER, column_id INTEGER, seed_value INTEGER, increment_value INTEGER);
+CREATE TABLE sys.default_constraints (parent_object_id INTEGER, parent_column_id INTEGER, definition TEXT);
+CREATE TABLE sys.computed_columns (object_id INTEGER, column_id INTEGER, definition TEXT);
+CREATE TABLE sys.indexes (object_id INTEGER, index_id INTEGER, is_primary_key INTEGER, type_desc TEXT);
+CREATE TABLE sys.index_columns (object_id INTEGER, index_id INTEGER, column_id INTEGER, key_ordinal INTEGER);
+CREATE TABLE sys.foreign_keys (object_id INTEGER, parent_object_id INTEGER,
+    delete_referential_action_desc TEXT, update_referential_action_desc TEXT);
+CREATE TABLE sys.foreign_key_columns (constraint_object_id INTEGER, constraint_column_id INTEGER,
+    parent_object_id INTEGER, parent_column_id INTEGER, referenced_object_id INTEGER, referenced_column_id INTEGER);
+INSERT INTO sys.schemas VALUES (1, 'dbo'), (2, 'sales');
+INSERT INTO sys.types VALUES (56, 'int'), (127, 'bigint'), (106, 'decimal'), (167, 'varchar'), (231, 'nvarchar'), (62, 'float'), (42, 'datetime2');
+"""
+
+TYPE_IDS = {'int': 56, 'bigint': 127, 'decimal': 106, 'varchar': 167, 'nvarchar': 231, 'float': 62, 'datetime2': 42}
+
+class FakeCatalog():
+    """ Builds a SQLite database whose sys.* tables mimic the SQL Server catalog views.
+    With a path the catalog is kept on disk so several connections can share it. """
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self.connection = self.open()
+        self.connection.executescript(CATALOG)
+        self.connection.commit()
+        self.nextId = 1
+
+    def open(self):
+        connection = sqlite3.connect(':memory:', check_same_thread=False)
+        connection.execute("ATTACH DATABASE ? AS sys", (self.path,))
+        return connection
+
+    def addTable(self, name, columns, schemaId=1):
+        """ columns are (name, type, max_length, precision, scale, nullable, identity, default) """
+        objectId = self.nextId
+        self.nextId += 1
+        self.connection.execute("INSERT INTO sys.tables VALUES (?, ?, ?)", (objectId, schemaId, name))
+        for columnId, (columnName, dataType, maxLength, precision, scale, nullable, identity, default) in enumerate(columns, 1):
+            self.connection.execute("INSERT INTO sys.columns VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (objectId, columnId, columnName, TYPE_IDS[dataType], maxLength, precision, scale, nullable, identity is not None))
+            if identity is not None:
+                self.connection.execute("INSERT INTO sys.identity_columns VALUES (?, ?, ?, ?)", (objectId, columnId, *identity))
+            if default is not None:
+                self.connection.execute("INSERT INTO sys.default_constraints VALUES (?, ?, ?)", (objectId, columnId, default))
+        return objectId
+
+    def addComputed(self, objectId, columnId, definition):
+        self.connection.execute("INSERT INTO sys.computed_columns VALUES (?, ?, ?)", (objectId, columnId, definition))
+
+    def addPrimaryKey(self, objectId, columnIds, clustered=True):
+        self.connection.execute("INSERT INTO sys.indexes VALUES (?, 1, 1, ?)", (objectId, 'CLUSTERED' if clustered else 'NONCLUSTERED'))
+        for ordinal, columnId in enumerate(columnIds, 1):
+            self.connection.execute("INSERT INTO sys.index_columns VALUES (?, 1, ?, ?)", (objectId, columnId, ordinal))
+
+    def addForeignKey(self, objectId, columnIds, refObjectId, refColumnIds, onDelete='NO_ACTION', onUpdate='NO_ACTION'):
+        keyId = self.nextId
+        self.nextId += 1
+        self.connection.execute("INSERT INTO sys.foreign_keys VALUES (?, ?, ?, ?)", (keyId, objectId, onDelete, onUpdate))
+        for ordinal, (columnId, refColumnId) in enumerate(zip(columnIds, refColumnIds), 1):
+            self.connection.execute("INSERT INTO sys.foreign_key_columns VALUES (?, ?, ?, ?, ?, ?)",
+                (keyId, ordinal, objectId, columnId, refObjectId, refColumnId))
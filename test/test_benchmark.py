@@ -0,0 +1,31 @@
+import unittest
+from bench.benchmark import findRegressions
+from bench.generate import generateSchema
+from src.parser.parser import convertToMetaData
+
+class TestSyntheticSchema(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+
+    def test_parses(self):
+        sqlCode = generateSchema(tables=40, columns=8, identityShare=0.5, decimalShare=0.3, foreignKeyShare=0.2, commentShare=0.3)
+        for lexer in ('sqlparse', 'fast'):
+            meta = convertToMetaData(sqlCode, lexer=lexer)
+            self.assertEqual([table.tableName for table, index in meta], [f't{i}' for i in range(40)])
+            self.assertTrue(all(len(table.columns) == 8 for table, index in meta))
+
+    def test_deterministic(self):
+        self.assertEqual(generateSchema(tables=5, seed=3), generateSchema(tables=5, seed=3))
+
+    def test_regressions(self):
+        baseline = {'throughput': {'a': 1000.0, 'b': 1000.0}}
+        results = {'throughput': {'a': 850.0, 'b': 700.0}}
+        self.assertEqual(len(findRegressions(results, baseline, threshold=0.2)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
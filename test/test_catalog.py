@@ -0,0 +1,97 @@
+import unittest
+from src.compare.diff import diffSchemas
+from src.parser.catalog import isConnectionString, loadCatalog
+from src.parser.parser import convertToMetaData
+from test.catalog import FakeCatalog
+
+SCRIPT = """
+CREATE TABLE customers (id INT NOT NULL IDENTITY(1,1), name NVARCHAR(50) NULL, PRIMARY KEY CLUSTERED (id));
+CREATE TABLE orders (id BIGINT NOT NULL, customer INT NOT NULL, total DECIMAL(10, 2) NOT NULL DEFAULT 0,
+    rate FLOAT NULL, note VARCHAR(20) NULL, PRIMARY KEY NONCLUSTERED (id),
+    FOREIGN KEY (customer) REFERENCES customers(id) ON DELETE CASCADE);
+"""
+
+class CountingConnection():
+    """ Counts the queries sent through a DB-API connection """
+    def __init__(self, connection):
+        self.connection = connection
+        self.queries = 0
+
+    def cursor(self):
+        self.queries += 1
+        return self.connection.cursor()
+
+class TestCatalog(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+        self.catalog = FakeCatalog()
+        customers = self.catalog.addTable('customers', [
+            ('id', 'int', 4, 10, 0, 0, (1, 1), None),
+            ('name', 'nvarchar', 100, 0, 0, 1, None, None)
+        ])
+        self.catalog.addPrimaryKey(customers, [1])
+        orders = self.catalog.addTable('orders', [
+            ('id', 'bigint', 8, 19, 0, 0, None, None),
+            ('customer', 'int', 4, 10, 0, 0, None, None),
+            ('total', 'decimal', 9, 10, 2, 0, None, '((0))'),
+            ('rate', 'float', 8, 53, 0, 1, None, None),
+            ('note', 'varchar', 20, 0, 0, 1, None, None)
+        ])
+        self.catalog.addPrimaryKey(orders, [1], clustered=False)
+        self.catalog.addForeignKey(orders, [2], customers, [1], onDelete='CASCADE')
+
+    def test_matches_parsed_script(self):
+        tables = loadCatalog(self.catalog.connection)
+        parsed = [meta for meta, index in convertToMetaData(SCRIPT)]
+        self.assertEqual([table.tableName for table in tables], ['customers', 'orders'])
+        self.assertEqual(diffSchemas(parsed, tables), [])
+
+    def test_fixed_query_count(self):
+        for i in range(50):
+            self.catalog.addTable(f'extra{i}', [('id', 'int', 4, 10, 0, 0, None, None)])
+        connection = CountingConnection(self.catalog.connection)
+        self.assertEqual(len(loadCatalog(connection)), 52)
+        self.assertEqual(connection.queries, 3)
+
+    def test_key_order(self):
+        table = self.catalog.addTable('pairs', [('a', 'int', 4, 10, 0, 0, None, None), ('b', 'int', 4, 10, 0, 0, None, None)])
+        self.catalog.addPrimaryKey(table, [2, 1])
+        pairs = loadCatalog(self.catalog.connection)[2]
+        self.assertEqual(pairs.primaryKeyColumns(), ['b', 'a'])
+        parsed = [meta for meta, index in convertToMetaData("CREATE TABLE pairs (a INT NOT NULL, b INT NOT NULL, PRIMARY KEY (b, a))")]
+        self.assertEqual(diffSchemas(parsed, [pairs]), [])
+
+    def test_keys_of_other_objects(self):
+        # Table types and table valued function results have primary keys in sys.indexes too
+        self.catalog.connection.execute("INSERT INTO sys.columns VALUES (1000, 1, 'id', 56, 4, 10, 0, 0, 0)")
+        self.catalog.addPrimaryKey(1000, [1])
+        self.assertEqual(len(loadCatalog(self.catalog.connection)), 2)
+
+    def test_references_primary_key(self):
+        parsed = [meta for meta, index in convertToMetaData(SCRIPT.replace("REFERENCES customers(id)", "REFERENCES customers"))]
+        self.assertEqual(diffSchemas(parsed, loadCatalog(self.catalog.connection)), [])
+
+    def test_compound_expressions(self):
+        table = self.catalog.addTable('t', [('a', 'int', 4, 10, 0, 1, None, '((1)+(2))'), ('b', 'int', 4, 10, 0, 1, None, None)])
+        self.catalog.addComputed(table, 2, '(([a]+(1))*([a]+(2)))')
+        t = loadCatalog(self.catalog.connection)[2]
+        self.assertEqual(t.columns['a'].default_value, '(1)+(2)')
+        self.assertEqual(t.columns['b'].computed, '([a]+(1))*([a]+(2))')
+        parsed = [meta for meta, index in convertToMetaData("CREATE TABLE t (a INT NULL DEFAULT 1+2, b AS (a+1)*(a+2))")]
+        self.assertEqual(diffSchemas(parsed, [t]), [])
+
+    def test_schema_qualified(self):
+        self.catalog.addTable('invoices', [('id', 'int', 4, 10, 0, 0, None, None)], schemaId=2)
+        self.assertIn('sales.invoices', [table.tableName for table in loadCatalog(self.catalog.connection)])
+
+    def test_connection_string(self):
+        self.assertTrue(isConnectionString('DRIVER={ODBC Driver 17 for SQL Server};SERVER=db;DATABASE=app'))
+        self.assertFalse(isConnectionString('schema/create.sql'))
+
+
+if __name__ == '__main__':
+    unittest.main()
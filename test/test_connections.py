@@ -0,0 +1,110 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from src.parser.connections import ConnectionPool, describeTarget, iterCatalogs, serverOf
+from test.catalog import FakeCatalog
+
+class TestConnectionPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+
+    def test_target_names(self):
+        target = 'DRIVER={ODBC Driver 17 for SQL Server};SERVER=Db1;DATABASE=tenant7;UID=app;PWD=secret'
+        self.assertEqual(serverOf(target), 'db1')
+        self.assertEqual(describeTarget(target), 'db1/tenant7')
+
+    def test_limit_per_server(self):
+        lock = threading.Lock()
+        counts = {'open': 0, 'peak': 0}
+        def work(connection):
+            with lock:
+                counts['open'] += 1
+                counts['peak'] = max(counts['peak'], counts['open'])
+            time.sleep(0.01)
+            with lock:
+                counts['open'] -= 1
+        with ConnectionPool(connect=lambda target: FakeCatalog().connection, maxPerServer=2, useDatabase=lambda connection, database: None) as pool:
+            threads = [threading.Thread(target=pool.run, args=(f'SERVER=a;DATABASE=d{i}', work)) for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(counts['peak'], 2)
+
+    def test_open_connections(self):
+        lock = threading.Lock()
+        counts = {'open': 0, 'peak': 0, 'connects': 0}
+        switched = []
+        class Connection():
+            def close(self):
+                with lock:
+                    counts['open'] -= 1
+        def connect(target):
+            with lock:
+                counts['open'] += 1
+                counts['connects'] += 1
+                counts['peak'] = max(counts['peak'], counts['open'])
+            return Connection()
+        with ConnectionPool(connect=connect, maxPerServer=2, useDatabase=lambda connection, database: switched.append(database)) as pool:
+            threads = [threading.Thread(target=pool.run, args=(f'SERVER=a;DATABASE=d{i}', lambda connection: time.sleep(0.01)))
+                for i in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            # A second login on the server takes the place of an idle connection
+            pool.run('SERVER=a;UID=other;DATABASE=d0', lambda connection: None)
+            self.assertEqual(counts['open'], 2)
+        # The databases after the first two are reached by switching
+        self.assertEqual(counts, {'open': 0, 'peak': 2, 'connects': 3})
+        self.assertEqual(len(switched), 18)
+
+    def test_retries(self):
+        attempts = []
+        def connect(target):
+            attempts.append(target)
+            if len(attempts) < 3:
+                raise Exception("Login timeout expired")
+            return FakeCatalog().connection
+        with ConnectionPool(connect=connect, retries=2, retryDelay=0) as pool:
+            self.assertEqual(pool.run('SERVER=a', lambda connection: 'done'), 'done')
+        self.assertEqual(len(attempts), 3)
+
+    def test_iter_catalogs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            catalogs = {}
+            for i in range(5):
+                catalog = FakeCatalog(os.path.join(directory, f'tenant{i}.db'))
+                for j in range(i):
+                    catalog.addTable(f't{j}', [('id', 'int', 4, 10, 0, 0, None, None)])
+                catalog.connection.commit()
+                catalogs[f'SERVER=a;DATABASE=tenant{i}'] = catalog
+            targets = list(catalogs) + ['SERVER=a;DATABASE=missing']
+            class Connection():
+                """ Stands in for a server connection, where each database is its own file """
+                def __init__(self, target):
+                    self.use(target)
+                def use(self, target):
+                    if target not in catalogs:
+                        raise Exception("Cannot open database")
+                    self.connection = catalogs[target].open()
+                def cursor(self):
+                    return self.connection.cursor()
+                def close(self):
+                    self.connection.close()
+            def useDatabase(connection, database):
+                connection.use(f'SERVER=a;DATABASE={database}')
+            with ConnectionPool(connect=Connection, maxPerServer=2, retries=0, useDatabase=useDatabase) as pool:
+                results = {target: (tables, error) for target, tables, error in iterCatalogs(targets, pool, workers=4)}
+        self.assertEqual({target: len(results[target][0]) for target in catalogs}, {target: i for i, target in enumerate(catalogs)})
+        self.assertIsNotNone(results['SERVER=a;DATABASE=missing'][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from src.compare.data import SqliteDialect, iterDataDiff
+from src.parser.parser import convertToMetaData
+
+SCHEMA = """
+CREATE TABLE orders (id INT NOT NULL, total INT, note VARCHAR(20), PRIMARY KEY (id));
+CREATE TABLE lines (orderId INT NOT NULL, line INT NOT NULL, qty INT, PRIMARY KEY (orderId, line));
+CREATE TABLE heap (a INT);
+"""
+
+class TestDataCompare(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+        self.directory = tempfile.TemporaryDirectory()
+        self.sourcePath = os.path.join(self.directory.name, 'source.db')
+        self.updatedPath = os.path.join(self.directory.name, 'updated.db')
+        self.tables = [meta for meta, index in convertToMetaData(SCHEMA)]
+        for path in (self.sourcePath, self.updatedPath):
+            with sqlite3.connect(path) as connection:
+                connection.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, total INTEGER, note TEXT)")
+                connection.execute("CREATE TABLE lines (orderId INTEGER, line INTEGER, qty INTEGER, PRIMARY KEY (orderId, line))")
+                connection.execute("CREATE TABLE heap (a INTEGER)")
+                connection.executemany("INSERT INTO orders VALUES (?, ?, ?)", [(index, index * 10, f"n{index}") for index in range(5000)])
+                connection.executemany("INSERT INTO lines VALUES (?, ?, ?)", [(index // 7, index % 7, index) for index in range(3000)])
+        with sqlite3.connect(self.updatedPath) as connection:
+            connection.execute("UPDATE orders SET note = 'changed' WHERE id IN (17, 4021)")
+            connection.execute("DELETE FROM orders WHERE id = 2500")
+            connection.execute("INSERT INTO orders VALUES (9000, 1, 'new')")
+            connection.execute("UPDATE lines SET qty = -1 WHERE orderId = 100 AND line = 3")
+        self.queries = 0
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def connect(self, path):
+        def connect():
+            connection = sqlite3.connect(path, check_same_thread=False)
+            connection.set_trace_callback(lambda statement: self.count())
+            return connection
+        return connect
+
+    def count(self):
+        self.queries += 1
+
+    def compare(self, **options):
+        results = iterDataDiff(self.tables, self.connect(self.sourcePath), self.connect(self.updatedPath), SqliteDialect(), **options)
+        res = {}
+        for table, changes, error in results:
+            if error is not None:
+                raise error
+            res[table.tableName] = sorted((change.action, change.name) for change in changes)
+        return res
+
+    def test_finds_row_changes(self):
+        res = self.compare(chunkRows=500, rowLimit=16, fanout=4, batchRanges=4)
+        self.assertEqual(res['orders'], [('added', '9000'), ('altered', '17'), ('altered', '4021'), ('dropped', '2500')])
+        self.assertEqual(res['lines'], [('altered', '100, 3')])
+        self.assertNotIn('heap', res) # No primary key to range over
+
+    def test_identical_tables_need_few_queries(self):
+        os.remove(self.updatedPath)
+        with sqlite3.connect(self.sourcePath) as source, sqlite3.connect(self.updatedPath) as updated:
+            source.backup(updated)
+        res = self.compare(chunkRows=100, batchRanges=100)
+        self.assertEqual(res, {'orders': [], 'lines': []})
+        # A boundary query and one checksum query per side for each table
+        self.assertEqual(self.queries, 2 * 3)
+
+    def test_key_order(self):
+        statements = []
+        self.tables = [meta for meta, index in convertToMetaData(
+            "CREATE TABLE lines (orderId INT NOT NULL, line INT NOT NULL, qty INT, PRIMARY KEY (line, orderId));")]
+        connect = self.connect(self.sourcePath)
+        def tracing():
+            connection = connect()
+            connection.set_trace_callback(statements.append)
+            return connection
+        list(iterDataDiff(self.tables, tracing, self.connect(self.updatedPath), SqliteDialect(), chunkRows=500))
+        self.assertIn('ORDER BY "line", "orderId"', statements[0])
+
+    def test_parameter_limit(self):
+        columns = ', '.join(f"k{index}" for index in range(6))
+        self.tables = [meta for meta, index in convertToMetaData(
+            f"CREATE TABLE wide ({', '.join(f'k{index} INT NOT NULL' for index in range(6))}, PRIMARY KEY ({columns}));")]
+        for path in (self.sourcePath, self.updatedPath):
+            with sqlite3.connect(path) as connection:
+                connection.execute(f"CREATE TABLE wide ({columns}, PRIMARY KEY ({columns}))")
+                connection.executemany("INSERT INTO wide VALUES (?, ?, ?, ?, ?, ?)", [(index, 0, 0, 0, 0, index) for index in range(200)])
+        parameters = []
+        class Connection():
+            def __init__(self, connection):
+                self.connection = connection
+            def execute(self, query, params=()):
+                parameters.append(len(params))
+                return self.connection.execute(query, params)
+            def __getattr__(self, name):
+                return getattr(self.connection, name)
+        source, updated = self.connect(self.sourcePath), self.connect(self.updatedPath)
+        results = list(iterDataDiff(self.tables, lambda: Connection(source()), lambda: Connection(updated()), SqliteDialect(),
+            chunkRows=2, batchRanges=32))
+        self.assertEqual(results[0][1], [])
+        self.assertLessEqual(max(parameters), 2100)
+        self.assertGreater(max(parameters), 1000) # Batches are still as large as the limit allows
+
+    def test_single_range(self):
+        res = self.compare(chunkRows=1000000, rowLimit=10000)
+        self.assertEqual(len(res['orders']), 4)
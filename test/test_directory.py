@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from src.parser.directory import DirectoryManifest, loadDirectory
+from src.parser.stats import ParseStats
+
+class TestDirectory(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.directory.name, 'schema')
+        os.makedirs(os.path.join(self.root, 'Tables'))
+        self.manifestPath = os.path.join(self.directory.name, 'manifest.db')
+        for index in range(4):
+            self.write(f"Tables/t{index}.sql", f"CREATE TABLE t{index} (id INT NOT NULL, v{index} VARCHAR(10))\nGO\n")
+        self.write('readme.txt', "Not SQL")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.root, name), 'w') as f:
+            f.write(text)
+
+    def load(self, jobs=1):
+        stats = ParseStats()
+        with DirectoryManifest(self.manifestPath) as manifest:
+            tables = loadDirectory(self.root, jobs, manifest=manifest, stats=stats)
+        return [table.tableName for table in tables], stats.counters
+
+    def test_loads_every_file(self):
+        names, counters = self.load()
+        self.assertEqual(names, ['t0', 't1', 't2', 't3'])
+        self.assertEqual(counters['files_parsed'], 4)
+
+    def test_only_changed_files_are_parsed(self):
+        self.load()
+        names, counters = self.load()
+        self.assertEqual(names, ['t0', 't1', 't2', 't3'])
+        self.assertEqual(counters['files_parsed'], 0)
+
+        self.write('Tables/t1.sql', "CREATE TABLE t1 (id INT NOT NULL, w BIGINT)\n")
+        self.write('Tables/t2.sql', "CREATE TABLE t2 (id INT NOT NULL, v2 VARCHAR(10))\nGO\n") # Same contents
+        os.remove(os.path.join(self.root, 'Tables', 't3.sql'))
+        self.write('t4.sql', "CREATE TABLE t4 (id INT)")
+        names, counters = self.load()
+        self.assertEqual(names, ['t4', 't0', 't1', 't2'])
+        self.assertEqual(counters['files_parsed'], 2)
+        with DirectoryManifest(self.manifestPath) as manifest:
+            self.assertEqual(len(manifest.entries(self.root)), 4)
+
+    def test_parallel(self):
+        names, counters = self.load(jobs=2)
+        self.assertEqual(names, ['t0', 't1', 't2', 't3'])
+
+    def test_error_names_file(self):
+        self.write('Tables/bad.sql', "CREATE TABLE bad (a DECIMAL(3")
+        with self.assertRaisesRegex(Exception, 'bad.sql'):
+            loadDirectory(self.root)
@@ -0,0 +1,47 @@
+import unittest
+from src.compare.graph import ForeignKeyGraph
+from src.parser.parser import convertToMetaData
+
+QUERY = """
+CREATE TABLE customers (id INT NOT NULL, PRIMARY KEY (id));
+CREATE TABLE [Orders] (id INT NOT NULL, customer INT, PRIMARY KEY (id), FOREIGN KEY (customer) REFERENCES customers(id));
+CREATE TABLE lines (id INT, orderId INT, batchId INT, FOREIGN KEY (orderId) REFERENCES orders(id), FOREIGN KEY (batchId) REFERENCES batches(id));
+CREATE TABLE batches (id INT, lastLine INT, FOREIGN KEY (lastLine) REFERENCES lines(id));
+CREATE TABLE notes (id INT, lineId INT, parent INT, FOREIGN KEY (lineId) REFERENCES lines(id), FOREIGN KEY (parent) REFERENCES notes(id));
+CREATE TABLE broken (id INT, a INT, b INT, FOREIGN KEY (a) REFERENCES missing(id), FOREIGN KEY (b) REFERENCES customers(code));
+"""
+
+class TestForeignKeyGraph(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+        self.graph = ForeignKeyGraph(meta for meta, index in convertToMetaData(QUERY))
+
+    def test_both_directions(self):
+        self.assertEqual(self.graph.dependents('CUSTOMERS'), ['[Orders]', 'broken'])
+        self.assertEqual(self.graph.dependencies('lines'), ['[Orders]', 'batches'])
+        self.assertEqual(self.graph.impacted('customers'), ['[Orders]', 'batches', 'broken', 'lines', 'notes'])
+        self.assertIn('orders', self.graph)
+
+    def test_order_and_cycles(self):
+        order, cyclic = self.graph.topologicalOrder()
+        self.assertEqual(order, ['customers', '[Orders]', 'broken'])
+        self.assertEqual(cyclic, ['lines', 'batches', 'notes'])
+        self.assertEqual(self.graph.cycles(), [['batches', 'lines']]) # notes only references itself and the cycle
+        order, cyclic = self.graph.topologicalOrder(['notes', 'orders', 'customers'])
+        self.assertEqual(order, ['notes', 'customers', '[Orders]']) # lines isn't part of the selection
+
+    def test_validate(self):
+        self.assertEqual(self.graph.validate(), [
+            "broken(a) references missing table missing",
+            "broken(b) references missing columns code of customers"
+        ])
+
+    def test_references_primary_key(self):
+        graph = ForeignKeyGraph(meta for meta, index in convertToMetaData(
+            "CREATE TABLE a (id INT NOT NULL, PRIMARY KEY (id)); CREATE TABLE h (id INT);\n"
+            "CREATE TABLE b (x INT REFERENCES a, y INT, FOREIGN KEY (y) REFERENCES h);"))
+        self.assertEqual(graph.validate(), ["b(y) references h, which has no primary key"])
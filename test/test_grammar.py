@@ -0,0 +1,135 @@
+import unittest
+from src.compare.diff import diffSchemas
+from src.compare.migrate import generateMigration
+from src.parser.catalog import loadCatalog
+from src.parser.parser import convertToMetaData
+from src.parser.tables import create
+from test.catalog import FakeCatalog
+
+QUERY = """CREATE TABLE [dbo].[orders] (
+    id INT IDENTITY(1,1) CONSTRAINT pk_orders PRIMARY KEY CLUSTERED,
+    price DECIMAL NOT NULL CONSTRAINT ck_price CHECK (price >= 0),
+    qty INT NOT NULL DEFAULT ((0)),
+    total AS price * qty PERSISTED,
+    note VARCHAR(MAX) NULL,
+    code NVARCHAR(10) COLLATE Latin1_General_CI_AS UNIQUE,
+    name NVARCHAR(20) DEFAULT N'x',
+    created DATETIME2(3) DEFAULT getdate(),
+    customer INT FOREIGN KEY REFERENCES customers(id) ON DELETE CASCADE,
+    other INT REFERENCES dbo.others (id) ON DELETE SET NULL NOT FOR REPLICATION,
+    CONSTRAINT uq_orders UNIQUE NONCLUSTERED (code, name DESC) WITH (FILLFACTOR = 90),
+    CHECK NOT FOR REPLICATION (qty > 0),
+    INDEX ix_qty NONCLUSTERED (qty),
+    CONSTRAINT fk_pair FOREIGN KEY (customer, other) REFERENCES pairs (a, b)
+) ON [PRIMARY];"""
+
+def parse(query, lexer):
+    return [meta for meta, index in convertToMetaData(query, lexer=lexer)]
+
+class TestGrammar(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+
+    def test_lexers_agree(self):
+        self.assertEqual(parse(QUERY, 'fast')[0].toDict(), parse(QUERY, 'sqlparse')[0].toDict())
+        query = "CREATE TABLE t (a INT DEFAULT (1 +2), b AS a*2, c AS (a+1)*(a-2)/ -3, d AS CASE WHEN a>=1 THEN N'y' END)"
+        computed = [column.default_value or column.computed for column in parse(query, 'sqlparse')[0].columns.values()]
+        self.assertEqual(computed, ['1+2', 'a*2', '(a+1)*(a-2)/-3', "CASE WHEN a>=1 THEN N'y' END"])
+        self.assertEqual(parse(query, 'fast')[0].toDict(), parse(query, 'sqlparse')[0].toDict())
+
+    def test_columns(self):
+        for lexer in ('sqlparse', 'fast'):
+            columns = parse(QUERY, lexer)[0].columns
+            self.assertEqual(columns['id'].toDict(), {'data_type': 'INT', 'identity': (1, 1), 'primary_key': True, 'clustered': True})
+            self.assertEqual((columns['price'].precision, columns['price'].scale), (18, 0))
+            self.assertEqual(columns['qty'].default_value, '0')
+            self.assertEqual(columns['total'].toDict(), {'computed': 'price*qty'})
+            self.assertEqual(columns['note'].size, 'MAX')
+            self.assertEqual(columns['name'].default_value, "N'x'")
+            self.assertEqual((columns['created'].scale, columns['created'].default_value), (3, 'getdate()'))
+
+    def test_foreign_keys(self):
+        for lexer in ('sqlparse', 'fast'):
+            table = parse(QUERY, lexer)[0]
+            self.assertEqual(table.columns['customer'].foreign_key.toDict(),
+                {'columns': ['customer'], 'ref_table': 'customers', 'ref_columns': ['id'], 'on_delete': 'CASCADE'})
+            self.assertEqual(table.columns['other'].foreign_key.ref_table, 'dbo.others')
+            self.assertEqual(table.columns['other'].foreign_key.on_delete, 'SET NULL')
+            self.assertEqual([foreignKey.columns for foreignKey in table.multiForeignKeys], [('customer', 'other')])
+            # A single column table constraint belongs to its column
+            single = parse("CREATE TABLE t (a INT, FOREIGN KEY (a) REFERENCES u(id))", lexer)[0]
+            self.assertEqual(single.columns['a'].foreign_key.ref_table, 'u')
+            self.assertEqual(single.multiForeignKeys, [])
+
+    def test_errors(self):
+        for query in ("CREATE TABLE t (a INT, PRIMARY KEY (b))", "CREATE TABLE t (a INT, FOREIGN KEY (b) REFERENCES u(id))",
+                "CREATE TABLE t (a)", "CREATE TABLE t (a INT CONSTRAINT c DEFAULT)", "CREATE TABLE t (a INT,"):
+            for lexer in ('sqlparse', 'fast'):
+                with self.assertRaises(Exception, msg=query):
+                    parse(query, lexer)
+
+    def test_classified_once(self):
+        create._classified.clear()
+        parse("CREATE TABLE t (a INT NOT NULL, b INT NOT NULL)", 'fast')
+        self.assertEqual(create._classified['NOT NULL'], 'NOT NULL')
+        self.assertIs(create._classified['a'], create.IDENTIFIER)
+        self.assertEqual(len(create._classified), len({'t', '(', 'a', 'INT', 'NOT NULL', ',', 'b', ')'}))
+
+    def test_computed_migration(self):
+        source = parse("CREATE TABLE t (a INT, b INT, c AS a + b)", 'fast')
+        updated = parse("CREATE TABLE t (a INT, b INT, c AS (a * b))", 'fast')
+        steps = generateMigration(diffSchemas(source, updated))
+        self.assertEqual([step.sql for step in steps], ["ALTER TABLE t DROP COLUMN c;", "ALTER TABLE t ADD c AS (a*b);"])
+
+    def test_time_scale_migration(self):
+        source = parse("CREATE TABLE t (a DATETIME2, b TIME(3))", 'fast')
+        updated = parse("CREATE TABLE t (a DATETIME2(3), b TIME(3));\nCREATE TABLE n (x DATETIMEOFFSET(2))", 'fast')
+        sql = [step.sql for step in generateMigration(diffSchemas(source, updated))]
+        self.assertIn("CREATE TABLE n (\n    x DATETIMEOFFSET(2)\n);", sql)
+        self.assertIn("ALTER TABLE t ALTER COLUMN a DATETIME2(3);", sql)
+        self.assertEqual(len(sql), 2)
+
+    def test_bracketed_types(self):
+        # As SSMS scripts them
+        query = "CREATE TABLE [dbo].[t] ([id] [int] NOT NULL, [p] [decimal](10, 2) NULL, [n] [nvarchar](max) NULL)"
+        catalog = FakeCatalog()
+        catalog.addTable('t', [
+            ('id', 'int', 4, 10, 0, 0, None, None),
+            ('p', 'decimal', 9, 10, 2, 1, None, None),
+            ('n', 'nvarchar', -1, 0, 0, 1, None, None)
+        ])
+        for lexer in ('sqlparse', 'fast'):
+            columns = parse(query, lexer)[0].columns
+            self.assertEqual([column.data_type for column in columns.values()], ['INT', 'DECIMAL', 'NVARCHAR'])
+            self.assertEqual((columns['[p]'].precision, columns['[p]'].scale), (10, 2))
+            self.assertEqual(diffSchemas(parse(query, lexer), loadCatalog(catalog.connection)), [])
+
+    def test_key_column_names(self):
+        query = "CREATE TABLE t (a INT NOT NULL, [id] INT, c INT, PRIMARY KEY (A), FOREIGN KEY (ID) REFERENCES u(x), FOREIGN KEY (c) REFERENCES u(y))"
+        for lexer in ('sqlparse', 'fast'):
+            table = parse(query, lexer)[0]
+            self.assertEqual(table.primaryKeyColumns(), ['a'])
+            self.assertTrue(table.columns['a'].primary_key)
+            self.assertEqual(table.columns['[id]'].foreign_key.ref_columns, ('x',))
+            with self.assertRaises(Exception):
+                parse("CREATE TABLE t (a INT, PRIMARY KEY (b))", lexer)
+
+    def test_matches_catalog(self):
+        catalog = FakeCatalog()
+        table = catalog.addTable('t', [
+            ('a', 'int', 4, 10, 0, 1, None, None),
+            ('c', 'int', 4, 10, 0, 1, None, None),
+            ('d', 'datetime2', 7, 23, 3, 1, None, '(getdate())')
+        ])
+        catalog.addComputed(table, 2, '([a]*(2))')
+        query = "CREATE TABLE t (a INT NULL, c AS a*2, d DATETIME2(3) NULL DEFAULT GETDATE())"
+        for lexer in ('sqlparse', 'fast'):
+            self.assertEqual(diffSchemas(parse(query, lexer), loadCatalog(catalog.connection)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
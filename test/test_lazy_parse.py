@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from src.compare.diff import diffSchemas
+from src.parser.lazy import indexFile, loadLazyTables
+from src.parser.parser import ParseError, convertFileToMetaData
+
+SOURCE = """﻿-- The order tables
+CREATE TABLE orders (id INT NOT NULL, total DECIMAL(10, 2), PRIMARY KEY (id));
+/* lines */ create table [order lines] (id INT, orderId INT, FOREIGN KEY (orderId) REFERENCES orders(id));
+GO
+ALTER TABLE orders ADD note VARCHAR(10);
+-- Nothing but a comment;
+CREATE TABLE customers (id INT NOT NULL, name VARCHAR(50), PRIMARY KEY (id));
+"""
+
+UPDATED = """CREATE TABLE orders (id INT NOT NULL, total DECIMAL(10, 2), PRIMARY KEY (id));
+create table [order lines] (id INT, orderId INT, FOREIGN KEY (orderId) REFERENCES orders(id));
+CREATE TABLE customers (id INT NOT NULL, name VARCHAR(80), PRIMARY KEY (id));
+"""
+
+class TestLazyParse(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = self.write('source.sql', SOURCE)
+        self.updated = self.write('updated.sql', UPDATED)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_headers(self):
+        headers = indexFile(self.source)
+        self.assertEqual([(header.index, header.verb, header.objectType, header.name) for header in headers], [
+            (0, 'CREATE', 'TABLE', 'orders'),
+            (1, 'CREATE', 'TABLE', '[order lines]'),
+            (2, 'ALTER', 'TABLE', 'orders'),
+            (3, 'CREATE', 'TABLE', 'customers')
+        ])
+        with open(self.source, 'rb') as f:
+            data = f.read()
+        self.assertEqual(data[headers[3].start:headers[3].end], b'CREATE TABLE customers (id INT NOT NULL, name VARCHAR(50), PRIMARY KEY (id));')
+
+    def test_module_headers(self):
+        path = self.write('module.sql', "CREATE PROCEDURE p AS SET NOCOUNT ON; CREATE TABLE tmp (b INT);\nGO\nCREATE TABLE t (a INT);")
+        headers = indexFile(path)
+        self.assertEqual([(header.verb, header.objectType, header.name) for header in headers],
+            [('CREATE', 'PROCEDURE', 'p'), ('CREATE', 'TABLE', 't')])
+        self.assertEqual([table.tableName for table in loadLazyTables(path)], ['t'])
+
+    def test_parsed_on_access(self):
+        tables = loadLazyTables(self.source)
+        self.assertEqual([table.tableName for table in tables], ['orders', '[order lines]', 'customers'])
+        self.assertTrue(all(table.table is None for table in tables))
+        self.assertEqual(list(tables[0].columns), ['id', 'total'])
+        self.assertIsNotNone(tables[0].table)
+        self.assertIsNone(tables[1].table)
+        eager = [meta for meta, index in convertFileToMetaData(self.source)]
+        self.assertEqual([table.toDict() for table in tables], [table.toDict() for table in eager])
+
+    def test_only_changed_tables_parsed(self):
+        source = loadLazyTables(self.source)
+        updated = loadLazyTables(self.updated)
+        changes = diffSchemas(source, updated)
+        self.assertEqual([repr(change) for change in changes], ["ALTERED COLUMN customers.name"])
+        self.assertEqual([table.tableName for table in source + updated if table.table is not None], ['customers', 'customers'])
+
+    def test_errors_keep_statement_index(self):
+        path = self.write('broken.sql', "CREATE TABLE a (id INT);\nCREATE TABLE b (id INT DEFAULT);")
+        tables = loadLazyTables(path)
+        self.assertEqual(tables[0].columns['id'].data_type, 'INT')
+        with self.assertRaises(ParseError) as context:
+            tables[1].columns
+        self.assertEqual(context.exception.statementIndex, 1)
+
+    def test_changed_file(self):
+        tables = loadLazyTables(self.updated)
+        self.write('updated.sql', UPDATED.replace('orders', 'ordres'))
+        with self.assertRaises(Exception):
+            tables[0].columns
+
+if __name__ == "__main__":
+    unittest.main()
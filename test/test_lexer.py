@@ -0,0 +1,44 @@
+import unittest
+import sqlparse
+from src.parser.lexer import LexError, tokenizeStatements
+from src.parser.parser import convertToMetaData, expandTokens
+
+class TestFastLexer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+
+    def assertSameTokens(self, query):
+        expected = [[token.value for token in expandTokens(statement.tokens)] for statement in sqlparse.parse(query)]
+        actual = [[token.value for token in tokens] for tokens in tokenizeStatements(query)]
+        self.assertEqual(actual, [tokens for tokens in expected if tokens])
+
+    def test_matches_sqlparse(self):
+        self.assertSameTokens("CREATE TABLE test2 ( test2id INT, test2c BIGINT, test2b SMALLINT );")
+        self.assertSameTokens("CREATE TABLE [dbo].[t1] (id INT NOT NULL PRIMARY KEY CLUSTERED, b DECIMAL(3,4) DEFAULT 0);")
+        self.assertSameTokens("CREATE TABLE t (a BIGINT IDENTITY(1,2), -- comment\n c VARCHAR(20) NULL)")
+
+    def test_strings_and_names(self):
+        tokens = tokenizeStatements("CREATE TABLE [a;b] (c NVARCHAR(5) DEFAULT N'x''y', [d]]e] INT)")[0]
+        self.assertIn('[a;b]', [token.value for token in tokens])
+        self.assertIn("N'x''y'", [token.value for token in tokens])
+        self.assertIn('[d]]e]', [token.value for token in tokens])
+
+    def test_go_separates_statements(self):
+        statements = tokenizeStatements("CREATE TABLE a (x INT)\nGO\nCREATE TABLE b (y INT)")
+        self.assertEqual([tokens[2].value for tokens in statements], ['a', 'b'])
+
+    def test_unterminated(self):
+        with self.assertRaises(LexError):
+            tokenizeStatements("CREATE TABLE a (x VARCHAR(3) DEFAULT 'abc)")
+
+    def test_metadata_matches_sqlparse(self):
+        query = "CREATE TABLE t1 (a DECIMAL(3, 4), b BIGINT IDENTITY(1,2) NOT NULL, c FLOAT);"
+        self.assertEqual(repr(convertToMetaData(query, lexer='fast')), repr(convertToMetaData(query)))
+
+
+if __name__ == '__main__':
+    unittest.main()
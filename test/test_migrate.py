@@ -0,0 +1,104 @@
+import unittest
+from src.compare.diff import diffSchemas
+from src.compare.migrate import generateMigration, migrationScript
+from src.parser.parser import convertToMetaData
+
+SOURCE = """
+CREATE TABLE orders (id INT NOT NULL, total DECIMAL(10, 2), note VARCHAR(20) DEFAULT 'x', code VARCHAR(10),
+    label VARCHAR(50), customer INT, PRIMARY KEY (id));
+CREATE TABLE customers (id INT NOT NULL, PRIMARY KEY (id));
+CREATE TABLE legacyLines (id INT, legacyId INT, FOREIGN KEY (legacyId) REFERENCES legacy(id));
+CREATE TABLE legacy (id INT NOT NULL, PRIMARY KEY (id));
+"""
+
+UPDATED = """
+CREATE TABLE orders (id INT NOT NULL, total DECIMAL(12, 2), code VARCHAR(40), label VARCHAR(20), customer INT NOT NULL,
+    shipped BIT, flag BIT NOT NULL DEFAULT 0, PRIMARY KEY (id), FOREIGN KEY (customer) REFERENCES customers(id));
+CREATE TABLE customers (id INT NOT NULL, PRIMARY KEY (id));
+CREATE TABLE lines (id INT NOT NULL, orderId INT, batchId INT, PRIMARY KEY (id),
+    FOREIGN KEY (orderId) REFERENCES orders(id), FOREIGN KEY (batchId) REFERENCES batches(id));
+CREATE TABLE batches (id INT NOT NULL, lastLine INT, PRIMARY KEY (id), FOREIGN KEY (lastLine) REFERENCES lines(id));
+"""
+
+def tables(query):
+    return [meta for meta, index in convertToMetaData(query)]
+
+class TestMigrate(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+        self.steps = generateMigration(diffSchemas(tables(SOURCE), tables(UPDATED)))
+
+    def sqlFor(self, phase):
+        return [step.sql for step in self.steps if step.phase == phase]
+
+    def test_columns_grouped_per_table(self):
+        self.assertEqual(self.sqlFor('drop_column'), ["ALTER TABLE orders DROP COLUMN note;"])
+        self.assertEqual(self.sqlFor('add_column'), ["ALTER TABLE orders ADD shipped BIT, flag BIT NOT NULL DEFAULT 0;"])
+        # The default has to go before its column
+        self.assertIn('sys.default_constraints', self.sqlFor('drop_default')[0])
+
+    def test_costs(self):
+        costs = {step.sql: step.cost for step in self.steps if step.phase in ('alter_column', 'add_column')}
+        self.assertEqual(costs, {
+            "ALTER TABLE orders ALTER COLUMN total DECIMAL(12, 2);": 'rewrite',
+            "ALTER TABLE orders ALTER COLUMN code VARCHAR(40);": 'metadata',
+            "ALTER TABLE orders ALTER COLUMN label VARCHAR(20);": 'scan',
+            "ALTER TABLE orders ALTER COLUMN customer INT NOT NULL;": 'scan',
+            "ALTER TABLE orders ADD shipped BIT, flag BIT NOT NULL DEFAULT 0;": 'metadata'
+        })
+
+    def test_notes(self):
+        source = tables("CREATE TABLE t (id INT NOT NULL, code VARCHAR(10), PRIMARY KEY (id));\n"
+            "CREATE TABLE u (id INT NOT NULL, PRIMARY KEY NONCLUSTERED (id));")
+        updated = tables("CREATE TABLE t (id INT NOT NULL, code VARCHAR(20) NOT NULL);\nCREATE TABLE u (id INT NOT NULL);")
+        steps = {(step.phase, step.table): (step.cost, step.note) for step in generateMigration(diffSchemas(source, updated))}
+        self.assertEqual(steps[('alter_column', 't')], ('scan', "every row is checked for NULL"))
+        self.assertEqual(steps[('drop_primary_key', 't')], ('rewrite', "dropping a clustered key rebuilds the table as a heap"))
+        self.assertEqual(steps[('drop_primary_key', 'u')], ('metadata', None))
+
+    def test_spelling_ignored(self):
+        source = tables("CREATE TABLE t (n INTEGER NULL, d DATETIME NULL DEFAULT getdate())")
+        updated = tables("CREATE TABLE t (n INT NOT NULL, d DATETIME NOT NULL DEFAULT (GETDATE()))")
+        steps = [(step.phase, step.cost) for step in generateMigration(diffSchemas(source, updated))]
+        self.assertEqual(steps, [('alter_column', 'scan'), ('alter_column', 'scan')])
+
+    def test_keys_on_altered_column(self):
+        source = tables("CREATE TABLE a (id INT NOT NULL DEFAULT 0, PRIMARY KEY (id));\n"
+            "CREATE TABLE b (x INT, FOREIGN KEY (x) REFERENCES a(id));")
+        updated = tables("CREATE TABLE a (id BIGINT NOT NULL DEFAULT 0, PRIMARY KEY (id));\n"
+            "CREATE TABLE b (x BIGINT, FOREIGN KEY (x) REFERENCES a(id));")
+        steps = generateMigration(diffSchemas(source, updated), source, updated)
+        self.assertEqual([(step.phase, step.table) for step in steps], [('drop_foreign_key', 'b'), ('drop_primary_key', 'a'),
+            ('drop_default', 'a'), ('alter_column', 'a'), ('alter_column', 'b'), ('add_default', 'a'), ('add_primary_key', 'a'),
+            ('add_foreign_key', 'b')])
+        self.assertEqual({step.cost for step in steps if step.phase == 'alter_column'}, {'rewrite'})
+        self.assertEqual(steps[-1].sql, "ALTER TABLE b ADD FOREIGN KEY (x) REFERENCES a(id);")
+
+    def test_references_primary_key(self):
+        source = tables("CREATE TABLE a (id INT NOT NULL, PRIMARY KEY (id));")
+        updated = tables("CREATE TABLE a (id INT NOT NULL, PRIMARY KEY (id)); CREATE TABLE b (x INT REFERENCES a);")
+        self.assertEqual([step.sql for step in generateMigration(diffSchemas(source, updated), source, updated)],
+            ["CREATE TABLE b (\n    x INT REFERENCES a\n);"])
+
+    def test_dependency_order(self):
+        self.assertEqual(self.sqlFor('drop_table'), ["DROP TABLE legacyLines;", "DROP TABLE legacy;"])
+        created = [step.table for step in self.steps if step.phase == 'create_table']
+        self.assertEqual(len(created), 2)
+        # lines and batches reference each other, so one key waits until both exist
+        deferred = [sql for sql in self.sqlFor('add_foreign_key') if 'REFERENCES orders' not in sql and 'customers' not in sql]
+        self.assertEqual(len(deferred), 1)
+        phases = [step.phase for step in self.steps]
+        self.assertLess(phases.index('drop_table'), phases.index('create_table'))
+        self.assertEqual(phases[-1], 'add_foreign_key')
+
+    def test_script(self):
+        script = migrationScript(self.steps)
+        self.assertEqual(script.count("\nGO\n"), len(self.steps))
+        self.assertIn("-- REWRITE: the storage of the column changes", script)
+
+    def test_no_changes(self):
+        self.assertEqual(generateMigration(diffSchemas(tables(SOURCE), tables(SOURCE))), [])
@@ -0,0 +1,64 @@
+import io
+import json
+import unittest
+from src.compare.diff import iterDiff
+from src.compare.output import SCHEMA_VERSION, NdjsonWriter, TextWriter
+from src.parser.parser import convertToMetaData
+
+def tables(query):
+    return [meta for meta, index in convertToMetaData(query)]
+
+class TestOutput(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+        self.changes = list(iterDiff(tables("CREATE TABLE a (x INT);"), tables("CREATE TABLE a (x BIGINT); CREATE TABLE b (y INT);")))
+
+    def test_ndjson_records(self):
+        stream = io.StringIO()
+        with NdjsonWriter(stream) as writer:
+            for change in self.changes:
+                writer.write('change', change)
+            writer.write('target', target='server/db', variant='0123456789abcdef', changes=2)
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(records[0]['type'], 'header')
+        self.assertEqual(records[0]['schema'], SCHEMA_VERSION)
+        self.assertEqual(records[1], {'type': 'change', 'kind': 'column', 'action': 'altered', 'table': 'a', 'name': 'x',
+            'before': {'data_type': 'INT'}, 'after': {'data_type': 'BIGINT'}})
+        self.assertEqual(records[2]['after']['columns'], {'y': {'data_type': 'INT'}})
+        self.assertEqual(records[3], {'type': 'target', 'target': 'server/db', 'variant': '0123456789abcdef', 'changes': 2})
+
+    def test_buffered_until_full(self):
+        stream = io.StringIO()
+        writer = NdjsonWriter(stream, bufferBytes=1024 * 1024, flushSeconds=3600)
+        written = len(stream.getvalue())
+        writer.write('change', self.changes[0])
+        self.assertEqual(len(stream.getvalue()), written)
+        writer.close()
+        self.assertEqual(len(stream.getvalue().splitlines()), 2)
+
+    def test_flushed_per_group(self):
+        stream = io.StringIO()
+        writer = NdjsonWriter(stream, bufferBytes=1024 * 1024, flushSeconds=3600)
+        writer.write('change', self.changes[0])
+        writer.endGroup()
+        # Written out now, not when the next record eventually arrives
+        self.assertEqual(len(stream.getvalue().splitlines()), 2)
+        written = len(stream.getvalue())
+        writer.endGroup()
+        self.assertEqual(len(stream.getvalue()), written)
+
+    def test_text(self):
+        stream = io.StringIO()
+        with TextWriter(stream) as writer:
+            writer.write('target', target='server/db', variant='0123456789abcdef', changes=1)
+            writer.write('change', self.changes[0], variant='0123456789abcdef')
+            writer.write('notice', table='t', message="skipped, no primary key")
+            writer.write('table', tables("CREATE TABLE c (z INT)")[0])
+        self.assertEqual(stream.getvalue().splitlines(), [
+            "server/db: 1 changes (variant 01234567)", "  ALTERED COLUMN a.x", "t: skipped, no primary key",
+            "('CREATE TABLE c', \"{'z': {'data_type': 'INT'}}\")"
+        ])
@@ -0,0 +1,35 @@
+import unittest
+from src.parser import parser
+from src.parser.parser import ParseError, convertToMetaData
+
+class TestParallelParse(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+        cls.batchSize = parser.BATCH_SIZE
+        parser.BATCH_SIZE = 4 # Make sure several batches are in flight
+
+    @classmethod
+    def tearDownClass(cls):
+        parser.BATCH_SIZE = cls.batchSize
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+
+    def test_matches_serial(self):
+        query = "\nGO\n".join(f"CREATE TABLE t{i} (c{i} INT, d DECIMAL(3, {i % 3}))" for i in range(50))
+        serial = [(repr(meta), index) for meta, index in convertToMetaData(query)]
+        parallel = [(repr(meta), index) for meta, index in convertToMetaData(query, jobs=3)]
+        self.assertEqual(parallel, serial)
+
+    def test_error_index(self):
+        statements = [f"CREATE TABLE t{i} (c{i} INT);" for i in range(20)]
+        statements[13] = "CREATE TABLE t13 (c BIGINT IDENTITY(1));"
+        for jobs in (1, 3):
+            with self.assertRaises(ParseError) as context:
+                convertToMetaData("\n".join(statements), jobs=jobs)
+            self.assertEqual(context.exception.statementIndex, 13)
+
+
+if __name__ == '__main__':
+    unittest.main()
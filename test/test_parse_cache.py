@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from src.parser import cache as cacheModule
+from src.parser import parser
+from src.parser.cache import ParseCache
+from src.parser.parser import convertToMetaData
+
+QUERY = "CREATE TABLE a (x INT);\nCREATE TABLE b (y DECIMAL(3, 4));\nGO\nCREATE TABLE c (z BIGINT IDENTITY(1,2))"
+
+class TestParseCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_warm_run_skips_parsing(self):
+        with ParseCache(self.path) as cache:
+            cold = repr(convertToMetaData(QUERY, cache=cache))
+        parseStatementText = parser._parseStatementText
+        parser._parseStatementText = None # Any parse would now fail
+        try:
+            with ParseCache(self.path) as cache:
+                warm = repr(convertToMetaData(QUERY, cache=cache))
+        finally:
+            parser._parseStatementText = parseStatementText
+        self.assertEqual(warm, cold)
+
+    def test_parallel_uses_cache(self):
+        with ParseCache(self.path) as cache:
+            convertToMetaData("CREATE TABLE a (x INT);", cache=cache)
+            self.assertEqual(repr(convertToMetaData(QUERY, jobs=2, cache=cache)), repr(convertToMetaData(QUERY)))
+
+    def test_version_invalidates(self):
+        with ParseCache(self.path) as cache:
+            convertToMetaData(QUERY, cache=cache)
+            self.assertGreater(cache.size, 0)
+        version = cacheModule.PARSER_VERSION
+        cacheModule.PARSER_VERSION = version + 1
+        try:
+            with ParseCache(self.path) as cache:
+                self.assertEqual(cache.size, 0)
+                self.assertIsNone(cache.get("CREATE TABLE a (x INT);", 'sqlparse'))
+        finally:
+            cacheModule.PARSER_VERSION = version
+
+    def test_repeated_statement(self):
+        with ParseCache(self.path) as cache:
+            # Both copies miss when they're parsed in the same batch
+            for _ in range(2):
+                cache.put("CREATE TABLE a (x INT);", 'sqlparse', convertToMetaData("CREATE TABLE a (x INT);"))
+            stored = cache.connection.execute("SELECT SUM(size) FROM entries").fetchone()[0]
+            self.assertEqual(cache.size, stored)
+
+    def test_eviction(self):
+        with ParseCache(self.path, maxBytes=0) as cache:
+            convertToMetaData(QUERY, cache=cache)
+        with ParseCache(self.path) as cache:
+            self.assertEqual(cache.size, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
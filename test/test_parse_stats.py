@@ -0,0 +1,40 @@
+import unittest
+from src.parser.parser import convertToMetaData
+from src.parser.stats import ParseStats
+
+QUERY = "CREATE TABLE a (x INT);\nCREATE TABLE b (y DECIMAL(3, 4), z VARCHAR(5));\nGO\nCREATE TABLE c (w BIGINT IDENTITY(1,2))"
+
+class TestParseStats(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+
+    def test_phases(self):
+        stats = ParseStats()
+        convertToMetaData(QUERY, stats=stats)
+        report = stats.toDict()
+        self.assertEqual(set(report['phases']), {'read', 'tokenize', 'create'})
+        self.assertEqual(report['counters']['statements'], 3)
+        self.assertEqual(report['counters']['tokens'], 38)
+        self.assertEqual(sorted(entry['statement'] for entry in report['slowest']), [0, 1, 2])
+
+    def test_fast_lexer_parallel(self):
+        stats = ParseStats(slowest=1)
+        convertToMetaData(QUERY, jobs=2, lexer='fast', stats=stats)
+        report = stats.toDict()
+        self.assertEqual(set(report['phases']), {'read', 'tokenize', 'create'})
+        self.assertEqual(report['counters']['tokens'], 38)
+        self.assertEqual(len(report['slowest']), 1)
+
+    def test_callback(self):
+        seen = []
+        stats = ParseStats(onStatement=lambda index, seconds, tokens, text: seen.append((index, tokens)))
+        convertToMetaData(QUERY, stats=stats)
+        self.assertEqual([index for index, tokens in seen], [0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from src.compare.diff import diffSchemas
+from src.compare.migrate import generateMigration
+from src.compare.renames import RenameDetection, matchRenames
+from src.parser.parser import convertToMetaData
+
+SOURCE = """
+CREATE TABLE orders (id INT NOT NULL, customerName VARCHAR(80), total DECIMAL(10, 2), a1 INT, a2 INT, PRIMARY KEY (id));
+CREATE TABLE items (sku VARCHAR(20) NOT NULL, price MONEY, PRIMARY KEY (sku));
+CREATE TABLE notes (id INT NOT NULL, body VARCHAR(400), PRIMARY KEY (id));
+"""
+
+UPDATED = """
+CREATE TABLE orders (id INT NOT NULL, customer_name VARCHAR(80), total DECIMAL(10, 2), b1 INT, b2 INT, PRIMARY KEY (id));
+CREATE TABLE items (code VARCHAR(20) NOT NULL, price MONEY, PRIMARY KEY (code));
+CREATE TABLE remarks (id INT NOT NULL, body VARCHAR(400), PRIMARY KEY (id));
+"""
+
+def tables(query, schema=None):
+    res = [meta for meta, index in convertToMetaData(query)]
+    if schema is not None:
+        # As loaded from a database catalog
+        for table in res:
+            table.tableName = f"{schema}.{table.tableName}"
+    return res
+
+def describe(changes):
+    return sorted((change.kind, change.action, change.table, change.name) for change in changes)
+
+class TestRenames(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+        self.changes = diffSchemas(tables(SOURCE), tables(UPDATED), RenameDetection())
+
+    def test_off_by_default(self):
+        changes = diffSchemas(tables(SOURCE), tables(UPDATED))
+        self.assertFalse([change for change in changes if change.action == 'renamed'])
+        self.assertIn(('table', 'dropped', 'notes', None), describe(changes))
+
+    def test_column_rename(self):
+        renamed = [change for change in self.changes if change.kind == 'column' and change.action == 'renamed']
+        byName = {change.before['name']: change for change in renamed}
+        self.assertEqual(byName['customerName'].after['name'], 'customer_name')
+        self.assertGreater(byName['customerName'].confidence, 0.9)
+        self.assertEqual(repr(byName['customerName']), "RENAMED COLUMN orders.customerName TO customer_name (99%)")
+        self.assertEqual(byName['customerName'].toDict()['confidence'], byName['customerName'].confidence)
+
+    def test_ambiguous_bucket(self):
+        # a1/a2 and b1/b2 share a definition, so only the positions tell them apart
+        self.assertIn(('column', 'dropped', 'orders', 'a1'), describe(self.changes))
+        self.assertIn(('column', 'added', 'orders', 'b1'), describe(self.changes))
+        loose = diffSchemas(tables(SOURCE), tables(UPDATED), RenameDetection(columnThreshold=0.4))
+        renamed = {change.before['name']: change.after['name'] for change in loose if change.action == 'renamed' and change.kind == 'column'}
+        self.assertEqual(renamed.get('a1'), 'b1')
+        self.assertEqual(renamed.get('a2'), 'b2')
+
+    def test_renamed_key_column(self):
+        self.assertFalse([change for change in self.changes if change.kind == 'primary_key'])
+
+    def test_table_rename(self):
+        renamed = [change for change in self.changes if change.kind == 'table']
+        self.assertEqual(len(renamed), 1)
+        self.assertEqual(renamed[0].action, 'renamed')
+        self.assertEqual((renamed[0].before['name'], renamed[0].after['name']), ('notes', 'remarks'))
+
+    def test_table_move(self):
+        source = tables("CREATE TABLE notes (id INT NOT NULL, PRIMARY KEY (id));", 'dbo')
+        updated = tables("CREATE TABLE notes (id INT NOT NULL, PRIMARY KEY (id));", 'sales')
+        changes = diffSchemas(source, updated, RenameDetection())
+        self.assertEqual([(change.action, change.before['name'], change.after['name']) for change in changes],
+            [('renamed', 'dbo.notes', 'sales.notes')])
+        self.assertEqual([step.sql for step in generateMigration(changes)], ["ALTER SCHEMA sales TRANSFER dbo.notes;"])
+
+    def test_bucket_limit(self):
+        dropped = [(f"c{index}", 0, 'int') for index in range(10)]
+        added = [(f"d{index}", 0, 'int') for index in range(10)]
+        self.assertEqual(len(matchRenames(dropped, added, 0.1)), 10)
+        self.assertEqual(matchRenames(dropped, added, 0.1, maxBucketPairs=50), [])
+
+    def test_migration(self):
+        sql = [step.sql for step in generateMigration(self.changes) if step.phase == 'rename']
+        self.assertIn("EXEC sp_rename 'orders.customerName', 'customer_name', 'COLUMN';", sql)
+        self.assertIn("EXEC sp_rename 'items.sku', 'code', 'COLUMN';", sql)
+        self.assertIn("EXEC sp_rename 'notes', 'remarks';", sql)
+        self.assertFalse([step for step in generateMigration(self.changes) if step.table != 'orders' and step.phase != 'rename'])
+
+if __name__ == "__main__":
+    unittest.main()
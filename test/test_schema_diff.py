@@ -0,0 +1,54 @@
+import unittest
+from src.compare.diff import diffSchemas, normalizeName
+from src.parser.parser import convertToMetaData
+
+SOURCE = """
+CREATE TABLE [Orders] (id INT NOT NULL, total DECIMAL(10, 2), note VARCHAR(20), customer INT, PRIMARY KEY (id));
+CREATE TABLE customers (id INT, name VARCHAR(50));
+CREATE TABLE legacy (id INT);
+"""
+
+UPDATED = """
+CREATE TABLE orders (ID INT NOT NULL, total DECIMAL(12, 2), customer INT, shipped BIT,
+    PRIMARY KEY (ID), FOREIGN KEY (customer) REFERENCES customers(id));
+CREATE TABLE Customers (id INT, name VARCHAR(50));
+CREATE TABLE audit (id INT);
+"""
+
+def tables(query):
+    return [meta for meta, index in convertToMetaData(query)]
+
+class TestSchemaDiff(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+
+    def test_normalize_name(self):
+        self.assertEqual(normalizeName('[My]]Table]'), 'my]table')
+        self.assertEqual(normalizeName('"Orders"'), 'orders')
+
+    def test_changes(self):
+        changes = [(change.action, change.kind, change.table, change.name) for change in diffSchemas(tables(SOURCE), tables(UPDATED))]
+        self.assertEqual(changes, [
+            ('altered', 'column', 'orders', 'total'),
+            ('dropped', 'column', 'orders', 'note'),
+            ('added', 'column', 'orders', 'shipped'),
+            ('added', 'foreign_key', 'orders', 'customer'),
+            ('dropped', 'table', 'legacy', None),
+            ('added', 'table', 'audit', None)
+        ])
+
+    def test_identical(self):
+        self.assertEqual(diffSchemas(tables(SOURCE), tables(SOURCE.upper())), [])
+
+    def test_altered_details(self):
+        change = diffSchemas(tables(SOURCE), tables(UPDATED))[0]
+        self.assertEqual(change.before['precision'], 10)
+        self.assertEqual(change.after['precision'], 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
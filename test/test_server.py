@@ -0,0 +1,81 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+# The server and client run from src like main.py does
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import client
+from parser.parser import convertFileToMetaData
+from server import CompareServer, SchemaCache
+
+class TestServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = self.write('source.sql', "CREATE TABLE a (id INT);\nCREATE TABLE b (x INT);")
+        self.updated = self.write('updated.sql', "CREATE TABLE a (id INT);\nCREATE TABLE b (x BIGINT);")
+        self.loaded = []
+        self.server = CompareServer(self.load, port=0)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def load(self, path):
+        self.loaded.append(os.path.basename(path))
+        return [meta for meta, index in convertFileToMetaData(path)]
+
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def request(self, **options):
+        return client.request(self.source, self.updated, self.server.server_port, **options)
+
+    def test_compare(self):
+        self.assertEqual(self.request(), (200, "ALTERED COLUMN b.x\n"))
+        status, body = self.request(format='ndjson')
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([record['type'] for record in records], ['header', 'change'])
+
+    def test_warm_cache(self):
+        self.request()
+        self.request()
+        self.assertEqual(self.loaded, ['source.sql', 'updated.sql'])
+        self.assertEqual(self.server.cache.hits, 2)
+        # An edit is picked up, even when the size doesn't change
+        self.write('updated.sql', "CREATE TABLE a (id INT);\nCREATE TABLE b (x BIT);   ")
+        self.assertEqual(self.request(), (200, "ALTERED COLUMN b.x\n"))
+        self.write('updated.sql', "CREATE TABLE a (id INT);\nCREATE TABLE b (x INT);")
+        self.assertEqual(self.request(), (200, ""))
+        self.assertEqual(self.loaded, ['source.sql', 'updated.sql', 'updated.sql', 'updated.sql'])
+
+    def test_errors(self):
+        status, body = client.request(self.source, os.path.join(self.directory.name, 'missing.sql'), self.server.server_port)
+        self.assertEqual(status, 400)
+        self.assertIn("not found", body)
+        self.assertEqual(self.request(format='xml')[0], 400)
+
+    def test_eviction(self):
+        cache = SchemaCache(self.load, maxBytes=60)
+        cache.get(self.source)
+        cache.get(self.updated)
+        self.assertEqual(list(cache.entries), [self.updated])
+        cache.get(self.updated)
+        self.assertEqual(cache.toDict()['hits'], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from src.compare.diff import diffSchemas
+from src.parser.parser import convertToMetaData
+from src.parser.snapshot import FORMAT_VERSION, MAGIC, isSnapshot, loadSnapshot, writeSnapshot
+from src.parser.tables.model import Column, Table
+
+QUERY = """CREATE TABLE parent (id INT IDENTITY(5,2) NOT NULL, name NVARCHAR(200) NULL DEFAULT 'x', PRIMARY KEY (id));
+CREATE TABLE child (id BIGINT, parentId INT, total DECIMAL(10, 2), ratio FLOAT, share AS total * ratio,
+    FOREIGN KEY (parentId) REFERENCES parent(id) ON DELETE CASCADE,
+    FOREIGN KEY (id, parentId) REFERENCES other(a, b) ON UPDATE SET NULL);
+ALTER TABLE child ADD x INT;"""
+
+class TestSnapshot(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'baseline.snap')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        tables = [meta for meta, index in convertToMetaData(QUERY)]
+        writeSnapshot(tables, self.path)
+        self.assertTrue(isSnapshot(self.path))
+        loaded = loadSnapshot(self.path)
+        self.assertEqual([table.toDict() for table in loaded], [table.toDict() for table in tables if table is not None])
+        self.assertEqual(diffSchemas(tables[:2], loaded), [])
+
+    def test_optional_attributes(self):
+        table = Table('t')
+        column = table.columns['c'] = Column('c', 'NVARCHAR')
+        column.size = 'MAX'
+        column.nullable = False
+        column.clustered = True
+        table.columns['d'] = Column('d')
+        writeSnapshot([table], self.path)
+        loaded = loadSnapshot(self.path)[0]
+        self.assertEqual(loaded.toDict(), table.toDict())
+        self.assertIsNone(loaded.columns['d'].primary_key)
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(MAGIC + (FORMAT_VERSION + 1).to_bytes(2, 'little') + bytes(30))
+        with self.assertRaisesRegex(Exception, 'version'):
+            loadSnapshot(self.path)
+        with open(self.path, 'w') as f:
+            f.write(QUERY)
+        self.assertFalse(isSnapshot(self.path))
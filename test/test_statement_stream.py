@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from src.parser.parser import convertToMetaData, iterFileMetaData, iterMetaData
+from src.parser.splitter import splitStatements
+
+SCRIPT = """CREATE TABLE a (x INT)
+GO
+-- comment; with a semicolon
+CREATE TABLE b (y VARCHAR(3) DEFAULT 'a;b'); /* ; */ CREATE TABLE [c;d] (z INT)
+go 5
+CREATE TABLE e (w INT);
+"""
+
+MODULES = """CREATE TABLE a (x INT);
+-- The body has its own statements
+CREATE PROCEDURE p AS BEGIN SET NOCOUNT ON; CREATE TABLE tmp (b INT); SELECT 1; END
+GO
+CREATE TABLE b (y INT);
+GO
+CREATE OR ALTER VIEW v AS SELECT 1 AS one; 
+GO
+CREATE TABLE c (z INT);
+"""
+
+class TestSplitStatements(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+
+    def test_boundaries(self):
+        statements = [SCRIPT[start:end].strip() for start, end in splitStatements(SCRIPT)]
+        self.assertEqual(statements, [
+            'CREATE TABLE a (x INT)',
+            "-- comment; with a semicolon\nCREATE TABLE b (y VARCHAR(3) DEFAULT 'a;b');",
+            '/* ; */ CREATE TABLE [c;d] (z INT)',
+            'CREATE TABLE e (w INT);',
+            ''
+        ])
+
+    def test_bytes(self):
+        encoded = SCRIPT.encode('utf-8')
+        self.assertEqual(list(splitStatements(encoded)), list(splitStatements(SCRIPT)))
+
+    def test_module_batches(self):
+        statements = [MODULES[start:end].strip() for start, end in splitStatements(MODULES) if MODULES[start:end].strip()]
+        self.assertEqual(len(statements), 5)
+        self.assertTrue(statements[1].startswith('-- The body has its own statements\nCREATE PROCEDURE p'))
+        self.assertTrue(statements[1].endswith('END'))
+        self.assertTrue(statements[3].startswith('CREATE OR ALTER VIEW v'))
+        self.assertEqual(list(splitStatements(MODULES.encode('utf-8'))), list(splitStatements(MODULES)))
+
+class TestIterMetaData(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+
+    def test_statement_index(self):
+        meta = [(table.tableName, index) for table, index in iterMetaData(SCRIPT)]
+        self.assertEqual(meta, [('a', 0), ('b', 1), ('[c;d]', 2), ('e', 3)])
+
+    def test_module_bodies_skipped(self):
+        for lexer in ('sqlparse', 'fast'):
+            meta = [(table.tableName, index) for table, index in iterMetaData(MODULES, lexer=lexer)]
+            self.assertEqual(meta, [('a', 0), ('b', 2), ('c', 4)])
+
+    def test_file_matches_string(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'schema.sql')
+            with open(filename, 'w') as f:
+                f.write(SCRIPT)
+            fromFile = [(repr(table), index) for table, index in iterFileMetaData(filename)]
+        fromString = [(repr(table), index) for table, index in convertToMetaData(SCRIPT)]
+        self.assertEqual(fromFile, fromString)
+
+    def test_empty_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'empty.sql')
+            open(filename, 'w').close()
+            self.assertEqual(list(iterFileMetaData(filename)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
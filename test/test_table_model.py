@@ -0,0 +1,39 @@
+import pickle
+import unittest
+from src.parser.parser import convertToMetaData
+from src.parser.tables.model import Column, ForeignKey
+
+class TestTableModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+
+    def test_columns(self):
+        query = "CREATE TABLE t (id INT NOT NULL IDENTITY(1,1), b DECIMAL(3,4), c VARCHAR(3) DEFAULT 0, PRIMARY KEY CLUSTERED (id));"
+        table = convertToMetaData(query)[0][0]
+        self.assertIsInstance(table.columns['id'], Column)
+        self.assertEqual(table.columns['id'].identity, (1, 1))
+        self.assertTrue(table.columns['id'].primary_key)
+        self.assertEqual((table.columns['b'].precision, table.columns['b'].scale), (3, 4))
+        self.assertEqual(table.columns['c'].toDict(), {'data_type': 'VARCHAR', 'size': 3, 'default_value': '0'})
+
+    def test_foreign_keys(self):
+        query = "CREATE TABLE t (r INT, b INT, c INT, FOREIGN KEY (r) REFERENCES x(y) ON DELETE SET NULL, FOREIGN KEY (b, c) REFERENCES z(p, q));"
+        table = convertToMetaData(query)[0][0]
+        foreignKey = table.columns['r'].foreign_key
+        self.assertIsInstance(foreignKey, ForeignKey)
+        self.assertEqual((foreignKey.ref_table, foreignKey.ref_columns, foreignKey.on_delete), ('x', ('y',), 'SET NULL'))
+        self.assertEqual([fk.columns for fk in table.multiForeignKeys], [('b', 'c')])
+
+    def test_tokens_released(self):
+        table = convertToMetaData("CREATE TABLE t (a INT);")[0][0]
+        self.assertIsNone(table.tokens)
+        self.assertFalse(hasattr(table, '__dict__'))
+        self.assertEqual(repr(pickle.loads(pickle.dumps(table))), repr(table))
+
+
+if __name__ == '__main__':
+    unittest.main()
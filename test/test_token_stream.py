@@ -0,0 +1,47 @@
+import sys
+import unittest
+import sqlparse
+from src.parser.parser import convertToMetaData, iterTokens
+from src.parser.tokens import TokenStream
+
+class TestTokenStream(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+
+    def test_next_peek(self):
+        stream = TokenStream(iter('abc'))
+        self.assertEqual(stream.peek(), 'a')
+        self.assertEqual(stream.index, -1)
+        self.assertEqual(stream.next(), 'a')
+        self.assertEqual(stream.next(), 'b')
+        self.assertEqual(stream.peek(), 'c')
+        self.assertEqual(stream.peek(), 'c')
+        self.assertEqual(stream.index, 1)
+        self.assertEqual(stream.next(), 'c')
+        self.assertIsNone(stream.peek())
+        with self.assertRaises(Exception):
+            stream.next()
+
+    def test_deep_nesting(self):
+        # A recursive flatten would run out of stack here
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(limit * 4) # Building the tree is recursive in sqlparse itself
+        try:
+            statement = sqlparse.sql.Parenthesis([sqlparse.sql.Token(sqlparse.tokens.Name, 'x')])
+            for _ in range(limit + 100):
+                statement = sqlparse.sql.Parenthesis([statement])
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertEqual([token.value for token in iterTokens([statement])], ['x'])
+
+    def test_parses_from_stream(self):
+        query = "CREATE TABLE t (id INT IDENTITY(1,1) NOT NULL, b DECIMAL(10, 2) DEFAULT 0, PRIMARY KEY (id));"
+        for lexer in ('sqlparse', 'fast'):
+            table, index = convertToMetaData(query, lexer=lexer)[0]
+            self.assertEqual(table.columns['b'].precision, 10)
+            self.assertTrue(table.columns['id'].primary_key)
+            self.assertIsNone(table.tokens)
@@ -0,0 +1,96 @@
+import unittest
+from unittest import mock
+from src.compare import variants
+from src.compare.canonical import canonicalDefault, canonicalExpression, columnDefinition, foreignKeyDefinition, normalizeName
+from src.compare.diff import diffSchemas, indexSchema, schemaFingerprint
+from src.compare.variants import VariantComparer
+from src.parser.parser import convertToMetaData
+from src.parser.tables.model import Column, ForeignKey, Table
+
+REFERENCE = """
+CREATE TABLE orders (id INT NOT NULL, total DECIMAL(10, 2) DEFAULT 0, customer INT,
+    PRIMARY KEY (id), FOREIGN KEY (customer) REFERENCES customers(id));
+CREATE TABLE customers (id INT NOT NULL, name VARCHAR(50), PRIMARY KEY (id));
+"""
+
+# The same schema, written differently
+REORDERED = """
+CREATE TABLE [Customers] ([ID] int PRIMARY KEY CLUSTERED, name varchar(50) NULL);
+CREATE TABLE Orders (customer INT, total decimal(10, 2) DEFAULT 0, ID INT,
+    FOREIGN KEY (customer) REFERENCES [customers](id) ON DELETE NO ACTION, PRIMARY KEY (ID));
+"""
+
+DRIFTED = """
+CREATE TABLE orders (id INT NOT NULL, total DECIMAL(12, 2) DEFAULT 0, customer INT,
+    PRIMARY KEY (id), FOREIGN KEY (customer) REFERENCES customers(id));
+CREATE TABLE customers (id INT NOT NULL, name VARCHAR(50), PRIMARY KEY (id));
+"""
+
+def tables(query):
+    return [meta for meta, index in convertToMetaData(query)]
+
+class TestVariants(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        print(f"Starting up {cls.__name__}")
+
+    def setUp(self):
+        print(f"Running test: {self._testMethodName}")
+
+    def test_normalize_names(self):
+        self.assertEqual(normalizeName('[dbo].[Orders]'), 'orders')
+        self.assertEqual(normalizeName('Sales."Order Lines"'), 'sales.order lines')
+        self.assertEqual(normalizeName('[a.b]'), 'a.b')
+
+    def test_defaults(self):
+        self.assertEqual(canonicalDefault('((0))'), canonicalDefault('0'))
+        self.assertEqual(canonicalDefault('(getdate())'), canonicalDefault('GETDATE'))
+        self.assertNotEqual(canonicalDefault("('A')"), canonicalDefault("'a'"))
+
+    def test_expressions(self):
+        self.assertEqual(canonicalExpression('a * 2 + b'), canonicalExpression('(([a]*(2))+[b])'))
+        self.assertEqual(canonicalExpression('case when a > 0 then 1 end'), canonicalExpression('(case when [a]>(0) then (1) end)'))
+        self.assertNotEqual(canonicalExpression('(a + b) * 2'), canonicalExpression('a + b * 2'))
+        self.assertNotEqual(canonicalExpression('a - (b - c)'), canonicalExpression('a - b - c'))
+
+    def test_unspecified_attributes(self):
+        column = Column('id', 'integer')
+        explicit = Column('id', 'INT')
+        explicit.nullable = True
+        self.assertEqual(columnDefinition(column), columnDefinition(explicit))
+        column.primary_key = True
+        self.assertFalse(columnDefinition(column)[5])
+        foreignKey = ForeignKey(['a'], 'dbo.t', ['id'])
+        foreignKey.on_update = 'NO ACTION'
+        self.assertEqual(foreignKeyDefinition(foreignKey), foreignKeyDefinition(ForeignKey(['A'], '[t]', ['ID'])))
+
+    def test_fingerprint_ignores_spelling(self):
+        self.assertEqual(diffSchemas(tables(REFERENCE), tables(REORDERED)), [])
+        fingerprint = schemaFingerprint(indexSchema(tables(REFERENCE)))
+        self.assertEqual(fingerprint, schemaFingerprint(indexSchema(tables(REORDERED))))
+        self.assertNotEqual(fingerprint, schemaFingerprint(indexSchema(tables(DRIFTED))))
+        self.assertEqual(len(fingerprint), 32)
+
+    def test_fingerprint_with_mixed_actions(self):
+        table = Table('t')
+        for action in ('CASCADE', None):
+            foreignKey = ForeignKey(['a'], 'u', ['id'])
+            foreignKey.on_delete = action
+            table.multiForeignKeys.append(foreignKey)
+        self.assertEqual(len(indexSchema([table])['t'].fingerprint), 16)
+
+    def test_grouped_by_variant(self):
+        comparer = VariantComparer(tables(REFERENCE))
+        with mock.patch.object(variants, 'iterDiff', wraps=variants.iterDiff) as iterDiff:
+            results = [comparer.add(f"tenant{index}", tables(DRIFTED if index % 3 == 0 else REORDERED)) for index in range(9)]
+        self.assertEqual(iterDiff.call_count, 1)
+        self.assertEqual([new for variant, new in results], [True, True] + [False] * 7)
+        drifted, unchanged = comparer.variants()[1], comparer.variants()[0]
+        self.assertEqual(unchanged.changes, [])
+        self.assertEqual(len(unchanged.targets), 6)
+        self.assertEqual(drifted.targets, ['tenant0', 'tenant3', 'tenant6'])
+        self.assertEqual([repr(change) for change in drifted.changes], ["ALTERED COLUMN orders.total"])
+        self.assertEqual(drifted.toDict(), {'variant': drifted.fingerprint, 'changes': 1, 'targets': drifted.targets})
+
+if __name__ == "__main__":
+    unittest.main()